@@ -122,6 +122,35 @@ def command_run_flower(args):
     app.worker_main(argv=argv)
 
 
+def command_import(args):
+    print("Start import.")
+    management.call_command(
+        "import_dataset",
+        args.project_id,
+        *args.paths,
+        format=args.format,
+        task=args.task,
+        user=args.user,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        atomic=args.atomic,
+        option=args.option,
+    )
+
+
+def command_export(args):
+    print("Start export.")
+    management.call_command(
+        "export_dataset",
+        args.project_id,
+        args.output,
+        format=args.format,
+        confirmed_only=args.confirmed_only,
+        batch_size=args.batch_size,
+        zip=args.zip,
+    )
+
+
 def command_help(args):
     print(parser.parse_args([args.command, "--help"]))
 
@@ -163,6 +192,33 @@ def main():
     parser_flower.add_argument("--basic_auth", type=str, help="username and password for basic authentication")
     parser_flower.set_defaults(handler=command_run_flower)
 
+    # Create a parser for offline import.
+    parser_import = subparsers.add_parser("import", help="see `import -h`")
+    parser_import.add_argument("project_id", type=int, help="the id of the project to import into")
+    parser_import.add_argument("paths", nargs="+", type=str, help="the files or directories to import")
+    parser_import.add_argument("--format", type=str, required=True, help="the file format, e.g. JSONL or ImageFile")
+    parser_import.add_argument("--task", type=str, help="the task of the dataset. The project type by default")
+    parser_import.add_argument("--user", type=str, help="the username of the importer. The project creator by default")
+    parser_import.add_argument("--workers", type=int, help="the number of processes to parse files")
+    parser_import.add_argument("--batch-size", type=int, help="the number of records per transaction")
+    parser_import.add_argument("--atomic", action="store_true", help="publish the examples only if all are saved")
+    parser_import.add_argument(
+        "--option", action="append", default=[], metavar="KEY=VALUE", help="an option of the format"
+    )
+    parser_import.add_argument("--env_file", type=str, help="read in a file of environment variables")
+    parser_import.set_defaults(handler=command_import)
+
+    # Create a parser for offline export.
+    parser_export = subparsers.add_parser("export", help="see `export -h`")
+    parser_export.add_argument("project_id", type=int, help="the id of the project to export")
+    parser_export.add_argument("output", type=str, help="the directory to write the files into")
+    parser_export.add_argument("--format", type=str, default="JSONL", help="the file format, e.g. JSONL or CSV")
+    parser_export.add_argument("--confirmed-only", action="store_true", help="export only the confirmed examples")
+    parser_export.add_argument("--batch-size", type=int, help="the number of examples written at once")
+    parser_export.add_argument("--zip", action="store_true", help="archive the directory into `<output>.zip`")
+    parser_export.add_argument("--env_file", type=str, help="read in a file of environment variables")
+    parser_export.set_defaults(handler=command_export)
+
     # Create a parser for help.
     parser_help = subparsers.add_parser("help", help="see `help -h`")
     parser_help.add_argument("command", help="command name which help is shown")
@@ -240,6 +240,42 @@ if DEBUG:
 # Batch size for importing data
 IMPORT_BATCH_SIZE = env.int("IMPORT_BATCH_SIZE", 1000)
 
+# The maximum number of bytes of records in an import batch. 0 limits batches only by IMPORT_BATCH_SIZE
+IMPORT_BATCH_BYTES = env.int("IMPORT_BATCH_BYTES", 16 * 1024 * 1024)
+
+# The minimum number of seconds between the progress updates of an import task.
+IMPORT_PROGRESS_INTERVAL = env.float("IMPORT_PROGRESS_INTERVAL", 1.0)
+
+# The number of processes to parse uploaded files in parallel
+IMPORT_WORKERS = env.int("IMPORT_WORKERS", 1)
+
+# The number of threads to check the types of uploaded files and to store them
+IMPORT_IO_WORKERS = env.int("IMPORT_IO_WORKERS", 8)
+
+# The size of a shard in bytes to import a large file by multiple tasks. 0 disables sharding.
+IMPORT_SHARD_SIZE = env.int("IMPORT_SHARD_SIZE", 0)
+
+# Whether to publish an import all at once after loading it into a hidden staging project
+IMPORT_ATOMIC = env.bool("IMPORT_ATOMIC", False)
+
+# The number of seconds after which a staging project is discarded even if its import seems running
+IMPORT_STAGING_TIMEOUT = env.int("IMPORT_STAGING_TIMEOUT", 7 * 24 * 60 * 60)
+
+# The maximum number of bytes to read for detecting the encoding of a file which isn't UTF-8
+IMPORT_ENCODING_SAMPLE_SIZE = env.int("IMPORT_ENCODING_SAMPLE_SIZE", 1024 * 1024)
+
+# The maximum number of characters of a file imported as a single text, which is read into memory at once
+IMPORT_MAX_TEXT_LENGTH = env.int("IMPORT_MAX_TEXT_LENGTH", 100 * 1024 * 1024)
+
+# The backend to insert imported rows: "orm" or "copy". "copy" uses COPY FROM STDIN on PostgreSQL only
+IMPORT_LOADER = env("IMPORT_LOADER", "orm")
+
+# The maximum number of errors in the result of an import task. All the errors are in the error report
+IMPORT_MAX_ERRORS = env.int("IMPORT_MAX_ERRORS", 1000)
+
+# The number of examples formatted and written at once by an export
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", 1000)
+
 # Necessary for email verification of new accounts
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", False)
 EMAIL_HOST = env("EMAIL_HOST", None)
@@ -255,12 +291,20 @@ if not EMAIL_HOST:
 MEDIA_ROOT = env("MEDIA_ROOT", path.join(BASE_DIR, "media"))
 MEDIA_URL = "/media/"
 
+# The directory to store the error reports of import tasks. It's in MEDIA_ROOT to be shared by the workers and the web
+IMPORT_ERROR_REPORT_DIR = env("IMPORT_ERROR_REPORT_DIR", path.join(MEDIA_ROOT, "import-error-reports"))
+
+# The number of seconds after which an error report is deleted by the next import
+IMPORT_ERROR_REPORT_TIMEOUT = env.int("IMPORT_ERROR_REPORT_TIMEOUT", 7 * 24 * 60 * 60)
+
 # Filepond settings
 DJANGO_DRF_FILEPOND_UPLOAD_TMP = path.join(BASE_DIR, "filepond-temp-uploads")
 DJANGO_DRF_FILEPOND_FILE_STORE_PATH = MEDIA_ROOT
 
 # File upload setting
 MAX_UPLOAD_SIZE = env.int("MAX_UPLOAD_SIZE", pow(1024, 3))  # default: 1GB per a file
+# The maximum size of the content of a compressed file, which MAX_UPLOAD_SIZE doesn't limit.
+MAX_DECOMPRESSED_SIZE = env.int("MAX_DECOMPRESSED_SIZE", 10 * pow(1024, 3))  # default: 10GB per a file
 ENABLE_FILE_TYPE_CHECK = env.bool("ENABLE_FILE_TYPE_CHECK", False)
 
 # Celery settings
@@ -7,7 +7,7 @@ from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 
-from .pipeline.dataset import Dataset
+from .pipeline.dataset import DEFAULT_CHUNK_SIZE, Dataset
 from .pipeline.factories import (
     create_comment,
     create_formatter,
@@ -21,7 +21,9 @@ from projects.models import Member, Project
 logger = get_task_logger(__name__)
 
 
-def create_collaborative_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
+def create_collaborative_dataset(
+    project: Project, dirpath: str, confirmed_only: bool, formatters, writer, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
     is_text_project = project.is_text_project
     if confirmed_only:
         examples = ExportedExample.objects.confirmed(project)
@@ -29,7 +31,7 @@ def create_collaborative_dataset(project: Project, dirpath: str, confirmed_only:
         examples = ExportedExample.objects.filter(project=project)
     labels = create_labels(project, examples)
     comments = create_comment(examples)
-    dataset = Dataset(examples, labels, comments, is_text_project)
+    dataset = Dataset(examples, labels, comments, is_text_project, chunk_size)
 
     service = ExportApplicationService(dataset, formatters, writer)
 
@@ -37,7 +39,9 @@ def create_collaborative_dataset(project: Project, dirpath: str, confirmed_only:
     service.export(filepath)
 
 
-def create_individual_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
+def create_individual_dataset(
+    project: Project, dirpath: str, confirmed_only: bool, formatters, writer, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
     is_text_project = project.is_text_project
     members = Member.objects.filter(project=project)
     for member in members:
@@ -47,7 +51,7 @@ def create_individual_dataset(project: Project, dirpath: str, confirmed_only: bo
             examples = ExportedExample.objects.filter(project=project)
         labels = create_labels(project, examples, member.user)
         comments = create_comment(examples, member.user)
-        dataset = Dataset(examples, labels, comments, is_text_project)
+        dataset = Dataset(examples, labels, comments, is_text_project, chunk_size)
 
         service = ExportApplicationService(dataset, formatters, writer)
 
@@ -55,17 +59,27 @@ def create_individual_dataset(project: Project, dirpath: str, confirmed_only: bo
         service.export(filepath)
 
 
-@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def export_dataset(project_id, file_format: str, confirmed_only=False):
-    project = get_object_or_404(Project, pk=project_id)
-    dirpath = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4()))
+def write_dataset(
+    project: Project, dirpath: str, file_format: str, confirmed_only=False, chunk_size: int = DEFAULT_CHUNK_SIZE
+):
+    """Writes the dataset of the project into the directory, `all.<ext>` or a file per member.
+
+    The examples are written `chunk_size` at a time, so the memory doesn't grow with the project.
+    """
     os.makedirs(dirpath, exist_ok=True)
     formatters = create_formatter(project, file_format)
     writer = create_writer(file_format)
     if project.collaborative_annotation:
-        create_collaborative_dataset(project, dirpath, confirmed_only, formatters, writer)
+        create_collaborative_dataset(project, dirpath, confirmed_only, formatters, writer, chunk_size)
     else:
-        create_individual_dataset(project, dirpath, confirmed_only, formatters, writer)
+        create_individual_dataset(project, dirpath, confirmed_only, formatters, writer, chunk_size)
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def export_dataset(project_id, file_format: str, confirmed_only=False):
+    project = get_object_or_404(Project, pk=project_id)
+    dirpath = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4()))
+    write_dataset(project, dirpath, file_format, confirmed_only, settings.EXPORT_CHUNK_SIZE)
     zip_file = shutil.make_archive(dirpath, "zip", dirpath)
     shutil.rmtree(dirpath)
     return zip_file
@@ -0,0 +1,41 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from data_export.celery_tasks import write_dataset
+from data_export.pipeline.catalog import Format
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Exports the dataset of a project into a local directory, without the task queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int, help="the id of the project to export")
+        parser.add_argument("output", type=str, help="the directory to write the files into")
+        parser.add_argument(
+            "--format",
+            type=str,
+            default="JSONL",
+            choices=[format_class.name for format_class in Format.__subclasses__()],
+            help="the file format",
+        )
+        parser.add_argument("--confirmed-only", action="store_true", help="export only the confirmed examples")
+        parser.add_argument(
+            "--batch-size", type=int, help="the number of examples written at once. EXPORT_CHUNK_SIZE by default"
+        )
+        parser.add_argument("--zip", action="store_true", help="archive the directory into `<output>.zip`")
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options["project_id"])
+        except Project.DoesNotExist:
+            raise CommandError(f"The project {options['project_id']} doesn't exist.")
+        output = os.path.abspath(options["output"])
+        chunk_size = options["batch_size"] or settings.EXPORT_CHUNK_SIZE
+        write_dataset(project, output, options["format"], options["confirmed_only"], chunk_size)
+        if options["zip"]:
+            output = shutil.make_archive(output, "zip", output)
+        self.stdout.write(self.style.SUCCESS(f"Exported {project.name} to {output}."))
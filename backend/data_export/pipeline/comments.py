@@ -1,6 +1,6 @@
 import abc
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from django.db.models import QuerySet
 
@@ -12,13 +12,26 @@ class Comments(abc.ABC):
     column = "Comments"
     fields: Tuple[str, ...] = ("example", "user")  # To boost performance
 
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
-        self.comment_groups = defaultdict(list)
-        comments = self.comment_class.objects.filter(example__in=examples)
-        if user:
-            comments = comments.filter(user=user)
-        for comment in comments.select_related(*self.fields):
-            self.comment_groups[comment.example.id].append(comment)
+    def __init__(self, examples: Union[QuerySet[ExportedExample], Iterable[int]], user=None):
+        self.examples = examples
+        self.user = user
+        self._comment_groups: Optional[Dict[int, List[ExportedComment]]] = None
+
+    @property
+    def comment_groups(self) -> Dict[int, List[ExportedComment]]:
+        """The comments by the example ids, which are read at the first access."""
+        if self._comment_groups is None:
+            self._comment_groups = defaultdict(list)
+            comments = self.comment_class.objects.filter(example__in=self.examples)
+            if self.user:
+                comments = comments.filter(user=self.user)
+            for comment in comments.select_related(*self.fields):
+                self._comment_groups[comment.example.id].append(comment)
+        return self._comment_groups
+
+    def for_examples(self, example_ids: List[int]) -> "Comments":
+        """Returns the comments of the user restricted to the examples."""
+        return self.__class__(example_ids, user=self.user)
 
     def find_by(self, example_id: int) -> Dict[str, List[ExportedComment]]:
         return {self.column: self.comment_groups[example_id]}
@@ -1,30 +1,128 @@
-from typing import Any, Dict, Iterator, List
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Set, Union
 
 import pandas as pd
 from django.db.models.query import QuerySet
 
 from .comments import Comments
 from .labels import Labels
-from data_export.models import ExportedExample
+from data_export.models import DATA, ExportedExample
+
+# The number of examples converted into a DataFrame at once by `Dataset.iter_dataframes`.
+DEFAULT_CHUNK_SIZE = 1000
+
+INT = "int"
+FLOAT = "float"
+OTHER = "other"
+
+
+def kind_of(value: Any) -> str:
+    if isinstance(value, bool):
+        return OTHER
+    if isinstance(value, int):
+        return INT
+    if isinstance(value, float):
+        return FLOAT
+    return OTHER
+
+
+class Columns:
+    """Columns collects the columns of the records of a dataset and the kinds of their values.
+
+    pandas makes the columns of a DataFrame in the order they first appear in the records, and
+    the dtype of a column depends on all the values, e.g. integers become floats if a record lacks them.
+    `conform` gives a chunk of the records the columns and dtypes of the DataFrame of all the records,
+    so the chunks are written in the same way as the whole dataset.
+    """
+
+    def __init__(self):
+        self.kinds: Dict[str, Set[str]] = {}
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.rows = 0
+
+    def add(self, record: Dict[str, Any]):
+        self.rows += 1
+        for key, value in record.items():
+            kinds = self.kinds.setdefault(key, set())
+            if value is None:
+                continue
+            self.counts[key] += 1
+            kinds.add(kind_of(value))
+
+    @property
+    def float_columns(self) -> List[str]:
+        """The numeric columns which are floats in the DataFrame of all the records."""
+        return [
+            key
+            for key, kinds in self.kinds.items()
+            if kinds and kinds <= {INT, FLOAT} and (FLOAT in kinds or self.counts[key] < self.rows)
+        ]
+
+    def conform(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        dataset = dataset.reindex(columns=list(self.kinds))
+        for column in self.float_columns:
+            dataset[column] = dataset[column].astype(float)
+        return dataset
 
 
 class Dataset:
     def __init__(
-        self, examples: QuerySet[ExportedExample], labels: List[Labels], comments: List[Comments], is_text_project=True
+        self,
+        examples: QuerySet[ExportedExample],
+        labels: List[Labels],
+        comments: List[Comments],
+        is_text_project=True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
     ):
         self.examples = examples
         self.labels = labels
         self.is_text_project = is_text_project
         self.comments = comments
+        self.chunk_size = chunk_size
 
     def __iter__(self) -> Iterator[Dict[str, Any]]:
         for example in self.examples:
-            data = example.to_dict(self.is_text_project)
-            for labels in self.labels:
-                data.update(**labels.find_by(example.id))
-            for comment in self.comments:
-                data.update(**comment.find_by(example.id))
-            yield data
+            yield self.to_record(example, self.labels, self.comments)
+
+    def to_record(self, example: ExportedExample, labels: List[Labels], comments: List[Comments]) -> Dict[str, Any]:
+        data = example.to_dict(self.is_text_project)
+        for label in labels:
+            data.update(**label.find_by(example.id))
+        for comment in comments:
+            data.update(**comment.find_by(example.id))
+        return data
 
     def to_dataframe(self) -> pd.DataFrame:
         return pd.DataFrame(self)
+
+    def iter_chunks(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the records chunk by chunk. The examples are read by a single query, and the labels
+        and comments are read per chunk, so the memory doesn't grow with the number of the examples."""
+        examples = self.examples.iterator(chunk_size=self.chunk_size)
+        while chunk := list(itertools.islice(examples, self.chunk_size)):
+            example_ids = [example.id for example in chunk]
+            labels = [label.for_examples(example_ids) for label in self.labels]
+            comments = [comment.for_examples(example_ids) for comment in self.comments]
+            yield [self.to_record(example, labels, comments) for example in chunk]
+
+    def collect_columns(self) -> Columns:
+        """Collects the columns of the records from the meta of the examples, without reading the labels."""
+        columns = Columns()
+        collections: List[Union[Labels, Comments]] = [*self.labels, *self.comments]
+        label_columns: Dict[str, List[Any]] = {collection.column: [] for collection in collections}
+        for example_id, meta in self.examples.values_list("id", "meta").iterator(chunk_size=self.chunk_size):
+            columns.add({"id": example_id, DATA: "", **meta, **label_columns})
+        return columns
+
+    def iter_dataframes(self) -> Iterator[pd.DataFrame]:
+        """Yields the DataFrames of the chunks of the records, with the columns and dtypes of `to_dataframe`.
+
+        An empty dataset yields an empty DataFrame, so the writers write the same output as `to_dataframe`.
+        """
+        columns = self.collect_columns()
+        if columns.rows == 0:
+            yield pd.DataFrame([])
+            return
+        for records in self.iter_chunks():
+            yield columns.conform(pd.DataFrame(records))
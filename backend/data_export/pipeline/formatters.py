@@ -47,7 +47,7 @@ class FastTextCategoryFormatter(Formatter):
         """Format the label column to `__label__LabelA __label__LabelB` format.
         Also, drop the columns except for `data` and `self.target_column`.
         """
-        dataset = dataset[[DATA, self.target_column, "Comments"]]
+        dataset = dataset[[DATA, self.target_column, "Comments"]].copy()
         dataset[self.target_column] = dataset[self.target_column].apply(
             lambda labels: " ".join(sorted(f"__label__{label.to_string()}" for label in labels))
         )
@@ -4,7 +4,7 @@ Represents label collection.
 
 import abc
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from django.db.models import QuerySet
 
@@ -25,13 +25,26 @@ class Labels(abc.ABC):
     column = "labels"
     fields: Tuple[str, ...] = ("example", "label")  # To boost performance
 
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
-        self.label_groups = defaultdict(list)
-        labels = self.label_class.objects.filter(example__in=examples)
-        if user:
-            labels = labels.filter(user=user)
-        for label in labels.select_related(*self.fields):
-            self.label_groups[label.example.id].append(label)
+    def __init__(self, examples: Union[QuerySet[ExportedExample], Iterable[int]], user=None):
+        self.examples = examples
+        self.user = user
+        self._label_groups: Optional[Dict[int, List[ExportedLabel]]] = None
+
+    @property
+    def label_groups(self) -> Dict[int, List[ExportedLabel]]:
+        """The labels by the example ids, which are read at the first access."""
+        if self._label_groups is None:
+            self._label_groups = defaultdict(list)
+            labels = self.label_class.objects.filter(example__in=self.examples)
+            if self.user:
+                labels = labels.filter(user=self.user)
+            for label in labels.select_related(*self.fields):
+                self._label_groups[label.example.id].append(label)
+        return self._label_groups
+
+    def for_examples(self, example_ids: List[int]) -> "Labels":
+        """Returns the labels of the user restricted to the examples."""
+        return self.__class__(example_ids, user=self.user)
 
     def find_by(self, example_id: int) -> Dict[str, List[ExportedLabel]]:
         return {self.column: self.label_groups[example_id]}
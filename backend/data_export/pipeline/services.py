@@ -1,5 +1,7 @@
 from typing import List
 
+import pandas as pd
+
 from .dataset import Dataset
 from .formatters import Formatter
 from .writers import Writer
@@ -12,8 +14,12 @@ class ExportApplicationService:
         self.writer = writer
 
     def export(self, file):
-        dataset = self.dataset.to_dataframe()
+        """Formats and writes the dataset chunk by chunk, so the memory doesn't grow with the dataset."""
+        chunks = (self.format(chunk) for chunk in self.dataset.iter_dataframes())
+        self.writer.write_chunks(file, chunks)
+        return file
+
+    def format(self, dataset: pd.DataFrame) -> pd.DataFrame:
         for formatter in self.formatters:
             dataset = formatter.format(dataset)
-        self.writer.write(file, dataset)
-        return file
+        return dataset
@@ -1,4 +1,5 @@
 import abc
+from typing import IO, Iterable
 
 import pandas as pd
 
@@ -11,6 +12,23 @@ class Writer(abc.ABC):
     def write(file, dataset: pd.DataFrame):
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def write_chunks(self, file, chunks: Iterable[pd.DataFrame]):
+        """Writes the chunks of a dataset one by one, so the whole dataset isn't kept in memory.
+
+        The output is the same as `write` of the DataFrame of all the chunks, if the chunks have the same columns.
+        """
+        with open(file, "w", encoding="utf-8", newline="") as f:
+            for i, chunk in enumerate(chunks):
+                self.write_chunk(f, chunk, i == 0)
+            self.write_end(f)
+
+    @abc.abstractmethod
+    def write_chunk(self, f: IO[str], chunk: pd.DataFrame, first: bool):
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def write_end(self, f: IO[str]):
+        pass
+
 
 class CsvWriter(Writer):
     extension = "csv"
@@ -19,14 +37,35 @@ class CsvWriter(Writer):
     def write(file, dataset: pd.DataFrame):
         dataset.to_csv(file, index=False, encoding="utf-8")
 
+    def write_chunk(self, f: IO[str], chunk: pd.DataFrame, first: bool):
+        # The header is written only before the first chunk.
+        chunk.to_csv(f, index=False, header=first)
+
 
 class JsonWriter(Writer):
     extension = "json"
+    empty = True
 
     @staticmethod
     def write(file, dataset: pd.DataFrame):
         dataset.to_json(file, orient="records", force_ascii=False)
 
+    def write_chunk(self, f: IO[str], chunk: pd.DataFrame, first: bool):
+        # The records of the chunks are joined into a single array.
+        if first:
+            f.write("[")
+            self.empty = True
+        records = chunk.to_json(orient="records", force_ascii=False)[1:-1]
+        if not records:
+            return
+        if not self.empty:
+            f.write(",")
+        f.write(records)
+        self.empty = False
+
+    def write_end(self, f: IO[str]):
+        f.write("]")
+
 
 class JsonlWriter(Writer):
     extension = "jsonl"
@@ -35,6 +74,9 @@ class JsonlWriter(Writer):
     def write(file, dataset: pd.DataFrame):
         dataset.to_json(file, orient="records", force_ascii=False, lines=True)
 
+    def write_chunk(self, f: IO[str], chunk: pd.DataFrame, first: bool):
+        chunk.to_json(f, orient="records", force_ascii=False, lines=True)
+
 
 class FastTextWriter(Writer):
     extension = "txt"
@@ -42,3 +84,6 @@ class FastTextWriter(Writer):
     @staticmethod
     def write(file, dataset: pd.DataFrame):
         dataset.to_csv(file, index=False, encoding="utf-8", header=False)
+
+    def write_chunk(self, f: IO[str], chunk: pd.DataFrame, first: bool):
+        chunk.to_csv(f, index=False, header=False)
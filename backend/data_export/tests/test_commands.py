@@ -0,0 +1,30 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+import pandas as pd
+from django.core.management import call_command
+from django.test import TestCase
+from model_mommy import mommy
+
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestExportCommand(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, collaborative_annotation=True)
+        mommy.make("ExportedExample", project=self.project.item, text="example1")
+        mommy.make("ExportedExample", project=self.project.item, text="example2")
+        self.output = os.path.join(tempfile.mkdtemp(), "dataset")
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.output))
+
+    def test_export_into_directory(self):
+        call_command("export_dataset", self.project.item.id, self.output, format="JSONL", stdout=StringIO())
+        dataset = pd.read_json(os.path.join(self.output, "all.jsonl"), lines=True)
+        self.assertEqual(sorted(dataset["text"]), ["example1", "example2"])
+
+    def test_export_into_zip(self):
+        call_command("export_dataset", self.project.item.id, self.output, format="CSV", zip=True, stdout=StringIO())
+        self.assertTrue(os.path.exists(f"{self.output}.zip"))
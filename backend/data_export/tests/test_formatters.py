@@ -1,4 +1,5 @@
 import unittest
+import warnings
 from unittest.mock import MagicMock
 
 import pandas as pd
@@ -91,6 +92,13 @@ class TestFastTextFormatter(unittest.TestCase):
         )
         self.assertEqual(dataset.to_csv(index=False, header=None), expected_dataset.to_csv(index=False, header=None))
 
+    def test_format_does_not_assign_into_slice(self):
+        self.dataset["id"] = 1
+        formatter = FastTextCategoryFormatter(TARGET_COLUMN)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", pd.errors.SettingWithCopyWarning)
+            formatter.format(self.dataset)
+
 
 class TestRenameFormatter(unittest.TestCase):
     def test_format(self):
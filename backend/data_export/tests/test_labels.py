@@ -26,3 +26,8 @@ class TestLabels(TestCase):
         categories = Categories(self.examples, user=self.project.annotator)
         result = categories.find_by(self.example1.id)
         self.assertEqual(len(result[Categories.column]), 0)
+
+    def test_for_examples(self):
+        categories = Categories(self.examples).for_examples([self.example2.id])
+        self.assertEqual(len(categories.find_by(self.example1.id)[Categories.column]), 0)
+        self.assertEqual(categories.user, None)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from model_mommy import mommy
+
+from data_export.models import ExportedExample
+from data_export.pipeline.catalog import CSV, JSON, JSONL, FastText
+from data_export.pipeline.dataset import Dataset
+from data_export.pipeline.factories import (
+    create_comment,
+    create_formatter,
+    create_labels,
+    create_writer,
+)
+from data_export.pipeline.services import ExportApplicationService
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+METAS = [
+    {"count": 1, "score": 1, "flag": True, "tags": ["a"]},
+    {"count": 2, "score": 0.5, "source": "wiki"},
+    {"count": None, "flag": False, "nested": {"key": "値"}},
+    {"count": 4, "score": 2, "mixed": "text"},
+    {"mixed": 5, "tags": []},
+]
+
+
+class TestStreamingExport(TestCase):
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dirpath)
+
+    def prepare(self, task, **kwargs):
+        self.project = prepare_project(task, collaborative_annotation=True, **kwargs)
+        for i, meta in enumerate(METAS):
+            example = mommy.make("ExportedExample", project=self.project.item, text=f'example {i}, "quoted"', meta=meta)
+            if i % 2 == 0:
+                mommy.make("ExportedCategory", example=example, user=self.project.admin)
+                mommy.make("ExportedSpan", example=example, user=self.project.admin, start_offset=0, end_offset=1)
+                mommy.make("ExportedComment", example=example, user=self.project.admin)
+
+    def export(self, file_format: str, chunk_size: int) -> bytes:
+        """Returns the output of the streaming export, and asserts it's the same as the one of the whole DataFrame."""
+        examples = ExportedExample.objects.filter(project=self.project.item)
+        formatters = create_formatter(self.project.item, file_format)
+        writer = create_writer(file_format)
+        dataset = Dataset(
+            examples, create_labels(self.project.item, examples), create_comment(examples), chunk_size=chunk_size
+        )
+        streamed = os.path.join(self.dirpath, "streamed")
+        ExportApplicationService(dataset, formatters, writer).export(streamed)
+
+        whole = os.path.join(self.dirpath, "whole")
+        dataframe = dataset.to_dataframe()
+        for formatter in formatters:
+            dataframe = formatter.format(dataframe)
+        writer.write(whole, dataframe)
+        with open(streamed, "rb") as f, open(whole, "rb") as g:
+            output = f.read()
+            self.assertEqual(output, g.read())
+        return output
+
+    def test_text_classification(self):
+        self.prepare(ProjectType.DOCUMENT_CLASSIFICATION)
+        for file_format in [CSV.name, JSON.name, JSONL.name, FastText.name]:
+            for chunk_size in [1, 2, 100]:
+                with self.subTest(file_format=file_format, chunk_size=chunk_size):
+                    self.assertTrue(self.export(file_format, chunk_size))
+
+    def test_sequence_labeling(self):
+        self.prepare(ProjectType.SEQUENCE_LABELING)
+        for chunk_size in [1, 2, 100]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertTrue(self.export(JSONL.name, chunk_size))
+
+    def test_empty_project(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, collaborative_annotation=True)
+        for file_format in [CSV.name, JSON.name, JSONL.name]:
+            with self.subTest(file_format=file_format):
+                self.export(file_format, 2)
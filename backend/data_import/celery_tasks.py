@@ -1,73 +1,332 @@
-from typing import List
+import functools
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
 
 import filetype
-from celery import shared_task
+from celery import chord, shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django_drf_filepond.api import store_upload
 from django_drf_filepond.models import TemporaryUpload
 
 from .datasets import load_dataset
+from .models import ImportCheckpoint
 from .pipeline.catalog import Format, create_file_format
+from .pipeline.compression import check_decompressed_size, expand_archives
+from .pipeline.error_reports import ErrorReport, delete_expired_reports
+from .pipeline.examples import MERGE_DUPLICATES, SKIP_DUPLICATES
 from .pipeline.exceptions import (
     FileImportException,
     FileTypeException,
+    ImportOptionException,
     MaximumFileSizeException,
 )
+from .pipeline.parsers import DEFAULT_ENCODING
+from .pipeline.progress import Progress
 from .pipeline.readers import FileName
+from .pipeline.records import BatchStats
+from .pipeline.shards import Shard, is_shardable, split_files
+from .pipeline.staging import StagingProject
+from .pipeline.uploads import UploadStore, add_media_files, map_in_threads
 from projects.models import Project
 
+# The custom state of an import task which is running.
+PROGRESS = "PROGRESS"
+
 
 def check_file_type(filename, file_format: Format, filepath: str):
     if not settings.ENABLE_FILE_TYPE_CHECK:
         return
     kind = filetype.guess(filepath)
-    if not file_format.validate_mime(kind.mime):
-        raise FileTypeException(filename, kind.mime, file_format.accept_types)
+    # A file whose type can't be guessed is treated as an arbitrary binary file.
+    mime = kind.mime if kind else "application/octet-stream"
+    if not file_format.validate_mime(mime):
+        raise FileTypeException(filename, mime, file_format.accept_types)
+
+
+def inspect_upload(tu: TemporaryUpload, file_format: Format) -> Optional[FileImportException]:
+    """Returns the error of an uploaded file, or None if it can be imported. It only reads the file."""
+    if tu.file.size > settings.MAX_UPLOAD_SIZE:
+        return MaximumFileSizeException(tu.upload_name, settings.MAX_UPLOAD_SIZE)
+    try:
+        check_file_type(tu.upload_name, file_format, tu.get_file_path())
+    except FileTypeException as e:
+        return e
+    if file_format.compressible:
+        return check_decompressed_size(FileName(tu.get_file_path(), tu.file.name, tu.upload_name))
+    return None
 
 
 def check_uploaded_files(upload_ids: List[str], file_format: Format):
+    """Checks the uploaded files by a thread pool, and deletes the ones which can't be imported."""
     errors: List[FileImportException] = []
     cleaned_ids = []
-    temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids)
-    for tu in temporary_uploads:
-        if tu.file.size > settings.MAX_UPLOAD_SIZE:
-            errors.append(MaximumFileSizeException(tu.upload_name, settings.MAX_UPLOAD_SIZE))
-            tu.delete()
-            continue
-        try:
-            check_file_type(tu.upload_name, file_format, tu.get_file_path())
-        except FileTypeException as e:
-            errors.append(e)
+    temporary_uploads = list(TemporaryUpload.objects.filter(upload_id__in=upload_ids))
+    inspect = functools.partial(inspect_upload, file_format=file_format)
+    results = map_in_threads(inspect, temporary_uploads, settings.IMPORT_IO_WORKERS)
+    for tu, error in zip(temporary_uploads, results):
+        if error:
+            errors.append(error)
             tu.delete()
             continue
         cleaned_ids.append(tu.upload_id)
     return cleaned_ids, errors
 
 
-@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def import_dataset(user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
+def get_checkpoint(request, project: Project) -> Optional[ImportCheckpoint]:
+    """Returns the checkpoint of the running task, which is created at the first run.
+
+    None if the task is called directly, not as a Celery task.
+    """
+    if not request.id:
+        return None
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+        task_id=request.id,
+        defaults={
+            "project": project,
+            "task_name": request.task,
+            "arguments": {"args": list(request.args or []), "kwargs": request.kwargs or {}},
+        },
+    )
+    return checkpoint
+
+
+class ProgressPublisher:
+    """ProgressPublisher stores the progress of an import as the `PROGRESS` state of the task.
+
+    The state is stored at most once per `interval` seconds, not to write the result backend for every batch.
+    The meta of the state has `project_id` and `progress`.
+
+    Attributes:
+        task: The bound task.
+        project_id: The project to import into.
+        interval: The minimum number of seconds between updates.
+    """
+
+    def __init__(self, task, project_id: int, interval: float = 1.0):
+        self.task = task
+        self.project_id = project_id
+        self.interval = interval
+        self.updated_at: Optional[float] = None
+
+    def __call__(self, progress: Progress):
+        now = time.monotonic()
+        if self.updated_at is not None and now - self.updated_at < self.interval:
+            return
+        self.updated_at = now
+        self.task.update_state(state=PROGRESS, meta={"project_id": self.project_id, "progress": progress.dict()})
+
+
+def get_progress_publisher(task, project_id: int) -> Optional[ProgressPublisher]:
+    """None if the task is called directly, not as a Celery task."""
+    if not task.request.id:
+        return None
+    return ProgressPublisher(task, project_id, settings.IMPORT_PROGRESS_INTERVAL)
+
+
+def get_error_report_path(project_id: int, report_id: str) -> str:
+    return os.path.join(settings.IMPORT_ERROR_REPORT_DIR, str(project_id), f"{report_id}.jsonl")
+
+
+def open_error_report(request, project_id: int, checkpoint: Optional[ImportCheckpoint]) -> ErrorReport:
+    """Opens the error report named after the task. A resumed task continues the report at the checkpoint."""
+    path = get_error_report_path(project_id, request.id or str(uuid.uuid4()))
+    if checkpoint:
+        return checkpoint.open_error_report(path)
+    return ErrorReport(path, offset=0)
+
+
+def summarize_errors(error_report: ErrorReport) -> Dict[str, Any]:
+    """Returns the first errors with the number of all the errors and the name of the report.
+
+    The report is deleted if it has no errors.
+    """
+    if error_report.count == 0:
+        error_report.delete()
+        return {"error": [], "error_count": 0, "error_report": None}
+    return {
+        "error": error_report.head(settings.IMPORT_MAX_ERRORS),
+        "error_count": error_report.count,
+        "error_report": error_report.name,
+    }
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def import_dataset(self, user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
     project = get_object_or_404(Project, pk=project_id)
     user = get_object_or_404(get_user_model(), pk=user_id)
     try:
+        # An atomic import is loaded into a staging project, and published after all the batches are saved.
+        atomic = kwargs.pop("atomic", settings.IMPORT_ATOMIC)
+        if atomic and kwargs.get("deduplication") == MERGE_DUPLICATES:
+            raise ImportOptionException("Duplicates can't be merged in an atomic import.")
         fmt = create_file_format(file_format)
         upload_ids, errors = check_uploaded_files(upload_ids, fmt)
-        temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids)
+        delete_expired_reports(settings.IMPORT_ERROR_REPORT_DIR, settings.IMPORT_ERROR_REPORT_TIMEOUT)
+        temporary_uploads = list(TemporaryUpload.objects.filter(upload_id__in=upload_ids))
+        # The images and audio files are stored once per content, and the examples refer to the stored files.
+        store_paths = {}
+        if fmt.media:
+            files = [(tu.get_file_path(), tu.upload_name) for tu in temporary_uploads]
+            paths = add_media_files(files, settings.IMPORT_IO_WORKERS)
+            store_paths = {tu.upload_id: path for tu, path in zip(temporary_uploads, paths)}
         filenames = [
-            FileName(full_path=tu.get_file_path(), generated_name=tu.file.name, upload_name=tu.upload_name)
+            FileName(
+                full_path=tu.get_file_path(),
+                generated_name=store_paths.get(tu.upload_id, tu.file.name),
+                upload_name=tu.upload_name,
+            )
             for tu in temporary_uploads
         ]
+        if fmt.compressible:
+            filenames = expand_archives(filenames)
+
+        kwargs["encoding_sample_size"] = settings.IMPORT_ENCODING_SAMPLE_SIZE
+        kwargs["max_text_length"] = settings.IMPORT_MAX_TEXT_LENGTH
+        if not atomic and settings.IMPORT_SHARD_SIZE > 0 and is_shardable(fmt):
+            encoding = kwargs.get("encoding", DEFAULT_ENCODING)
+            shards = split_files(
+                filenames, fmt, settings.IMPORT_SHARD_SIZE, encoding, settings.IMPORT_ENCODING_SAMPLE_SIZE
+            )
+            if len(shards) > 1:
+                # The result of this task is replaced with the aggregated result of the shards.
+                # Until then, its state refers to the shard tasks, which report their own progress.
+                shard_ids = [str(uuid.uuid4()) for _ in shards]
+                header = [
+                    import_shard.s(user_id, project_id, file_format, task, shard.dict(), **kwargs).set(task_id=shard_id)
+                    for shard, shard_id in zip(shards, shard_ids)
+                ]
+                if self.request.id:
+                    self.update_state(state=PROGRESS, meta={"project_id": project_id, "shards": shard_ids})
+                report_id = self.request.id or str(uuid.uuid4())
+                callback = aggregate_shards.s(upload_ids, [e.dict() for e in errors], project_id, report_id)
+                return self.replace(chord(header, callback))
 
-        dataset = load_dataset(task, fmt, filenames, project, **kwargs)
-        dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE)
-        upload_to_store(temporary_uploads)
-        errors.extend(dataset.errors)
-        return {"error": [e.dict() for e in errors]}
+        staging = None
+        if atomic:
+            # The staging projects left by crashed workers are discarded before making a new one.
+            StagingProject.discard_orphans(settings.IMPORT_STAGING_TIMEOUT)
+            staging = StagingProject.create(project, task_id=self.request.id or "")
+        dataset = load_dataset(
+            task,
+            fmt,
+            filenames,
+            staging.staging if staging else project,
+            max_workers=settings.IMPORT_WORKERS,
+            loader=settings.IMPORT_LOADER,
+            **kwargs,
+        )
+        # A retried atomic import starts over, because its staging project is discarded on failure.
+        checkpoint = None if staging else get_checkpoint(self.request, project)
+        error_report = open_error_report(self.request, project_id, checkpoint)
+        error_report.add(e.dict() for e in errors)
+        # The files are linked into the file store while the examples are inserted.
+        store = UploadStore(temporary_uploads, settings.IMPORT_IO_WORKERS, store_paths)
+        store.start()
+        try:
+            dataset.save(
+                user,
+                batch_size=settings.IMPORT_BATCH_SIZE,
+                checkpoint=checkpoint,
+                batch_bytes=settings.IMPORT_BATCH_BYTES,
+                on_progress=get_progress_publisher(self, project_id),
+                error_report=error_report,
+            )
+            if staging:
+                dropped = staging.publish(
+                    drop_duplicates=kwargs.get("deduplication") == SKIP_DUPLICATES,
+                    columns=kwargs.get("deduplication_columns"),
+                )
+                dataset.example_count -= dropped
+        except Exception as e:
+            store.discard()
+            if staging:
+                staging.discard()
+            if isinstance(e, FileImportException):
+                # A file which exceeds a limit while it's read stops the import without a retry,
+                # so nothing would resume from the checkpoint or refer to the report.
+                if checkpoint:
+                    checkpoint.delete()
+                error_report.delete()
+            raise
+        store.commit()
+        result = {
+            **summarize_errors(error_report),
+            "batches": dataset.batch_stats.dict(),
+            "progress": dataset.progress().dict(),
+        }
+        if checkpoint:
+            checkpoint.delete()
+        return result
     except FileImportException as e:
         return {"error": [e.dict()]}
 
 
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def import_shard(self, user_id, project_id, file_format: str, task: str, shard: Dict[str, Any], **kwargs):
+    project = get_object_or_404(Project, pk=project_id)
+    user = get_object_or_404(get_user_model(), pk=user_id)
+    fmt = create_file_format(file_format)
+    parsed_shard = Shard.parse(shard)
+    dataset = load_dataset(
+        task,
+        fmt,
+        [parsed_shard.filename],
+        project,
+        loader=settings.IMPORT_LOADER,
+        **{**kwargs, **parsed_shard.parser_kwargs},
+    )
+    checkpoint = get_checkpoint(self.request, project)
+    error_report = open_error_report(self.request, project_id, checkpoint)
+    dataset.save(
+        user,
+        batch_size=settings.IMPORT_BATCH_SIZE,
+        checkpoint=checkpoint,
+        batch_bytes=settings.IMPORT_BATCH_BYTES,
+        on_progress=get_progress_publisher(self, project_id),
+        error_report=error_report,
+    )
+    result = {
+        **summarize_errors(error_report),
+        "count": dataset.example_count,
+        "batches": dataset.batch_stats.dict(),
+        "progress": dataset.progress().dict(),
+    }
+    if checkpoint:
+        checkpoint.delete()
+    return result
+
+
+@shared_task
+def aggregate_shards(
+    results: List[Dict[str, Any]],
+    upload_ids: List[str],
+    errors: List[Dict[str, Any]],
+    project_id: int,
+    report_id: str,
+):
+    temporary_uploads = TemporaryUpload.objects.filter(upload_id__in=upload_ids)
+    upload_to_store(temporary_uploads)
+    error_report = ErrorReport(get_error_report_path(project_id, report_id), offset=0)
+    error_report.add(errors)
+    batch_stats = BatchStats()
+    progress = Progress(eta=0.0)
+    for result in results:
+        if result["error_report"]:
+            shard_report = ErrorReport(get_error_report_path(project_id, result["error_report"]), result["error_count"])
+            error_report.extend(shard_report)
+            shard_report.delete()
+        batch_stats.merge(BatchStats(**result["batches"]))
+        progress.merge(Progress(**result["progress"]))
+    return {
+        **summarize_errors(error_report),
+        "count": sum(result["count"] for result in results),
+        "batches": batch_stats.dict(),
+        "progress": progress.dict(),
+    }
+
+
 def upload_to_store(temporary_uploads):
-    for tu in temporary_uploads:
-        store_upload(tu.upload_id, destination_file_path=tu.file.name)
+    UploadStore(list(temporary_uploads), settings.IMPORT_IO_WORKERS).commit()
@@ -1,55 +1,179 @@
 import abc
-from typing import List, Type
+import time
+from typing import Callable, List, Optional, Type, Union
 
 from django.contrib.auth.models import User
+from django.db import transaction
 
-from .models import DummyLabelType
+from .models import DummyLabelType, ImportCheckpoint
 from .pipeline.catalog import RELATION_EXTRACTION, Format
 from .pipeline.data import BaseData, BinaryData, TextData
-from .pipeline.examples import Examples
+from .pipeline.error_reports import ErrorReport
+from .pipeline.examples import (
+    MERGE_DUPLICATES,
+    NO_DEDUPLICATION,
+    SKIP_DUPLICATES,
+    Examples,
+)
 from .pipeline.exceptions import FileParseException
 from .pipeline.factories import create_parser
 from .pipeline.label import CategoryLabel, Label, RelationLabel, SpanLabel, TextLabel
 from .pipeline.label_types import LabelTypes
 from .pipeline.labels import Categories, Labels, Relations, Spans, Texts
+from .pipeline.loaders import ORM_LOADER, Loader, ORMLoader, create_loader
 from .pipeline.makers import BinaryExampleMaker, ExampleMaker, LabelMaker
+from .pipeline.progress import Progress
 from .pipeline.readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
     FileName,
+    ParallelReader,
     Reader,
 )
+from .pipeline.records import BatchStats, RecordBatch
 from label_types.models import CategoryType, LabelType, RelationType, SpanType
 from projects.models import Project, ProjectType
 
+ErrorSource = Union[Reader, ExampleMaker, LabelMaker]
+
 
 class Dataset(abc.ABC):
-    def __init__(self, reader: Reader, project: Project, **kwargs):
+    """Dataset saves the records read by the reader as examples and labels.
+
+    The text datasets drop the records whose content is already in the project if `deduplication`
+    is `skip` or `merge`. The content is the text and the meta columns in `deduplication_columns`.
+    With `merge`, the labels of the dropped records are added to the existing examples.
+
+    The errors are kept in memory unless `save` is given an error report, to which they are
+    written after each batch.
+    """
+
+    def __init__(self, reader: Reader, project: Project, loader: Optional[Loader] = None, **kwargs):
         self.reader = reader
         self.project = project
+        self.loader = loader or ORMLoader()
         self.kwargs = kwargs
+        self.example_count = 0
+        self.label_count = 0
+        self.duplicate_count = 0
+        self.batch_stats = BatchStats()
+        self.started_at = time.monotonic()
+        self.skipped_count = 0
+        self.error_report: Optional[ErrorReport] = None
+        self.deduplication = kwargs.get("deduplication") or NO_DEDUPLICATION
+        self.deduplication_columns = kwargs.get("deduplication_columns") or []
+
+    def save(
+        self,
+        user: User,
+        batch_size: int = 1000,
+        checkpoint: Optional[ImportCheckpoint] = None,
+        batch_bytes: int = 0,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+        error_report: Optional[ErrorReport] = None,
+    ):
+        """Saves the records batch by batch. Each batch is committed in a transaction.
+
+        Args:
+            user: The user who imports the data.
+            batch_size: The maximum number of records in a batch.
+            checkpoint: If given, the records committed before it are skipped,
+                and it is advanced in the transaction of each batch.
+            batch_bytes: The maximum estimated size of records in a batch in bytes. 0 doesn't limit the size.
+            on_progress: If given, it is called with the progress after each batch is committed.
+            error_report: If given, the errors are written to it after each batch instead of kept in memory.
+                It should be opened at the checkpoint.
+        """
+        self.started_at = time.monotonic()
+        self.error_report = error_report
+        skip = 0
+        if checkpoint:
+            skip = checkpoint.record_count
+            self.example_count = checkpoint.example_count
+        self.skipped_count = skip
+        for records in self.reader.batch(batch_size, skip=skip, max_bytes=batch_bytes):
+            self.batch_stats.add(records)
+            with transaction.atomic():
+                examples = self.save_batch(user, records)
+                self.example_count += len(examples)
+                self.flush_errors()
+                if checkpoint:
+                    checkpoint.advance(records, self.example_count, self.error_report)
+            if on_progress:
+                on_progress(self.progress())
+        # The errors found after the last record, e.g. the broken lines at the end of the file.
+        self.flush_errors()
+
+    def progress(self) -> Progress:
+        """Returns the progress of `save`.
+
+        The records skipped by the checkpoint are counted as parsed, because they are read again.
+        """
+        return Progress.measure(
+            elapsed=time.monotonic() - self.started_at,
+            total_bytes=self.reader.total_bytes,
+            bytes_read=self.reader.bytes_read,
+            rows=self.skipped_count + self.batch_stats.total_rows,
+            examples=self.example_count,
+            labels=self.label_count,
+            errors=self.error_count,
+        )
 
-    def save(self, user: User, batch_size: int = 1000):
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
         raise NotImplementedError()
 
+    def save_examples(self, examples: Examples):
+        if self.deduplication in (SKIP_DUPLICATES, MERGE_DUPLICATES):
+            examples.deduplicate(
+                self.project,
+                merge=self.deduplication == MERGE_DUPLICATES,
+                columns=self.deduplication_columns,
+            )
+            self.duplicate_count += examples.duplicate_count
+        examples.save(self.loader)
+
+    def save_labels(self, labels: Labels, user: User, examples: Examples, **kwargs):
+        labels.save(user, examples, self.loader, **kwargs)
+        self.label_count += len(labels.saved_labels)
+
     @property
-    def errors(self) -> List[FileParseException]:
+    def error_sources(self) -> List[ErrorSource]:
+        """The reader and makers which collect the errors."""
         raise NotImplementedError()
 
+    @property
+    def errors(self) -> List[FileParseException]:
+        """The errors which haven't been written to the error report."""
+        return [error for source in self.error_sources for error in source.errors]
+
+    @property
+    def error_count(self) -> int:
+        """The number of errors found, including the ones written to the error report."""
+        reported = self.error_report.count if self.error_report else 0
+        return reported + len(self.errors)
+
+    def flush_errors(self):
+        """Moves the errors to the error report, so they don't stay in memory."""
+        if self.error_report is None:
+            return
+        self.error_report.add(error.dict() for error in self.errors)
+        for source in self.error_sources:
+            source.clear_errors()
+
 
 class PlainDataset(Dataset):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         super().__init__(reader, project, **kwargs)
         self.example_maker = ExampleMaker(project=project, data_class=TextData)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
+        examples = Examples(self.example_maker.make(records))
+        self.save_examples(examples)
+        return examples
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors
+    def error_sources(self) -> List[ErrorSource]:
+        return [self.reader, self.example_maker]
 
 
 class DatasetWithSingleLabelType(Dataset):
@@ -71,23 +195,23 @@ class DatasetWithSingleLabelType(Dataset):
             column=kwargs.get("column_label") or DEFAULT_LABEL_COLUMN, label_class=self.label_class
         )
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        self.save_examples(examples)
 
-            # create label types
-            labels = self.labels_class(self.label_maker.make(records), self.types)
-            labels.clean(self.project)
-            labels.save_types(self.project)
+        # create label types
+        labels = self.labels_class(self.label_maker.make(records), self.types)
+        labels.clean(self.project)
+        labels.save_types(self.project)
 
-            # create Labels
-            labels.save(user, examples)
+        # create Labels
+        self.save_labels(labels, user, examples)
+        return examples
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.label_maker.errors
+    def error_sources(self) -> List[ErrorSource]:
+        return [self.reader, self.example_maker, self.label_maker]
 
 
 class BinaryDataset(Dataset):
@@ -95,14 +219,14 @@ class BinaryDataset(Dataset):
         super().__init__(reader, project, **kwargs)
         self.example_maker = BinaryExampleMaker(project=project, data_class=BinaryData)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
+        return examples
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors
+    def error_sources(self) -> List[ErrorSource]:
+        return [self.reader, self.example_maker]
 
 
 class TextClassificationDataset(DatasetWithSingleLabelType):
@@ -140,28 +264,28 @@ class RelationExtractionDataset(Dataset):
         self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
         self.relation_maker = LabelMaker(column="relations", label_class=RelationLabel)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        self.save_examples(examples)
 
-            # create label types
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
+        # create label types
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        spans.save_types(self.project)
 
-            relations = Relations(self.relation_maker.make(records), self.relation_types)
-            relations.clean(self.project)
-            relations.save_types(self.project)
+        relations = Relations(self.relation_maker.make(records), self.relation_types)
+        relations.clean(self.project)
+        relations.save_types(self.project)
 
-            # create Labels
-            spans.save(user, examples)
-            relations.save(user, examples, spans=spans)
+        # create Labels
+        self.save_labels(spans, user, examples)
+        self.save_labels(relations, user, examples, spans=spans)
+        return examples
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.span_maker.errors + self.relation_maker.errors
+    def error_sources(self) -> List[ErrorSource]:
+        return [self.reader, self.example_maker, self.span_maker, self.relation_maker]
 
 
 class CategoryAndSpanDataset(Dataset):
@@ -178,28 +302,28 @@ class CategoryAndSpanDataset(Dataset):
         self.category_maker = LabelMaker(column="cats", label_class=CategoryLabel)
         self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: RecordBatch) -> Examples:
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        self.save_examples(examples)
 
-            # create label types
-            categories = Categories(self.category_maker.make(records), self.category_types)
-            categories.clean(self.project)
-            categories.save_types(self.project)
+        # create label types
+        categories = Categories(self.category_maker.make(records), self.category_types)
+        categories.clean(self.project)
+        categories.save_types(self.project)
 
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        spans.save_types(self.project)
 
-            # create Labels
-            categories.save(user, examples)
-            spans.save(user, examples)
+        # create Labels
+        self.save_labels(categories, user, examples)
+        self.save_labels(spans, user, examples)
+        return examples
 
     @property
-    def errors(self) -> List[FileParseException]:
-        return self.reader.errors + self.example_maker.errors + self.category_maker.errors + self.span_maker.errors
+    def error_sources(self) -> List[ErrorSource]:
+        return [self.reader, self.example_maker, self.category_maker, self.span_maker]
 
 
 def select_dataset(project: Project, task: str, file_format: Format) -> Type[Dataset]:
@@ -222,8 +346,20 @@ def select_dataset(project: Project, task: str, file_format: Format) -> Type[Dat
     return mapping[task]
 
 
-def load_dataset(task: str, file_format: Format, data_files: List[FileName], project: Project, **kwargs) -> Dataset:
+def load_dataset(
+    task: str,
+    file_format: Format,
+    data_files: List[FileName],
+    project: Project,
+    max_workers: int = 1,
+    loader: str = ORM_LOADER,
+    **kwargs,
+) -> Dataset:
     parser = create_parser(file_format, **kwargs)
-    reader = Reader(data_files, parser)
+    data_files = [source for filename in data_files for source in parser.list_sources(filename)]
+    if max_workers > 1:
+        reader: Reader = ParallelReader(data_files, parser, max_workers=max_workers)
+    else:
+        reader = Reader(data_files, parser)
     dataset_class = select_dataset(project, task, file_format)
-    return dataset_class(reader, project, **kwargs)
+    return dataset_class(reader, project, loader=create_loader(loader), **kwargs)
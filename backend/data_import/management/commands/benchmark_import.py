@@ -0,0 +1,208 @@
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import tempfile
+import time
+from dataclasses import dataclass, field
+from multiprocessing.process import BaseProcess
+from typing import Any, Dict, List, Optional, Type
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from data_import.datasets import load_dataset
+from data_import.pipeline.catalog import RELATION_EXTRACTION, create_file_format
+from data_import.pipeline.readers import FileName
+from projects.models import (
+    ImageClassificationProject,
+    IntentDetectionAndSlotFillingProject,
+    Project,
+    ProjectType,
+    Seq2seqProject,
+    SequenceLabelingProject,
+    TextClassificationProject,
+)
+
+TEXT = "Google was founded on September 4, 1998, by Larry Page and Sergey Brin."
+
+
+def make_relation_record(i: int) -> Dict[str, Any]:
+    return {
+        "text": TEXT,
+        "entities": [
+            {"id": 1, "start_offset": 0, "end_offset": 6, "label": "ORG"},
+            {"id": 2, "start_offset": 44, "end_offset": 54, "label": "PERSON"},
+            {"id": 3, "start_offset": 59, "end_offset": 70, "label": "PERSON"},
+        ],
+        "relations": [
+            {"id": 1, "from_id": 2, "to_id": 1, "type": "founded"},
+            {"id": 2, "from_id": 3, "to_id": 1, "type": "founded"},
+        ],
+    }
+
+
+@dataclass
+class Case:
+    """Case is a dataset to measure the import throughput.
+
+    Attributes:
+        name: The name shown in the report.
+        task: The task passed to `load_dataset`.
+        project_class: The project class to import the dataset into.
+        file_format: The file format.
+        make_record: The function to create the i-th record. If None, the same file is imported repeatedly.
+        project_kwargs: The project attributes.
+    """
+
+    name: str
+    task: str
+    project_class: Type[Project]
+    file_format: str
+    make_record: Any = None
+    project_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def write(self, directory: str, rows: int) -> List[FileName]:
+        path = os.path.join(directory, self.name)
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(rows):
+                if self.make_record is None:
+                    f.write(TEXT)
+                    break
+                elif self.file_format == "TextLine":
+                    f.write(self.make_record(i) + "\n")
+                else:
+                    f.write(json.dumps(self.make_record(i)) + "\n")
+        filename = FileName(full_path=path, generated_name=self.name, upload_name=self.name)
+        return [filename] * (1 if self.make_record else rows)
+
+
+CASES = [
+    Case(
+        name="PlainDataset",
+        task=ProjectType.DOCUMENT_CLASSIFICATION,
+        project_class=TextClassificationProject,
+        file_format="TextLine",
+        make_record=lambda i: f"{i} {TEXT}",
+    ),
+    Case(
+        name="TextClassificationDataset",
+        task=ProjectType.DOCUMENT_CLASSIFICATION,
+        project_class=TextClassificationProject,
+        file_format="JSONL",
+        make_record=lambda i: {"text": TEXT, "label": [f"category{i % 5}", "positive"]},
+    ),
+    Case(
+        name="LongTextClassification",
+        task=ProjectType.DOCUMENT_CLASSIFICATION,
+        project_class=TextClassificationProject,
+        file_format="JSONL",
+        make_record=lambda i: {"text": f"{i} " + " ".join([TEXT] * 1000), "label": ["positive"]},
+    ),
+    Case(
+        name="SequenceLabelingDataset",
+        task=ProjectType.SEQUENCE_LABELING,
+        project_class=SequenceLabelingProject,
+        file_format="JSONL",
+        make_record=lambda i: {"text": TEXT, "label": [[0, 6, "ORG"], [44, 54, "PERSON"], [59, 70, "PERSON"]]},
+    ),
+    Case(
+        name="Seq2seqDataset",
+        task=ProjectType.SEQ2SEQ,
+        project_class=Seq2seqProject,
+        file_format="JSONL",
+        make_record=lambda i: {"text": TEXT, "label": ["Google was founded in 1998."]},
+    ),
+    Case(
+        name="RelationExtractionDataset",
+        task=RELATION_EXTRACTION,
+        project_class=SequenceLabelingProject,
+        file_format="JSONL",
+        make_record=make_relation_record,
+        project_kwargs={"use_relation": True},
+    ),
+    Case(
+        name="CategoryAndSpanDataset",
+        task=ProjectType.INTENT_DETECTION_AND_SLOT_FILLING,
+        project_class=IntentDetectionAndSlotFillingProject,
+        file_format="JSONL",
+        make_record=lambda i: {"text": TEXT, "cats": ["history"], "entities": [[0, 6, "ORG"]]},
+    ),
+    Case(
+        name="BinaryDataset",
+        task=ProjectType.IMAGE_CLASSIFICATION,
+        project_class=ImageClassificationProject,
+        file_format="ImageFile",
+    ),
+]
+
+
+def measure(case: Case, rows: int, batch_size: int, batch_bytes: int) -> Dict[str, float]:
+    """Imports the dataset in a transaction, which is rolled back at the end."""
+    User = get_user_model()
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = case.write(directory, rows)
+        with transaction.atomic():
+            user = User.objects.create(username="benchmark_import")
+            project = case.project_class.objects.create(
+                name=case.name, project_type=case.task, created_by=user, **case.project_kwargs
+            )
+            dataset = load_dataset(case.task, create_file_format(case.file_format), filenames, project)
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            dataset.save(user, batch_size=batch_size, batch_bytes=batch_bytes)
+            elapsed = time.perf_counter() - start
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            transaction.set_rollback(True)
+    return {"rows_per_sec": rows / elapsed, "peak_rss_mb": peak_rss / 1024, "rss_growth_mb": (peak_rss - rss) / 1024}
+
+
+def run_in_child(case: Case, rows: int, batch_size: int, batch_bytes: int, results: multiprocessing.Queue):
+    results.put(measure(case, rows, batch_size, batch_bytes))
+
+
+def wait_for_result(process: BaseProcess, results: multiprocessing.Queue) -> Optional[Dict[str, float]]:
+    """Waits for the result of the child process. Returns None if it exits without the result, e.g. by an error."""
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if process.is_alive():
+                continue
+        # The result may be put just before the process exits.
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            return None
+
+
+class Command(BaseCommand):
+    help = "Measures the import throughput and the peak memory usage of each dataset class with synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="the number of rows to import")
+        parser.add_argument("--batch_size", type=int, default=1000, help="the batch size")
+        parser.add_argument("--batch_bytes", type=int, default=0, help="the maximum bytes of a batch. 0 is unlimited")
+        parser.add_argument("--dataset", nargs="*", choices=[case.name for case in CASES], help="the datasets")
+
+    def handle(self, *args, **options):
+        cases = [case for case in CASES if not options["dataset"] or case.name in options["dataset"]]
+        self.stdout.write(f"{'dataset':<28}{'rows/sec':>12}{'peak RSS(MB)':>16}{'RSS growth(MB)':>18}")
+        for case in cases:
+            # Each case runs in a fresh process to measure its own peak RSS.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            results = context.Queue()
+            args = (case, options["rows"], options["batch_size"], options["batch_bytes"], results)
+            process = context.Process(target=run_in_child, args=args)
+            process.start()
+            result = wait_for_result(process, results)
+            process.join()
+            if result is None:
+                raise CommandError(f"The benchmark of {case.name} failed with the exit code {process.exitcode}.")
+            self.stdout.write(
+                f"{case.name:<28}{result['rows_per_sec']:>12.0f}"
+                f"{result['peak_rss_mb']:>16.1f}{result['rss_growth_mb']:>18.1f}"
+            )
@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.core.management.base import BaseCommand
+from seqeval.scheme import IOB2, Tokens
+
+from data_import.management.commands.benchmark_import import TEXT, make_relation_record
+from data_import.pipeline.parsers import (
+    FAST_JSON_DECODER,
+    CoNLLParser,
+    CSVParser,
+    JSONLParser,
+)
+
+
+@dataclass
+class Case:
+    """Case is a JSONL file to measure the parse throughput.
+
+    Attributes:
+        name: The name shown in the report.
+        make_record: The function to create the i-th record.
+    """
+
+    name: str
+    make_record: Callable[[int], Dict[str, Any]]
+
+    def write(self, path: str, rows: int):
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(rows):
+                f.write(json.dumps(self.make_record(i), ensure_ascii=False) + "\n")
+
+
+CASES = [
+    Case(name="Classification", make_record=lambda i: {"text": f"{i} {TEXT}", "label": [f"category{i % 5}"]}),
+    Case(name="RelationExtraction", make_record=make_relation_record),
+    Case(name="LongText", make_record=lambda i: {"text": " ".join([TEXT] * 100), "meta": {"id": i, "lang": "日本語"}}),
+]
+
+
+@dataclass
+class CSVCase:
+    """CSVCase is a CSV file to measure the parse throughput of the rows and of the column batches.
+
+    Attributes:
+        name: The name shown in the report.
+        columns: The number of columns.
+    """
+
+    name: str
+    columns: int
+
+    def write(self, path: str, rows: int):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["text", "label"] + [f"meta{j}" for j in range(self.columns - 2)])
+            for i in range(rows):
+                writer.writerow([f"{i} {TEXT}", f"category{i % 5}"] + [str(i * j) for j in range(self.columns - 2)])
+
+
+CSV_CASES = [CSVCase(name="NarrowCSV", columns=2), CSVCase(name="WideCSV", columns=20)]
+
+
+def measure_csv(path: str, rows: int, vectorized: bool, batch_size: int = 1000) -> float:
+    parser = CSVParser(encoding="utf-8")
+    start = time.perf_counter()
+    if vectorized:
+        count = sum(len(batch) for batch in parser.parse_batches(path, batch_size))
+    else:
+        count = sum(1 for _ in parser.parse(path))
+    elapsed = time.perf_counter() - start
+    assert count == rows
+    return rows / elapsed
+
+
+# The numbers of words of the CoNLL documents, which have an entity every three words.
+CONLL_LENGTHS = [1000, 10000, 50000]
+
+
+def write_conll(path: str, words: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(words):
+            tag = ["B-PER", "I-PER", "O"][i % 3]
+            f.write(f"word{i}\t{tag}\n")
+
+
+def align_by_join(words: List[str], tags: List[str], delimiter: str = " ") -> List[Tuple[int, int, str]]:
+    """The former alignment, which joins the words before each entity, as the baseline."""
+    labels = []
+    for entity in Tokens(tags, IOB2).entities:
+        text = delimiter.join(words[: entity.start])
+        start = len(text) + len(delimiter) if text else len(text)
+        end = start + len(delimiter.join(words[entity.start : entity.end]))
+        labels.append((start, end, entity.tag))
+    return labels
+
+
+class BaselineCoNLLParser(CoNLLParser):
+    def align_span(self, words: List[str], tags: List[str]) -> List[Tuple[int, int, str]]:
+        return align_by_join(words, tags, self.delimiter)
+
+
+def measure_conll(path: str, use_baseline: bool) -> float:
+    parser_class = BaselineCoNLLParser if use_baseline else CoNLLParser
+    parser = parser_class(encoding="utf-8")
+    start = time.perf_counter()
+    count = sum(1 for _ in parser.parse(path))
+    elapsed = time.perf_counter() - start
+    assert count == 1
+    return elapsed
+
+
+def measure(path: str, rows: int, use_fast_decoder: bool) -> float:
+    parser = JSONLParser(encoding="utf-8")
+    if not use_fast_decoder:
+        parser.fast_decoder = None
+    start = time.perf_counter()
+    count = sum(1 for _ in parser.parse(path))
+    elapsed = time.perf_counter() - start
+    assert count == rows
+    return rows / elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the parse throughput of JSONL files with the text I/O and the memory-mapped fast path, "
+        "of CSV files read row by row and in column batches, and of long CoNLL documents"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="the number of lines to parse")
+        parser.add_argument("--repeat", type=int, default=3, help="the number of runs. The best one is reported")
+
+    def handle(self, *args, **options):
+        self.handle_csv(options["rows"], options["repeat"])
+        self.handle_conll(options["repeat"])
+        if FAST_JSON_DECODER is None:
+            self.stderr.write("The fast path is disabled because no fast JSON decoder (orjson) is installed.")
+            return
+        rows = options["rows"]
+        self.stdout.write(f"{'dataset':<20}{'text I/O(rows/sec)':>20}{'fast path(rows/sec)':>21}{'speedup':>10}")
+        with tempfile.TemporaryDirectory() as directory:
+            for case in CASES:
+                path = os.path.join(directory, case.name)
+                case.write(path, rows)
+                baseline = max(measure(path, rows, use_fast_decoder=False) for _ in range(options["repeat"]))
+                fast = max(measure(path, rows, use_fast_decoder=True) for _ in range(options["repeat"]))
+                self.stdout.write(f"{case.name:<20}{baseline:>20.0f}{fast:>21.0f}{fast / baseline:>9.2f}x")
+
+    def handle_csv(self, rows: int, repeat: int):
+        self.stdout.write(f"{'dataset':<20}{'rows(rows/sec)':>20}{'batches(rows/sec)':>21}{'speedup':>10}")
+        with tempfile.TemporaryDirectory() as directory:
+            for case in CSV_CASES:
+                path = os.path.join(directory, case.name)
+                case.write(path, rows)
+                baseline = max(measure_csv(path, rows, vectorized=False) for _ in range(repeat))
+                fast = max(measure_csv(path, rows, vectorized=True) for _ in range(repeat))
+                self.stdout.write(f"{case.name:<20}{baseline:>20.0f}{fast:>21.0f}{fast / baseline:>9.2f}x")
+
+    def handle_conll(self, repeat: int):
+        self.stdout.write(f"{'words':<20}{'baseline(sec)':>20}{'prefix sum(sec)':>21}{'speedup':>10}")
+        with tempfile.TemporaryDirectory() as directory:
+            for words in CONLL_LENGTHS:
+                path = os.path.join(directory, f"{words}.conll")
+                write_conll(path, words)
+                baseline = min(measure_conll(path, use_baseline=True) for _ in range(repeat))
+                fast = min(measure_conll(path, use_baseline=False) for _ in range(repeat))
+                self.stdout.write(f"{words:<20}{baseline:>20.3f}{fast:>21.3f}{baseline / fast:>9.2f}x")
@@ -0,0 +1,197 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from data_import.celery_tasks import (
+    check_file_type,
+    get_error_report_path,
+    summarize_errors,
+)
+from data_import.datasets import load_dataset
+from data_import.pipeline.catalog import RELATION_EXTRACTION, create_file_format
+from data_import.pipeline.compression import (
+    check_decompressed_size,
+    expand_archives,
+    is_hidden,
+)
+from data_import.pipeline.error_reports import ErrorReport, delete_expired_reports
+from data_import.pipeline.examples import MERGE_DUPLICATES, SKIP_DUPLICATES
+from data_import.pipeline.exceptions import FileImportException
+from data_import.pipeline.progress import Progress
+from data_import.pipeline.readers import FileName
+from data_import.pipeline.staging import StagingProject
+from data_import.pipeline.uploads import store_media_files
+from projects.models import Project
+
+
+def find_files(paths: List[str]) -> List[str]:
+    """Returns the files, and the files in the directories in the order of their paths. Hidden files are skipped."""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not is_hidden(d))
+            files.extend(os.path.join(root, name) for name in sorted(names) if not is_hidden(name))
+    return files
+
+
+def parse_options(options: List[str]) -> Dict[str, Any]:
+    """Parses the options of the format given as `KEY=VALUE`. A value is parsed as JSON if it can be, e.g. `true`."""
+    parsed = {}
+    for option in options:
+        key, sep, value = option.partition("=")
+        if not sep:
+            raise CommandError(f"The option {option} isn't in the form of KEY=VALUE.")
+        try:
+            parsed[key] = json.loads(value)
+        except json.JSONDecodeError:
+            parsed[key] = value
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Imports local files into a project in this process, without the uploads and the task queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int, help="the id of the project to import into")
+        parser.add_argument("paths", nargs="+", type=str, help="the files or directories to import")
+        parser.add_argument("--format", type=str, required=True, help="the file format, e.g. JSONL or ImageFile")
+        parser.add_argument("--task", type=str, help="the task of the dataset. The project type by default")
+        parser.add_argument("--user", type=str, help="the username of the importer. The project creator by default")
+        parser.add_argument(
+            "--workers", type=int, help="the number of processes to parse files. IMPORT_WORKERS by default"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="the number of records per transaction. IMPORT_BATCH_SIZE by default"
+        )
+        parser.add_argument("--atomic", action="store_true", help="publish the examples only if all of them are saved")
+        parser.add_argument(
+            "--option",
+            action="append",
+            default=[],
+            metavar="KEY=VALUE",
+            help="an option of the format, e.g. column_data=text or deduplication=skip",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options["project_id"])
+        except Project.DoesNotExist:
+            raise CommandError(f"The project {options['project_id']} doesn't exist.")
+        user = self.get_user(project, options["user"])
+        task = options["task"] or (
+            RELATION_EXTRACTION if getattr(project, "use_relation", False) else project.project_type
+        )
+        kwargs = parse_options(options["option"])
+        atomic = options["atomic"]
+        if atomic and kwargs.get("deduplication") == MERGE_DUPLICATES:
+            raise CommandError("Duplicates can't be merged in an atomic import.")
+        kwargs["encoding_sample_size"] = settings.IMPORT_ENCODING_SAMPLE_SIZE
+        kwargs["max_text_length"] = settings.IMPORT_MAX_TEXT_LENGTH
+        try:
+            fmt = create_file_format(options["format"])
+            filenames = self.find_filenames(options["paths"], fmt)
+            staging = None
+            if atomic:
+                StagingProject.discard_orphans(settings.IMPORT_STAGING_TIMEOUT)
+                staging = StagingProject.create(project)
+            dataset = load_dataset(
+                task,
+                fmt,
+                filenames,
+                staging.staging if staging else project,
+                max_workers=options["workers"] or settings.IMPORT_WORKERS,
+                loader=settings.IMPORT_LOADER,
+                **kwargs,
+            )
+        except FileImportException as e:
+            raise CommandError(str(e))
+        delete_expired_reports(settings.IMPORT_ERROR_REPORT_DIR, settings.IMPORT_ERROR_REPORT_TIMEOUT)
+        error_report = ErrorReport(get_error_report_path(project.id, str(uuid.uuid4())), offset=0)
+        try:
+            dataset.save(
+                user,
+                batch_size=options["batch_size"] or settings.IMPORT_BATCH_SIZE,
+                batch_bytes=settings.IMPORT_BATCH_BYTES,
+                on_progress=self.write_progress,
+                error_report=error_report,
+            )
+            if staging:
+                dropped = staging.publish(
+                    drop_duplicates=kwargs.get("deduplication") == SKIP_DUPLICATES,
+                    columns=kwargs.get("deduplication_columns"),
+                )
+                dataset.example_count -= dropped
+        except Exception as e:
+            if staging:
+                staging.discard()
+            if isinstance(e, FileImportException):
+                error_report.delete()
+                raise CommandError(str(e))
+            raise
+        result = summarize_errors(error_report)
+        for error in result["error"]:
+            self.stderr.write(f"{error.get('filename')}:{error.get('line', '')}: {error.get('message')}")
+        if result["error_report"]:
+            self.stderr.write(f"{result['error_count']} errors are written to {error_report.path}.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {dataset.example_count} examples and {dataset.label_count} labels "
+                f"into {project.name} with {result['error_count']} errors."
+            )
+        )
+
+    @staticmethod
+    def get_user(project: Project, username: str):
+        if username is None:
+            return project.created_by
+        try:
+            return get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"The user {username} doesn't exist.")
+
+    @staticmethod
+    def find_filenames(paths: List[str], fmt) -> List[FileName]:
+        files = find_files(paths)
+        missing = [path for path in files if not os.path.isfile(path)]
+        if missing:
+            raise CommandError(f"The files don't exist: {', '.join(missing)}")
+        for path in files:
+            check_file_type(os.path.basename(path), fmt, path)
+        if fmt.media:
+            # The images and audio files are linked into the media store instead of being uploaded.
+            names = store_media_files([(path, path) for path in files], settings.IMPORT_IO_WORKERS)
+        else:
+            # The text files stay where they are, so the examples don't refer to them.
+            names = ["."] * len(files)
+        filenames = [
+            FileName(full_path=os.path.abspath(path), generated_name=name, upload_name=os.path.basename(path))
+            for path, name in zip(files, names)
+        ]
+        if not fmt.compressible:
+            return filenames
+        for filename in filenames:
+            error = check_decompressed_size(filename)
+            if error:
+                raise error
+        return expand_archives(filenames)
+
+    progress_at: Optional[float] = None
+
+    def write_progress(self, progress: Progress):
+        now = time.monotonic()
+        if self.progress_at is not None and now - self.progress_at < settings.IMPORT_PROGRESS_INTERVAL:
+            return
+        self.progress_at = now
+        self.stderr.write(
+            f"{progress.bytes_read}/{progress.total_bytes} bytes, {progress.examples} examples, "
+            f"{progress.errors} errors, {progress.rows_per_sec:.0f} rows/s"
+        )
@@ -0,0 +1,30 @@
+from celery import current_app
+from django.core.management.base import BaseCommand, CommandError
+
+from data_import.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Resumes a failed import task from its last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("task_id", type=str, help="the id of the import task to resume")
+
+    def handle(self, *args, **options):
+        try:
+            checkpoint = ImportCheckpoint.objects.get(task_id=options["task_id"])
+        except ImportCheckpoint.DoesNotExist:
+            raise CommandError(f"The import task {options['task_id']} has no checkpoint.")
+        # The task is sent with the same id, so it continues from the checkpoint.
+        current_app.send_task(
+            checkpoint.task_name,
+            args=checkpoint.arguments.get("args", []),
+            kwargs=checkpoint.arguments.get("kwargs", {}),
+            task_id=checkpoint.task_id,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Resumed {checkpoint.task_id} after {checkpoint.record_count} records "
+                f"(line {checkpoint.line_num} in {checkpoint.upload_name})."
+            )
+        )
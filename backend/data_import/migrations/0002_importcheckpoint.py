@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-18 19:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        ("data_import", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportCheckpoint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("task_id", models.CharField(max_length=255, unique=True)),
+                ("task_name", models.CharField(max_length=255)),
+                ("arguments", models.JSONField(default=dict)),
+                ("record_count", models.IntegerField(default=0)),
+                ("example_count", models.IntegerField(default=0)),
+                ("upload_name", models.TextField(default="")),
+                ("line_num", models.IntegerField(default=0)),
+                ("errors", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="projects.project")),
+            ],
+        ),
+    ]
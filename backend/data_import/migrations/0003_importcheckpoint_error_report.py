@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-18 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_import", "0002_importcheckpoint"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="importcheckpoint",
+            name="errors",
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="error_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="error_offset",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
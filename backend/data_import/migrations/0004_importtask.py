@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-18 21:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0008_project_allow_member_to_create_label_type_and_more"),
+        ("data_import", "0003_importcheckpoint_error_report"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportTask",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("task_id", models.CharField(max_length=255, unique=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="projects.project")),
+            ],
+        ),
+    ]
@@ -1,6 +1,13 @@
+from typing import Optional
 from unittest.mock import MagicMock
 
+from django.db import models
+
+from .pipeline.error_reports import ErrorReport
+from .pipeline.readers import LINE_NUMBER_COLUMN, UPLOAD_NAME_COLUMN
+from .pipeline.records import RecordBatch, is_null
 from label_types.models import CategoryType
+from projects.models import Project
 
 
 class DummyLabelType(CategoryType):
@@ -8,3 +15,85 @@ class DummyLabelType(CategoryType):
 
     class Meta:
         proxy = True
+
+
+class ImportTask(models.Model):
+    """ImportTask records the project which an import task is started for.
+
+    The state of a Celery task doesn't always tell its project, e.g. a failed task has only the exception,
+    so the status of a task is shown only in the project recorded here.
+
+    Attributes:
+        task_id: The id of the Celery task.
+        project: The project which the data is imported into.
+    """
+
+    task_id = models.CharField(max_length=255, unique=True)
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ImportStaging(models.Model):
+    """ImportStaging records a staging project which an atomic import loads the data into.
+
+    The staging project is deleted when the import is published or discarded. If the worker crashes
+    before that, the record is left, so the staging project can be found and discarded later.
+
+    Attributes:
+        staging: The staging project.
+        project: The project to publish into. It's null if the project has been deleted.
+        task_id: The id of the Celery task which imports the data. It's empty for the management command.
+    """
+
+    staging = models.OneToOneField(to=Project, on_delete=models.CASCADE, related_name="+")
+    project = models.ForeignKey(to=Project, on_delete=models.SET_NULL, null=True, related_name="+")
+    task_id = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ImportCheckpoint(models.Model):
+    """ImportCheckpoint records the progress of an import task after each committed batch.
+
+    A retried or resumed task with the same task id skips the records committed before,
+    so the examples aren't imported twice.
+
+    Attributes:
+        task_id: The id of the Celery task.
+        project: The project which the data is imported into.
+        task_name: The name of the Celery task, used to resume it.
+        arguments: The arguments of the Celery task, used to resume it.
+        record_count: The number of records committed.
+        example_count: The number of examples committed.
+        upload_name: The upload name of the file which has the last committed record.
+        line_num: The line number of the last committed record.
+        error_count: The number of errors in the error report until the last committed record.
+        error_offset: The size of the error report in bytes until the last committed record.
+    """
+
+    task_id = models.CharField(max_length=255, unique=True)
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    task_name = models.CharField(max_length=255)
+    arguments = models.JSONField(default=dict)
+    record_count = models.IntegerField(default=0)
+    example_count = models.IntegerField(default=0)
+    upload_name = models.TextField(default="")
+    line_num = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    error_offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def advance(self, records: RecordBatch, example_count: int, error_report: Optional[ErrorReport] = None):
+        """Moves the checkpoint past the records. It must be called in the transaction which saves them."""
+        line_num = records.get(LINE_NUMBER_COLUMN, 0)[-1]
+        self.record_count += len(records)
+        self.example_count = example_count
+        self.upload_name = records[UPLOAD_NAME_COLUMN][-1]
+        self.line_num = 0 if is_null(line_num) else int(line_num)
+        if error_report:
+            self.error_count = error_report.count
+            self.error_offset = error_report.offset
+        self.save()
+
+    def open_error_report(self, path: str) -> ErrorReport:
+        """Opens the error report without the errors written after the last committed record."""
+        return ErrorReport(path, count=self.error_count, offset=self.error_offset)
@@ -1,3 +1,4 @@
+import importlib.util
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
@@ -6,6 +7,7 @@ from typing import Dict, List, Type
 from pydantic import BaseModel
 from typing_extensions import Literal
 
+from .compression import COMPRESSED_TYPES
 from .exceptions import FileFormatException
 from projects.models import ProjectType
 
@@ -129,10 +131,17 @@ encodings = Literal[
 class Format:
     name = ""
     accept_types = ""
+    # Whether the files can be uploaded compressed by gzip, bzip2 or xz, or in zip archives.
+    compressible = True
+    # Whether each file is an example, which is stored in the content-addressable media store.
+    media = False
 
     @classmethod
     def dict(cls):
-        return {"name": cls.name, "accept_types": cls.accept_types}
+        accept_types = cls.accept_types
+        if cls.compressible and accept_types != "*":
+            accept_types = f"{accept_types}, {COMPRESSED_TYPES}"
+        return {"name": cls.name, "accept_types": accept_types}
 
     def validate_mime(self, mime: str):
         return True
@@ -167,6 +176,18 @@ class Excel(Format):
     accept_types = "application/vnd.ms-excel, application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
+class Parquet(Format):
+    name = "Parquet"
+    accept_types = "*"
+    compressible = False
+
+
+class Arrow(Format):
+    name = "Arrow"
+    accept_types = "*"
+    compressible = False
+
+
 class TextFile(Format):
     name = "TextFile"
     accept_types = "text/*"
@@ -193,6 +214,8 @@ class CoNLL(Format):
 class ImageFile(Format):
     name = "ImageFile"
     accept_types = "image/png, image/jpeg, image/bmp, image/gif"
+    compressible = False
+    media = True
 
     def validate_mime(self, mime: str):
         return mime in self.accept_types
@@ -201,12 +224,18 @@ class ImageFile(Format):
 class AudioFile(Format):
     name = "AudioFile"
     accept_types = "audio/ogg, audio/aac, audio/mpeg, audio/wav"
+    compressible = False
+    media = True
 
     def validate_mime(self, mime: str):
         return mime in self.accept_types
 
 
-class ArgColumn(BaseModel):
+class ArgDeduplication(BaseModel):
+    deduplication: Literal["none", "skip", "merge"] = "none"
+
+
+class ArgColumn(ArgDeduplication):
     encoding: encodings = "utf_8"
     column_data: str = "text"
     column_label: str = "label"
@@ -217,16 +246,25 @@ class ArgDelimiter(ArgColumn):
     delimiter: Literal[",", "\t", ";", "|", " "] = ","
 
 
-class ArgEncoding(BaseModel):
+class ArgEncoding(ArgDeduplication):
     encoding: encodings = "utf_8"
 
 
-class ArgCoNLL(BaseModel):
+class ArgCoNLL(ArgDeduplication):
     encoding: encodings = "utf_8"
     scheme: Literal["IOB2", "IOE2", "IOBES", "BILOU"] = "IOB2"
     delimiter: Literal[" ", ""] = " "
 
 
+class ArgExcel(ArgColumn):
+    all_sheets: bool = False
+
+
+class ArgColumnar(ArgDeduplication):
+    column_data: str = "text"
+    column_label: str = "label"
+
+
 class ArgNone(BaseModel):
     pass
 
@@ -345,7 +383,7 @@ Options.register(
         display_name=Excel.name,
         task_id=ProjectType.DOCUMENT_CLASSIFICATION,
         file_format=Excel,
-        arg=ArgColumn,
+        arg=ArgExcel,
         file=TEXT_CLASSIFICATION_DIR / "example.csv",
     )
 )
@@ -376,7 +414,7 @@ Options.register(
         display_name="JSONL(Relation)",
         task_id=RELATION_EXTRACTION,
         file_format=JSONL,
-        arg=ArgNone,
+        arg=ArgDeduplication,
         file=RELATION_EXTRACTION_DIR / "example.jsonl",
     )
 )
@@ -414,18 +452,37 @@ Options.register(
         display_name=Excel.name,
         task_id=ProjectType.SEQ2SEQ,
         file_format=Excel,
-        arg=ArgColumn,
+        arg=ArgExcel,
         file=SEQ2SEQ_DIR / "example.csv",
     )
 )
 
+# Columnar formats, which are available if pyarrow is installed
+if importlib.util.find_spec("pyarrow"):
+    columnar_examples = [
+        (ProjectType.DOCUMENT_CLASSIFICATION, TEXT_CLASSIFICATION_DIR / "example.csv"),
+        (ProjectType.SEQUENCE_LABELING, SEQUENCE_LABELING_DIR / "example.jsonl"),
+        (ProjectType.SEQ2SEQ, SEQ2SEQ_DIR / "example.csv"),
+    ]
+    for task_id, example in columnar_examples:
+        for columnar_format in [Parquet, Arrow]:
+            Options.register(
+                Option(
+                    display_name=columnar_format.name,
+                    task_id=task_id,
+                    file_format=columnar_format,
+                    arg=ArgColumnar,
+                    file=example,
+                )
+            )
+
 # Intent detection
 Options.register(
     Option(
         display_name=JSONL.name,
         task_id=ProjectType.INTENT_DETECTION_AND_SLOT_FILLING,
         file_format=JSONL,
-        arg=ArgNone,
+        arg=ArgDeduplication,
         file=INTENT_DETECTION_DIR / "example.jsonl",
     )
 )
@@ -0,0 +1,215 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from typing import IO, Callable, List, Optional, Tuple, Union
+
+from django.conf import settings
+
+from .exceptions import MaximumDecompressedSizeException
+from .readers import FileName
+
+# The magic numbers of the formats which compress a single file, and the classes to read them.
+COMPRESSION_OPENERS: List[Tuple[bytes, Callable[[str], io.BufferedIOBase]]] = [
+    (b"\x1f\x8b", gzip.GzipFile),
+    (b"BZh", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", lzma.LZMAFile),
+]
+MAGIC_SIZE = max(len(magic) for magic, _ in COMPRESSION_OPENERS)
+# The number of decompressed bytes to read at once when a file is measured.
+CHUNK_SIZE = 1024 * 1024
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz")
+ARCHIVE_EXTENSION = ".zip"
+# The MIME types of the compressed files, which are accepted in addition to the types of a format.
+COMPRESSED_TYPES = (
+    "application/gzip, application/x-gzip, application/x-bzip2, application/x-xz, "
+    "application/zip, application/x-zip-compressed"
+)
+
+
+def split_member_path(path: str) -> Tuple[str, Optional[str]]:
+    """Splits the path of a member of a zip archive into the path of the archive and the name of the member.
+
+    Like zipimport, a member is referred to by the path of the archive followed by its name, e.g. `data.zip/a.jsonl`.
+
+    Args:
+        path: The path to split.
+
+    Returns:
+        The path of the archive and the name of the member. The member is None if the path isn't in an archive.
+    """
+    archive, member = path, None
+    while not os.path.exists(archive):
+        parent, name = os.path.split(archive)
+        if not parent or parent == archive:
+            return path, None
+        member = name if member is None else f"{name}/{member}"
+        archive = parent
+    if member is None or not os.path.isfile(archive):
+        return path, None
+    return archive, member
+
+
+class SizeLimitedStream(io.RawIOBase):
+    """SizeLimitedStream is a raw stream which stops a decompressed stream from growing beyond a size.
+
+    The size of a compressed upload doesn't bound the size of its content, e.g. a gzip bomb, so the content
+    is counted while it's decompressed and the reading fails as soon as it exceeds the size.
+
+    Attributes:
+        file: The decompressed stream.
+        path: The path of the compressed file, which is reported in the error.
+        max_size: The maximum number of bytes to read.
+    """
+
+    def __init__(self, file: Union[IO[bytes], io.BufferedIOBase], path: str, max_size: int):
+        super().__init__()
+        self.file = file
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)
+        # One more byte than the rest is read, so the content which is just the maximum size is allowed.
+        data = self.file.read(min(len(view), self.max_size - self.size + 1))
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise MaximumDecompressedSizeException(os.path.basename(self.path), self.max_size)
+        view[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def find_opener(path: str) -> Optional[Callable[[str], io.BufferedIOBase]]:
+    """Returns the function to open the file if it's compressed by gzip, bzip2 or xz. Otherwise, returns None."""
+    with open(path, "rb") as f:
+        magic = f.read(MAGIC_SIZE)
+    for prefix, opener in COMPRESSION_OPENERS:
+        if magic.startswith(prefix):
+            return opener
+    return None
+
+
+def is_compressed(path: str) -> bool:
+    """Returns True if the file is a member of a zip archive or compressed by gzip, bzip2 or xz."""
+    _, member = split_member_path(path)
+    return member is not None or find_opener(path) is not None
+
+
+def open_binary(path: str) -> IO[bytes]:
+    """Opens a file to read bytes. A compressed file is decompressed on the fly, without extracting it to disk.
+
+    The decompressed content is limited to `MAX_DECOMPRESSED_SIZE` bytes, and reading more raises
+    MaximumDecompressedSizeException.
+
+    Args:
+        path: The path of the file, or the path of a member of a zip archive.
+
+    Returns:
+        The binary stream of the decompressed content.
+    """
+    max_size = settings.MAX_DECOMPRESSED_SIZE
+    archive, member = split_member_path(path)
+    if member is not None:
+        # The member stays readable after the archive is closed, and closes the file when it's closed.
+        with zipfile.ZipFile(archive) as zf:
+            return io.BufferedReader(SizeLimitedStream(zf.open(member), path, max_size))
+    opener = find_opener(path)
+    if opener is None:
+        return open(path, "rb")
+    return io.BufferedReader(SizeLimitedStream(opener(path), path, max_size))
+
+
+def stat_file(path: str) -> os.stat_result:
+    """Returns the status of the file, or of the archive if the path is a member of it."""
+    archive, _ = split_member_path(path)
+    return os.stat(archive)
+
+
+def content_extension(path: str) -> str:
+    """Returns the extension of the decompressed content, e.g. `xlsx` for `data.xlsx.gz`."""
+    root, ext = os.path.splitext(path)
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        root, ext = os.path.splitext(root)
+    return ext.lstrip(".").lower()
+
+
+def check_decompressed_size(filename: FileName) -> Optional[MaximumDecompressedSizeException]:
+    """Returns the error if the content of a compressed file is larger than `MAX_DECOMPRESSED_SIZE`, otherwise None.
+
+    It's checked before the import starts, so the import doesn't stop halfway through a file.
+    The sizes of the members of a zip archive are the ones stored in it, which zipfile doesn't read beyond,
+    so a zip bomb is rejected before it's decompressed. gzip, bzip2 and xz don't store the size reliably,
+    so the file is decompressed once up to the limit without writing the content anywhere.
+    """
+    max_size = settings.MAX_DECOMPRESSED_SIZE
+    if is_archive(filename):
+        with zipfile.ZipFile(filename.full_path) as zf:
+            if any(info.file_size > max_size for info in zf.infolist()):
+                return MaximumDecompressedSizeException(filename.upload_name, max_size)
+        return None
+    opener = find_opener(filename.full_path)
+    if opener is None:
+        return None
+    size = 0
+    try:
+        with opener(filename.full_path) as f:
+            while chunk := f.read(min(CHUNK_SIZE, max_size - size + 1)):
+                size += len(chunk)
+                if size > max_size:
+                    return MaximumDecompressedSizeException(filename.upload_name, max_size)
+    except (OSError, EOFError, lzma.LZMAError):
+        # A broken file is reported by the parser like an uncompressed one.
+        return None
+    return None
+
+
+def is_archive(filename: FileName) -> bool:
+    return filename.upload_name.lower().endswith(ARCHIVE_EXTENSION) and zipfile.is_zipfile(filename.full_path)
+
+
+def is_hidden(member: str) -> bool:
+    """Returns True for the files which archivers add, such as `__MACOSX/` and `.DS_Store`."""
+    return any(part.startswith((".", "__MACOSX")) for part in member.split("/"))
+
+
+def expand_archives(filenames: List[FileName]) -> List[FileName]:
+    """Replaces the zip archives with their members, which are read without being extracted.
+
+    A file is an archive if its upload name ends with `.zip`, so an Excel file, which is also a zip file,
+    isn't expanded. The upload name of a member is the upload name of the archive followed by the member name.
+    The directories and the hidden files are skipped.
+
+    Args:
+        filenames: The uploaded files.
+
+    Returns:
+        The files to read.
+    """
+    expanded = []
+    for filename in filenames:
+        if not is_archive(filename):
+            expanded.append(filename)
+            continue
+        with zipfile.ZipFile(filename.full_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or is_hidden(info.filename):
+                    continue
+                expanded.append(
+                    FileName(
+                        full_path=f"{filename.full_path}/{info.filename}",
+                        generated_name=filename.generated_name,
+                        upload_name=f"{filename.upload_name}/{info.filename}",
+                        size=info.file_size,
+                    )
+                )
+    return expanded
@@ -1,11 +1,15 @@
 import abc
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from pydantic import UUID4, BaseModel, validator
 
+from .records import is_uuid4
 from examples.models import Example
+from examples.storage import parse_media_path
 from projects.models import Project
 
+DATA_KEYS = frozenset(["example_uuid", "filename", "upload_name", "text"])
+
 
 class BaseData(BaseModel, abc.ABC):
     filename: str
@@ -20,6 +24,30 @@ class BaseData(BaseModel, abc.ABC):
     def parse(cls, example_uuid: UUID4, filename: str, upload_name: str, text: str = "", **kwargs):
         return cls(uuid=example_uuid, filename=filename, upload_name=upload_name, text=text, meta=kwargs)
 
+    @classmethod
+    def parse_or_none(cls, **row) -> Optional["BaseData"]:
+        """Parses the row into data. None if the row is invalid."""
+        try:
+            return cls.parse(**row)
+        except ValueError:
+            return None
+
+    @classmethod
+    def parse_batch(cls, rows: List[Dict[str, Any]]) -> List[Optional[Any]]:
+        """Parses the rows into data.
+
+        The subclasses validate the rows whose values already have the expected types
+        without pydantic and make lightweight records from them. The other rows are parsed
+        by `parse`, so the result is the same as parsing every row by `parse`.
+
+        Args:
+            rows: The rows to parse. They are passed to `parse` as keyword arguments.
+
+        Returns:
+            The data in the order of the rows. None for the invalid rows.
+        """
+        return [cls.parse_or_none(**row) for row in rows]
+
     def __hash__(self):
         return hash(tuple(self.dict()))
 
@@ -38,6 +66,26 @@ class TextData(BaseData):
         else:
             raise ValueError("The empty text is not allowed.")
 
+    @classmethod
+    def parse_batch(cls, rows: List[Dict[str, Any]]) -> List[Optional[Any]]:
+        data: List[Optional[Any]] = []
+        for row in rows:
+            text = row.get("text")
+            if (
+                type(text) is str
+                and type(row.get("filename")) is str
+                and type(row.get("upload_name")) is str
+                and is_uuid4(row.get("example_uuid"))
+            ):
+                if text:
+                    meta = {key: value for key, value in row.items() if key not in DATA_KEYS}
+                    data.append(TextDataRecord(row["example_uuid"], row["filename"], row["upload_name"], text, meta))
+                else:
+                    data.append(None)
+            else:
+                data.append(cls.parse_or_none(**row))
+        return data
+
     def create(self, project: Project) -> Example:
         return Example(
             uuid=self.uuid,
@@ -58,4 +106,29 @@ class BinaryData(BaseData):
             upload_name=self.upload_name,
             text=None,
             meta=self.meta,
+            media_file_id=parse_media_path(self.filename),
         )
+
+
+class TextDataRecord:
+    """TextDataRecord is lightweight text data made by `TextData.parse_batch` from the validated values.
+
+    It skips the validation of pydantic, and shares `create` with TextData.
+
+    Attributes:
+        uuid: The uuid of the example.
+        filename: The name of the stored file.
+        upload_name: The name of the uploaded file.
+        text: The text of the example.
+        meta: The other columns of the row.
+    """
+
+    __slots__ = ("uuid", "filename", "upload_name", "text", "meta")
+    create = TextData.create
+
+    def __init__(self, example_uuid: UUID4, filename: str, upload_name: str, text: str, meta: Dict[Any, Any]):
+        self.uuid = example_uuid
+        self.filename = filename
+        self.upload_name = upload_name
+        self.text = text
+        self.meta = meta
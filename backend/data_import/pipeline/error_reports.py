@@ -0,0 +1,93 @@
+import itertools
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ErrorReport:
+    """ErrorReport writes the errors of an import to a JSON Lines file, one error per line.
+
+    Only the number of errors is kept in memory, so a file with millions of broken lines
+    doesn't make the import run out of memory. The report can be reopened at a checkpoint,
+    which drops the errors written after it, e.g. the ones of a batch which was rolled back.
+
+    Attributes:
+        path: The path of the report file.
+        count: The number of errors in the report.
+    """
+
+    def __init__(self, path: str, count: int = 0, offset: Optional[int] = None):
+        """Opens the report. The file is created if it doesn't exist.
+
+        Args:
+            path: The path of the report file.
+            count: The number of errors in the file, or before `offset` if it is given.
+            offset: If given, the size of the file in bytes to keep. The rest of the file is truncated.
+        """
+        self.path = path
+        self.count = count
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            if offset is not None:
+                f.truncate(offset)
+
+    @property
+    def name(self) -> str:
+        """The file name of the report without the extension."""
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    @property
+    def offset(self) -> int:
+        """The size of the report in bytes."""
+        return os.path.getsize(self.path)
+
+    def add(self, errors: Iterable[Dict[str, Any]]):
+        """Appends the errors, which are the dicts of FileImportException."""
+        lines = [json.dumps(error, ensure_ascii=False) + "\n" for error in errors]
+        if not lines:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        self.count += len(lines)
+
+    def extend(self, other: "ErrorReport"):
+        """Appends the errors of another report, e.g. the one of a shard."""
+        with open(self.path, "ab") as f, open(other.path, "rb") as src:
+            shutil.copyfileobj(src, f)
+        self.count += other.count
+
+    def head(self, limit: int) -> List[Dict[str, Any]]:
+        """Returns the first `limit` errors."""
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in itertools.islice(f, limit)]
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def delete_expired_reports(directory: str, timeout: float) -> int:
+    """Deletes the reports in the directory which haven't been written for `timeout` seconds.
+
+    Args:
+        directory: The directory of the reports, which has a subdirectory per project.
+        timeout: The number of seconds to keep a report after it's written.
+
+    Returns:
+        The number of the deleted reports.
+    """
+    deadline = time.time() - timeout
+    deleted = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+                    deleted += 1
+            except FileNotFoundError:
+                # Another import deleted it first.
+                continue
+    return deleted
@@ -1,14 +1,83 @@
-from typing import Dict, List
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import UUID4
 
+from .loaders import Loader, ORMLoader
 from examples.models import Example
+from projects.models import Project
+
+NO_DEDUPLICATION = "none"
+SKIP_DUPLICATES = "skip"
+MERGE_DUPLICATES = "merge"
+
+
+def content_hash(text: Optional[str]) -> Optional[str]:
+    """Returns the SHA-256 hash of the text, which is stored in every imported example.
+
+    Args:
+        text: The text of the example.
+
+    Returns:
+        The hex digest of the hash, or None if the example has no text.
+    """
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def duplicate_key(example: Example, columns: Optional[List[str]] = None) -> Tuple[Optional[str], str]:
+    """Returns the key which the duplicates share: the content hash and the values of the meta columns.
+
+    Args:
+        example: The example whose content hash is set.
+        columns: The meta columns to compare. The missing ones are treated as null.
+    """
+    values = [[column, example.meta.get(column)] for column in sorted(columns or [])]
+    return example.content_hash, json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def fill_content_hashes(project: Project, batch_size: int = 1000):
+    """Stores the content hash of the examples in the project which don't have it yet.
+
+    The examples created before the hash was introduced, or not by an import, are hashed lazily
+    when an import looks up duplicates in the project instead of by a migration of the whole table.
+
+    Args:
+        project: The project whose examples to hash.
+        batch_size: The number of examples to update at once.
+    """
+    examples = Example.objects.filter(project=project, content_hash__isnull=True, text__isnull=False)
+    batch = []
+    for example in examples.only("pk", "text").order_by("pk").iterator(chunk_size=batch_size):
+        example.content_hash = content_hash(example.text)
+        batch.append(example)
+        if len(batch) == batch_size:
+            Example.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    Example.objects.bulk_update(batch, ["content_hash"])
+
+
+def lock_project(project: Project):
+    """Locks the project row until the end of the transaction, so the imports into it deduplicate one by one.
+
+    Without the lock, two shards could both find a text missing and insert it. It's a no-op on SQLite,
+    which serializes the write transactions anyway.
+    """
+    list(Project.objects.select_for_update().filter(pk=project.pk).values_list("pk", flat=True))
 
 
 class Examples:
     def __init__(self, examples: List[Example]):
         self.examples = examples
         self.uuid_to_example: Dict[UUID4, Example] = {}
+        self.duplicate_count = 0
+        self.merged_uuids: Dict[UUID4, UUID4] = {}
+        self.existing_examples: Dict[UUID4, Example] = {}
+
+    def __len__(self) -> int:
+        return len(self.examples)
 
     def __getitem__(self, uuid: UUID4) -> Example:
         return self.uuid_to_example[uuid]
@@ -16,6 +85,57 @@ class Examples:
     def __contains__(self, uuid: UUID4) -> bool:
         return uuid in self.uuid_to_example
 
-    def save(self):
-        examples = Example.objects.bulk_create(self.examples)
+    @property
+    def merge_targets(self) -> List[Example]:
+        """The saved examples which the duplicates are merged into."""
+        uuids = set(self.merged_uuids.values())
+        return [example for uuid, example in self.uuid_to_example.items() if uuid in uuids]
+
+    def deduplicate(self, project: Project, merge: bool = False, columns: Optional[List[str]] = None):
+        """Drops the examples whose content is already in the project or in the former part of the batch.
+
+        The candidates are found by the hash of the text with a single query, and the meta columns
+        are compared on them. The examples in the project which aren't hashed yet are hashed first.
+        The project is locked until the end of the transaction, so it must be
+        called in the transaction which saves the examples. If `merge` is True, the dropped examples
+        are mapped to the examples which have the same content, so their labels are added to them.
+        Otherwise, the labels of the dropped examples are skipped.
+
+        Args:
+            project: The project which the examples are imported into.
+            merge: Whether to merge the labels of the duplicates.
+            columns: The meta columns which the duplicates must also share.
+        """
+        lock_project(project)
+        fill_content_hashes(project)
+        self.set_content_hashes()
+        hashes = {example.content_hash for example in self.examples}
+        existing = Example.objects.filter(project=project, content_hash__in=hashes)
+        key_to_example = {duplicate_key(example, columns): example for example in existing}
+        examples = []
+        for example in self.examples:
+            key = duplicate_key(example, columns)
+            original = key_to_example.get(key)
+            if original is None:
+                key_to_example[key] = example
+                examples.append(example)
+                continue
+            self.duplicate_count += 1
+            if merge:
+                self.merged_uuids[example.uuid] = original.uuid
+                if original.pk is not None:
+                    self.existing_examples[original.uuid] = original
+        self.examples = examples
+
+    def set_content_hashes(self):
+        for example in self.examples:
+            example.content_hash = content_hash(example.text)
+
+    def save(self, loader: Optional[Loader] = None):
+        loader = loader or ORMLoader()
+        self.set_content_hashes()
+        examples = loader.load(Example, self.examples)
         self.uuid_to_example = {example.uuid: example for example in examples}
+        self.uuid_to_example.update(self.existing_examples)
+        for uuid, original_uuid in self.merged_uuids.items():
+            self.uuid_to_example[uuid] = self.uuid_to_example[original_uuid]
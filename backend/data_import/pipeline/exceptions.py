@@ -31,6 +31,18 @@ class MaximumFileSizeException(FileImportException):
         return {"filename": self.filename, "line": -1, "message": str(self)}
 
 
+class MaximumDecompressedSizeException(FileImportException):
+    def __init__(self, filename: str, max_size: int):
+        self.filename = filename
+        self.max_size = max_size
+
+    def __str__(self):
+        return f"The maximum size of a decompressed file is {self.max_size/1024/1024} MB"
+
+    def dict(self):
+        return {"filename": self.filename, "line": -1, "message": str(self)}
+
+
 class FileTypeException(FileImportException):
     def __init__(self, filename: str, filetype: str, allowed_types=None):
         self.filename = filename
@@ -44,6 +56,17 @@ class FileTypeException(FileImportException):
         return {"filename": self.filename, "line": -1, "message": str(self)}
 
 
+class ImportOptionException(FileImportException):
+    def __init__(self, message: str):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+    def dict(self):
+        return {"message": self.message}
+
+
 class FileFormatException(FileImportException):
     def __init__(self, file_format: str):
         self.file_format = file_format
@@ -1,10 +1,11 @@
 import abc
 import uuid
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 from pydantic import UUID4, BaseModel, NonNegativeInt, constr, root_validator
 
 from .label_types import LabelTypes
+from .records import is_uuid4
 from examples.models import Example
 from label_types.models import CategoryType, LabelType, RelationType, SpanType
 from labels.models import Category as CategoryModel
@@ -14,6 +15,16 @@ from labels.models import Span as SpanModel
 from labels.models import TextLabel as TextLabelModel
 from projects.models import Project
 
+SPAN_KEYS = frozenset(["start_offset", "end_offset", "label"])
+SPAN_KEYS_WITH_ID = SPAN_KEYS | {"id"}
+RELATION_KEYS = frozenset(["from_id", "to_id", "type"])
+RELATION_KEYS_WITH_ID = RELATION_KEYS | {"id"}
+
+
+def is_span_values(label_id: Any, start_offset: Any, end_offset: Any, label: Any) -> bool:
+    """Returns True if the values of a span have the expected types, which need no conversion."""
+    return type(label_id) is int and type(start_offset) is int and type(end_offset) is int and type(label) is str
+
 
 class Label(BaseModel, abc.ABC):
     id: int = -1
@@ -32,6 +43,37 @@ class Label(BaseModel, abc.ABC):
     def parse(cls, example_uuid: UUID4, obj: Any):
         raise NotImplementedError()
 
+    @classmethod
+    def parse_or_none(cls, example_uuid: UUID4, obj: Any) -> Optional["Label"]:
+        """Parses the object into a label. None if the object is invalid."""
+        try:
+            return cls.parse(example_uuid, obj)
+        except ValueError:
+            return None
+
+    @classmethod
+    def parse_batch(cls, example_uuids: List[UUID4], objs: List[Any]) -> List[Any]:
+        """Parses the objects into labels. The invalid objects are skipped.
+
+        The subclasses validate the objects whose values already have the expected types
+        without pydantic and make lightweight records from them. The other objects are parsed
+        by `parse`, so the result is the same as parsing every object by `parse`.
+
+        Args:
+            example_uuids: The uuids of the examples which the labels belong to.
+            objs: The objects to parse.
+
+        Returns:
+            The labels in the order of the objects.
+        """
+        labels = map(cls.parse_or_none, example_uuids, objs)
+        return [label for label in labels if label is not None]
+
+    @property
+    def type_name(self) -> Optional[str]:
+        """The text of the label type. None if the label doesn't have a label type."""
+        return None
+
     @abc.abstractmethod
     def create_type(self, project: Project) -> Optional[LabelType]:
         raise NotImplementedError()
@@ -54,6 +96,21 @@ class CategoryLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, label=obj)  # type: ignore
 
+    @classmethod
+    def parse_batch(cls, example_uuids: List[UUID4], objs: List[Any]) -> List[Any]:
+        labels: List[Any] = []
+        for example_uuid, obj in zip(example_uuids, objs):
+            if type(obj) is str and is_uuid4(example_uuid):
+                if obj:
+                    labels.append(CategoryRecord(example_uuid, obj))
+            elif (label := cls.parse_or_none(example_uuid, obj)) is not None:
+                labels.append(label)
+        return labels
+
+    @property
+    def type_name(self) -> Optional[str]:
+        return self.label
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return CategoryType(text=self.label, project=project)
 
@@ -86,6 +143,29 @@ class SpanLabel(Label):
             return cls(example_uuid=example_uuid, **obj)
         raise ValueError("SpanLabel.parse()")
 
+    @classmethod
+    def parse_batch(cls, example_uuids: List[UUID4], objs: List[Any]) -> List[Any]:
+        labels: List[Any] = []
+        for example_uuid, obj in zip(example_uuids, objs):
+            values = None
+            if type(obj) is list or type(obj) is tuple:
+                if len(obj) == 3:
+                    values = (-1, *obj)
+            elif type(obj) is dict and SPAN_KEYS <= obj.keys() <= SPAN_KEYS_WITH_ID:
+                values = (obj.get("id", -1), obj["start_offset"], obj["end_offset"], obj["label"])
+            if values is None or not is_uuid4(example_uuid) or not is_span_values(*values):
+                if (label := cls.parse_or_none(example_uuid, obj)) is not None:
+                    labels.append(label)
+                continue
+            label_id, start_offset, end_offset, label = values
+            if label and 0 <= start_offset < end_offset:
+                labels.append(SpanRecord(example_uuid, start_offset, end_offset, label, label_id))
+        return labels
+
+    @property
+    def type_name(self) -> Optional[str]:
+        return self.label
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return SpanType(text=self.label, project=project)
 
@@ -110,6 +190,17 @@ class TextLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, text=obj)  # type: ignore
 
+    @classmethod
+    def parse_batch(cls, example_uuids: List[UUID4], objs: List[Any]) -> List[Any]:
+        labels: List[Any] = []
+        for example_uuid, obj in zip(example_uuids, objs):
+            if type(obj) is str and is_uuid4(example_uuid):
+                if obj:
+                    labels.append(TextLabelRecord(example_uuid, obj))
+            elif (label := cls.parse_or_none(example_uuid, obj)) is not None:
+                labels.append(label)
+        return labels
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return None
 
@@ -129,6 +220,31 @@ class RelationLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, **obj)
 
+    @classmethod
+    def parse_batch(cls, example_uuids: List[UUID4], objs: List[Any]) -> List[Any]:
+        labels: List[Any] = []
+        for example_uuid, obj in zip(example_uuids, objs):
+            if (
+                type(obj) is dict
+                and RELATION_KEYS <= obj.keys() <= RELATION_KEYS_WITH_ID
+                and is_uuid4(example_uuid)
+                and type(obj.get("id", -1)) is int
+                and type(obj["from_id"]) is int
+                and type(obj["to_id"]) is int
+                and type(obj["type"]) is str
+            ):
+                if obj["type"]:
+                    labels.append(
+                        RelationRecord(example_uuid, obj["from_id"], obj["to_id"], obj["type"], obj.get("id", -1))
+                    )
+            elif (label := cls.parse_or_none(example_uuid, obj)) is not None:
+                labels.append(label)
+        return labels
+
+    @property
+    def type_name(self) -> Optional[str]:
+        return self.type
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return RelationType(text=self.type, project=project)
 
@@ -141,3 +257,82 @@ class RelationLabel(Label):
             from_id=kwargs["id_to_span"][(self.from_id, str(self.example_uuid))],
             to_id=kwargs["id_to_span"][(self.to_id, str(self.example_uuid))],
         )
+
+
+class LabelRecord:
+    """LabelRecord is a lightweight label made by `parse_batch` from the values validated in a batch.
+
+    It skips the validation of pydantic, and shares the methods with the corresponding label class,
+    so it can be saved in the same way as the label.
+
+    Attributes:
+        id: The id of the label in the file. -1 if the file doesn't have it.
+        uuid: The uuid of the label.
+        example_uuid: The uuid of the example which the label belongs to.
+    """
+
+    __slots__ = ("id", "uuid", "example_uuid")
+
+    def __init__(self, example_uuid: UUID4, label_id: int = -1):
+        self.id = label_id
+        self.uuid = uuid.uuid4()
+        self.example_uuid = example_uuid
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields())
+        return f"{type(self).__name__}({values})"
+
+    def fields(self) -> List[str]:
+        return [name for cls in reversed(type(self).__mro__) for name in getattr(cls, "__slots__", ())]
+
+
+class CategoryRecord(LabelRecord):
+    __slots__ = ("label",)
+    __lt__ = CategoryLabel.__lt__
+    type_name = CategoryLabel.type_name
+    create_type = CategoryLabel.create_type
+    create = CategoryLabel.create
+
+    def __init__(self, example_uuid: UUID4, label: str):
+        super().__init__(example_uuid)
+        self.label = label
+
+
+class SpanRecord(LabelRecord):
+    __slots__ = ("start_offset", "end_offset", "label")
+    __lt__ = SpanLabel.__lt__
+    type_name = SpanLabel.type_name
+    create_type = SpanLabel.create_type
+    create = SpanLabel.create
+
+    def __init__(self, example_uuid: UUID4, start_offset: int, end_offset: int, label: str, label_id: int = -1):
+        super().__init__(example_uuid, label_id)
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.label = label
+
+
+class TextLabelRecord(LabelRecord):
+    __slots__ = ("text",)
+    __lt__ = TextLabel.__lt__
+    type_name = TextLabel.type_name
+    create_type = TextLabel.create_type
+    create = TextLabel.create
+
+    def __init__(self, example_uuid: UUID4, text: str):
+        super().__init__(example_uuid)
+        self.text = text
+
+
+class RelationRecord(LabelRecord):
+    __slots__ = ("from_id", "to_id", "type")
+    __lt__ = RelationLabel.__lt__
+    type_name = RelationLabel.type_name
+    create_type = RelationLabel.create_type
+    create = RelationLabel.create
+
+    def __init__(self, example_uuid: UUID4, from_id: int, to_id: int, relation_type: str, label_id: int = -1):
+        super().__init__(example_uuid, label_id)
+        self.from_id = from_id
+        self.to_id = to_id
+        self.type = relation_type
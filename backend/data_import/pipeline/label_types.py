@@ -1,10 +1,19 @@
-from typing import Dict, List, Type
+from typing import Dict, List, Optional, Type
 
 from label_types.models import LabelType
 from projects.models import Project
 
 
 class LabelTypes:
+    """LabelTypes is a cache of the label types of a project during an import.
+
+    The label types are added to the cache when they are saved,
+    so each label type is inserted and fetched only once even if it appears in many batches.
+
+    Attributes:
+        label_type_class: The label type class.
+    """
+
     def __init__(self, label_type_class: Type[LabelType]):
         self.types: Dict[str, LabelType] = {}
         self.label_type_class = label_type_class
@@ -18,6 +27,16 @@ class LabelTypes:
     def save(self, label_types: List[LabelType]):
         self.label_type_class.objects.bulk_create(label_types, ignore_conflicts=True)
 
-    def update(self, project: Project):
+    def update(self, project: Project, texts: Optional[List[str]] = None):
+        """Fetches the label types from the database.
+
+        Args:
+            project: The project of the label types.
+            texts: The texts of the label types to fetch. If None, fetches all the label types of the project.
+        """
         types = self.label_type_class.objects.filter(project=project)
-        self.types = {label_type.text: label_type for label_type in types}
+        if texts is not None:
+            types = types.filter(text__in=texts)
+        else:
+            self.types = {}
+        self.types.update({label_type.text: label_type for label_type in types})
@@ -1,10 +1,13 @@
 import abc
 from itertools import groupby
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from .examples import Examples
 from .label import Label
 from .label_types import LabelTypes
+from .loaders import Loader, ORMLoader
+from examples.models import Example
+from label_types.models import LabelType
 from labels.models import Category as CategoryModel
 from labels.models import Label as LabelModel
 from labels.models import Relation as RelationModel
@@ -19,6 +22,8 @@ class Labels(abc.ABC):
     def __init__(self, labels: List[Label], types: LabelTypes):
         self.labels = labels
         self.types = types
+        self.saved_labels: List[LabelModel] = []
+        self.merged_labels: Dict[Any, LabelModel] = {}
 
     def __len__(self) -> int:
         return len(self.labels)
@@ -27,29 +32,73 @@ class Labels(abc.ABC):
         pass
 
     def save_types(self, project: Project):
-        types = [label.create_type(project) for label in self.labels]
-        filtered_types = list(filter(None, types))
-        self.types.save(filtered_types)
-        self.types.update(project)
-
-    def save(self, user, examples: Examples, **kwargs):
+        """Saves the label types which haven't been saved by the previous batches."""
+        new_types: Dict[str, LabelType] = {}
+        for label in self.labels:
+            name = label.type_name
+            if name is None or name in self.types or name in new_types:
+                continue
+            label_type = label.create_type(project)
+            if label_type is not None:
+                new_types[name] = label_type
+        if new_types:
+            self.types.save(list(new_types.values()))
+            self.types.update(project, texts=list(new_types))
+
+    def save(self, user, examples: Examples, loader: Optional[Loader] = None, **kwargs):
         labels = [
             label.create(user, examples[label.example_uuid], self.types, **kwargs)
             for label in self.labels
             if label.example_uuid in examples
         ]
-        self.label_model.objects.bulk_create(labels)
+        if examples.merged_uuids:
+            labels = self.drop_existing(user, examples.merge_targets, labels)
+        loader = loader or ORMLoader()
+        self.saved_labels = loader.load(self.label_model, labels)
+
+    def drop_existing(self, user, examples: List[Example], labels: List[LabelModel]) -> List[LabelModel]:
+        """Drops the labels which the examples merged with duplicates already have.
+
+        The dropped labels are mapped to the ones they are the same as by `merged_labels`.
+        """
+        example_ids = {example.pk for example in examples}
+        existing = self.label_model.objects.filter(example_id__in=example_ids, user=user)
+        key_to_label = {self.key(label): label for label in existing}
+        kept = []
+        for label in labels:
+            if label.example_id in example_ids:
+                key = self.key(label)
+                if key in key_to_label:
+                    self.merged_labels[label.uuid] = key_to_label[key]
+                    continue
+                key_to_label[key] = label
+            kept.append(label)
+        return kept
+
+    def key(self, label: LabelModel) -> Tuple:
+        """Returns the values which identify the label in an example."""
+        raise NotImplementedError()
 
 
 class Categories(Labels):
     label_model = CategoryModel
 
+    def __init__(self, labels: List[Label], types: LabelTypes):
+        super().__init__(labels, types)
+        self.exclusive = False
+
     def clean(self, project: Project):
         exclusive = getattr(project, "single_class_classification", False)
+        self.exclusive = exclusive
         if exclusive:
             groups = groupby(self.labels, lambda label: label.example_uuid)
             self.labels = [next(group) for _, group in groups]
 
+    def key(self, label: LabelModel) -> Tuple:
+        if self.exclusive:
+            return (label.example_id,)
+        return label.example_id, label.label_id
+
 
 class Spans(Labels):
     label_model = SpanModel
@@ -71,19 +120,38 @@ class Spans(Labels):
 
     @property
     def id_to_span(self) -> Dict[Tuple[int, str], SpanModel]:
-        uuids = [str(span.uuid) for span in self.labels]
-        spans = SpanModel.objects.filter(uuid__in=uuids)
+        """Maps the span id in the file and the example uuid to the saved span."""
+        spans = self.saved_labels
+        if any(span.pk is None for span in spans):
+            # The database doesn't return the primary keys from bulk inserts.
+            uuids = [str(span.uuid) for span in spans]
+            spans = list(SpanModel.objects.filter(uuid__in=uuids))
         uuid_to_span = {span.uuid: span for span in spans}
-        return {(span.id, str(span.example_uuid)): uuid_to_span[span.uuid] for span in self.labels}
+        for uuid, original in self.merged_labels.items():
+            uuid_to_span[uuid] = uuid_to_span.get(original.uuid, original)
+        return {
+            (span.id, str(span.example_uuid)): uuid_to_span[span.uuid]
+            for span in self.labels
+            if span.uuid in uuid_to_span
+        }
+
+    def key(self, label: LabelModel) -> Tuple:
+        return label.example_id, label.start_offset, label.end_offset, label.label_id
 
 
 class Texts(Labels):
     label_model = TextLabelModel
 
+    def key(self, label: LabelModel) -> Tuple:
+        return label.example_id, label.text
+
 
 class Relations(Labels):
     label_model = RelationModel
 
-    def save(self, user, examples: Examples, **kwargs):
+    def save(self, user, examples: Examples, loader: Optional[Loader] = None, **kwargs):
         id_to_span = kwargs["spans"].id_to_span
-        super().save(user, examples, id_to_span=id_to_span)
+        super().save(user, examples, loader, id_to_span=id_to_span)
+
+    def key(self, label: LabelModel) -> Tuple:
+        return label.example_id, label.from_id_id, label.to_id_id, label.type_id
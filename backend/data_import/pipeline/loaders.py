@@ -0,0 +1,216 @@
+import abc
+import dataclasses
+import io
+import json
+from typing import Any, List, Optional, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import AutoField, Field, ForeignKey, JSONField, Model
+
+ORM_LOADER = "orm"
+COPY_LOADER = "copy"
+
+
+class Loader(abc.ABC):
+    """Loader inserts the model instances created from a batch into the database."""
+
+    @abc.abstractmethod
+    def load(self, model: Type[Model], objs: List[Model]) -> List[Model]:
+        """Inserts the objects.
+
+        Args:
+            model: The model class of the objects.
+            objs: The objects to insert.
+
+        Returns:
+            The inserted objects with their primary keys.
+        """
+        raise NotImplementedError()
+
+
+class ORMLoader(Loader):
+    """ORMLoader inserts the objects by the ORM's bulk_create."""
+
+    def load(self, model: Type[Model], objs: List[Model]) -> List[Model]:
+        return model.objects.bulk_create(objs)
+
+
+def to_copy_text(value: Any) -> str:
+    """Converts a value to a column of the text format of PostgreSQL's COPY.
+
+    See https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.2
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def uuid_key_of(field: Field) -> Optional[Field]:
+    """Returns the unique `uuid` field of the model which the foreign key refers to, or None if it has none."""
+    if not isinstance(field, ForeignKey):
+        return None
+    try:
+        key = field.related_model._meta.get_field("uuid")
+    except FieldDoesNotExist:
+        return None
+    return key if key.unique else None
+
+
+@dataclasses.dataclass
+class CopyStatements:
+    """CopyStatements are the statements which PostgresCopyLoader runs to insert a batch, and the rows to copy.
+
+    Attributes:
+        setup: The statements which create the staging table.
+        copy: The COPY FROM STDIN statement into the staging table.
+        payload: The rows in the text format of COPY.
+        insert: The INSERT ... SELECT statement which moves the rows into the model table.
+        drop: The statement which drops the staging table.
+    """
+
+    setup: List[str]
+    copy: str
+    payload: io.StringIO
+    insert: str
+    drop: str
+
+
+class PostgresCopyLoader(Loader):
+    """PostgresCopyLoader inserts the objects by PostgreSQL's COPY FROM STDIN.
+
+    The rows are copied into a temporary staging table, and then moved to the model table
+    by a single INSERT ... SELECT, which returns the primary keys with the uuids.
+    The foreign keys to the models with the unique `uuid` field, e.g. the examples of labels,
+    are copied as the uuids of the related objects and resolved by joining the staging table
+    with the related tables in that statement. The other values are prepared in the same way as
+    bulk_create, so the inserted rows are the same. The model must have the unique `uuid` field.
+
+    Attributes:
+        using: The database alias.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def load(self, model: Type[Model], objs: List[Model]) -> List[Model]:
+        if not objs:
+            return objs
+        connection = connections[self.using]
+        statements = self.build_statements(model, objs, connection)
+        with transaction.atomic(using=self.using, savepoint=False), connection.cursor() as cursor:
+            for sql in statements.setup:
+                cursor.execute(sql)
+            self.copy(cursor, statements.copy, statements.payload)
+            cursor.execute(statements.insert)
+            uuid_to_pk = {str(obj_uuid): pk for pk, obj_uuid in cursor.fetchall()}
+            cursor.execute(statements.drop)
+
+        for obj in objs:
+            obj.pk = uuid_to_pk[str(obj.uuid)]  # type: ignore
+            obj._state.adding = False
+            obj._state.db = self.using
+        return objs
+
+    def build_statements(self, model: Type[Model], objs: List[Model], connection) -> CopyStatements:
+        """Builds the statements and the rows to insert the objects. It doesn't access the database."""
+        quote = connection.ops.quote_name
+        fields = [field for field in model._meta.concrete_fields if not isinstance(field, AutoField)]
+        uuid_keys = {field.column: key for field in fields if (key := uuid_key_of(field)) is not None}
+        uuid_columns = {column: f"import_{column}_uuid" for column in uuid_keys}
+        columns = ", ".join(quote(field.column) for field in fields)
+        table = quote(model._meta.db_table)
+        staging = quote(f"import_staging_{model._meta.db_table}")
+
+        setup = [f"CREATE TEMPORARY TABLE {staging} AS SELECT {columns} FROM {table} WITH NO DATA"]
+        added = ["ADD COLUMN import_seq integer"]
+        added.extend(f"ADD COLUMN {quote(column)} uuid" for column in uuid_columns.values())
+        setup.append(f"ALTER TABLE {staging} {', '.join(added)}")
+        copy_columns = ", ".join(["import_seq", columns, *(quote(column) for column in uuid_columns.values())])
+
+        payload = io.StringIO()
+        for seq, obj in enumerate(objs):
+            values = []
+            related_uuids = []
+            for field in fields:
+                related = field.get_cached_value(obj, None) if field.is_relation else None
+                if field.column in uuid_keys:
+                    # The id of a related object is found by its uuid in the INSERT statement.
+                    related_uuids.append(None if related is None else related.uuid)
+                    values.append(None if related is not None else self.prepare_value(field, obj, connection))
+                elif related is not None and getattr(obj, field.attname) is None:
+                    # The related object was saved after it was assigned, like `_prepare_related_fields_for_save`.
+                    values.append(related.pk)
+                else:
+                    values.append(self.prepare_value(field, obj, connection))
+            payload.write("\t".join(to_copy_text(value) for value in [seq, *values, *related_uuids]) + "\n")
+        payload.seek(0)
+
+        selected = []
+        joins = []
+        for field in fields:
+            if field.column not in uuid_keys:
+                selected.append(f"s.{quote(field.column)}")
+                continue
+            alias = quote(f"j_{field.column}")
+            related_meta = field.related_model._meta
+            target = quote(field.target_field.column)
+            key = quote(uuid_keys[field.column].column)
+            joins.append(
+                f"LEFT JOIN {quote(related_meta.db_table)} {alias} "
+                f"ON {alias}.{key} = s.{quote(uuid_columns[field.column])}"
+            )
+            selected.append(f"COALESCE({alias}.{target}, s.{quote(field.column)})")
+        insert = " ".join(
+            [
+                f"INSERT INTO {table} ({columns}) SELECT {', '.join(selected)} FROM {staging} s",
+                *joins,
+                f"ORDER BY s.import_seq RETURNING {quote(model._meta.pk.column)}, {quote('uuid')}",
+            ]
+        )
+        return CopyStatements(
+            setup=setup,
+            copy=f"COPY {staging} ({copy_columns}) FROM STDIN",
+            payload=payload,
+            insert=insert,
+            drop=f"DROP TABLE {staging}",
+        )
+
+    @staticmethod
+    def prepare_value(field, obj: Model, connection) -> Any:
+        value = field.pre_save(obj, add=True)
+        if isinstance(field, JSONField):
+            value = field.get_prep_value(value)
+            return None if value is None else json.dumps(value, cls=field.encoder)
+        return field.get_db_prep_save(value, connection)
+
+    @staticmethod
+    def copy(cursor, sql: str, buffer: io.StringIO):
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy_expert"):
+            # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                while data := buffer.read(io.DEFAULT_BUFFER_SIZE * 8):
+                    copy.write(data)
+
+
+def create_loader(name: str = ORM_LOADER, using: str = DEFAULT_DB_ALIAS) -> Loader:
+    """Creates the loader by name.
+
+    The COPY loader falls back to the ORM loader if the database isn't PostgreSQL.
+
+    Args:
+        name: The loader name, `orm` or `copy`.
+        using: The database alias.
+
+    Returns:
+        The loader.
+    """
+    if name == COPY_LOADER and connections[using].vendor == "postgresql":
+        return PostgresCopyLoader(using)
+    return ORMLoader()
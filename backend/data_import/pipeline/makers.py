@@ -1,7 +1,5 @@
 from typing import List, Optional, Type
 
-import pandas as pd
-
 from .data import BaseData
 from .exceptions import FileParseException
 from .label import Label
@@ -11,6 +9,7 @@ from .readers import (
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
 )
+from .records import RecordBatch, explode, is_null
 from examples.models import Example
 from projects.models import Project
 
@@ -29,53 +28,60 @@ class ExampleMaker:
         self.exclude_columns = exclude_columns or []
         self._errors: List[FileParseException] = []
 
-    def make(self, df: pd.DataFrame) -> List[Example]:
-        if not self.check_column_existence(df):
+    def make(self, batch: RecordBatch) -> List[Example]:
+        if not self.check_column_existence(batch):
             return []
-        self.check_value_existence(df)
-        # make dataframe without exclude columns and missing data
-        df_with_data_column = df.loc[:, ~df.columns.isin(self.exclude_columns)]
-        df_with_data_column = df_with_data_column.dropna(subset=[self.column_data])
+        self.check_value_existence(batch)
+
+        rows = []
+        line_nums = []
+        for row in batch.records(exclude_columns=self.exclude_columns):
+            # skip records without data
+            if is_null(row.get(self.column_data)):
+                continue
+            line_nums.append(row.pop(LINE_NUMBER_COLUMN, 0))
+            row[DEFAULT_TEXT_COLUMN] = row.pop(self.column_data)  # Rename column for parsing
+            rows.append(row)
 
         examples = []
-        for row in df_with_data_column.to_dict(orient="records"):
-            line_num = row.pop(LINE_NUMBER_COLUMN, 0)
-            row[DEFAULT_TEXT_COLUMN] = row.pop(self.column_data)  # Rename column for parsing
-            try:
-                data = self.data_class.parse(**row)
-                example = data.create(self.project)
-                examples.append(example)
-            except ValueError:
+        for row, line_num, data in zip(rows, line_nums, self.data_class.parse_batch(rows)):
+            if data is None:
                 message = f"Invalid data in line {line_num}"
                 error = FileParseException(row[UPLOAD_NAME_COLUMN], line_num, message)
                 self._errors.append(error)
+            else:
+                examples.append(data.create(self.project))
         return examples
 
-    def check_column_existence(self, df: pd.DataFrame) -> bool:
+    def check_column_existence(self, batch: RecordBatch) -> bool:
         message = f"Column {self.column_data} not found in the file"
-        if self.column_data not in df.columns:
-            for filename in df[UPLOAD_NAME_COLUMN].unique():
+        if self.column_data not in batch:
+            for filename in dict.fromkeys(batch[UPLOAD_NAME_COLUMN]):
                 self._errors.append(FileParseException(filename, 0, message))
             return False
         return True
 
-    def check_value_existence(self, df: pd.DataFrame):
-        df_without_data_column = df[df[self.column_data].isnull()]
-        for row in df_without_data_column.to_dict(orient="records"):
-            message = f"Column {self.column_data} not found in record"
-            error = FileParseException(row[UPLOAD_NAME_COLUMN], row.get(LINE_NUMBER_COLUMN, 0), message)
-            self._errors.append(error)
+    def check_value_existence(self, batch: RecordBatch):
+        line_nums = batch.get(LINE_NUMBER_COLUMN, 0)
+        for value, filename, line_num in zip(batch[self.column_data], batch[UPLOAD_NAME_COLUMN], line_nums):
+            if is_null(value):
+                message = f"Column {self.column_data} not found in record"
+                error = FileParseException(filename, 0 if is_null(line_num) else line_num, message)
+                self._errors.append(error)
 
     @property
     def errors(self) -> List[FileParseException]:
         self._errors.sort(key=lambda error: error.line_num)
         return self._errors
 
+    def clear_errors(self):
+        self._errors.clear()
+
 
 class BinaryExampleMaker(ExampleMaker):
-    def make(self, df: pd.DataFrame) -> List[Example]:
+    def make(self, batch: RecordBatch) -> List[Example]:
         examples = []
-        for row in df.to_dict(orient="records"):
+        for row in batch.records():
             data = self.data_class.parse(**row)
             example = data.create(self.project)
             examples.append(example)
@@ -88,26 +94,24 @@ class LabelMaker:
         self.label_class = label_class
         self._errors: List[FileParseException] = []
 
-    def make(self, df: pd.DataFrame) -> List[Label]:
-        if not self.check_column_existence(df):
+    def make(self, batch: RecordBatch) -> List[Label]:
+        if not self.check_column_existence(batch):
             return []
 
-        df_label = df.explode(self.column)
-        df_label = df_label[[UUID_COLUMN, self.column]]
-        df_label.dropna(subset=[self.column], inplace=True)
-        labels = []
-        for row in df_label.to_dict(orient="records"):
-            try:
-                label = self.label_class.parse(row[UUID_COLUMN], row[self.column])
-                labels.append(label)
-            except ValueError:
-                pass
-        return labels
-
-    def check_column_existence(self, df: pd.DataFrame) -> bool:
+        example_uuids = []
+        objs = []
+        for example_uuid, value in zip(batch[UUID_COLUMN], batch[self.column]):
+            for obj in explode(value):
+                if is_null(obj):
+                    continue
+                example_uuids.append(example_uuid)
+                objs.append(obj)
+        return self.label_class.parse_batch(example_uuids, objs)
+
+    def check_column_existence(self, batch: RecordBatch) -> bool:
         message = f"Column {self.column} not found in the file"
-        if self.column not in df.columns:
-            for filename in df[UPLOAD_NAME_COLUMN].unique():
+        if self.column not in batch:
+            for filename in dict.fromkeys(batch[UPLOAD_NAME_COLUMN]):
                 self._errors.append(FileParseException(filename, 0, message))
             return False
         return True
@@ -116,3 +120,6 @@ class LabelMaker:
     def errors(self) -> List[FileParseException]:
         self._errors.sort(key=lambda error: error.line_num)
         return self._errors
+
+    def clear_errors(self):
+        self._errors.clear()
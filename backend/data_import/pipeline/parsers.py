@@ -1,63 +1,157 @@
+import codecs
 import csv
+import functools
 import io
+import itertools
 import json
+import mmap
 import os
-from typing import Any, Dict, Iterator, List, Tuple
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
 
-import chardet
+import openpyxl
 import pyexcel
 import pyexcel.exceptions
 from chardet import UniversalDetector
-from seqeval.scheme import BILOU, IOB2, IOBES, IOE2, Tokens
+from openpyxl.utils.exceptions import InvalidFileException
+from seqeval.scheme import BILOU, IOB2, IOBES, IOE2, Token, Tokens
 
+from .compression import content_extension, is_compressed, open_binary, stat_file
 from .exceptions import FileParseException
 from .readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
     LINE_NUMBER_COLUMN,
+    FileName,
     Parser,
 )
+from .records import MISSING, RecordBatch, estimate_size
 
 DEFAULT_ENCODING = "Auto"
+# The maximum number of bytes which chardet reads to detect the encoding.
+ENCODING_SAMPLE_SIZE = 1024 * 1024
+# The maximum number of characters of a file which is imported as a single text.
+MAX_TEXT_LENGTH = 100 * 1024 * 1024
+
+# The encodings which can be split into lines at the byte `\n`.
+BINARY_LINE_ENCODINGS = {"utf-8", "utf-8-sig"}
+UTF8_BOM = codecs.BOM_UTF8
+LONE_CR = re.compile(rb"\r(?!\n)")
+NEWLINE = re.compile(rb"\r\n?|\n")
+
 
+def load_fast_json_decoder() -> Optional[Callable[[bytes], Any]]:
+    """Returns the function to decode JSON bytes faster than the standard library.
 
-def detect_encoding(filename: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> str:
+    orjson is used if it's installed. Otherwise, returns None.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+FAST_JSON_DECODER = load_fast_json_decoder()
+# The maximum number of rows of a columnar file to convert to records at once.
+COLUMNAR_BATCH_SIZE = 1024
+
+# The separator between the path of a workbook and the index of a sheet, e.g. `data.xlsx#1`.
+SHEET_SEPARATOR = "#"
+# The errors raised by openpyxl for a broken workbook.
+WORKBOOK_ERRORS = (InvalidFileException, zipfile.BadZipFile, KeyError, ValueError, OSError)
+# The maximum size of a decompressed workbook which is kept in memory instead of a temporary file.
+WORKBOOK_MEMORY_SIZE = 16 * 1024 * 1024
+# orjson returns a float for an integer which doesn't fit in 64 bits.
+# Such an integer has 19 or more digits, which is found by replacing the digits with zeros.
+DIGITS_TO_ZERO = bytes.maketrans(b"0123456789", b"0000000000")
+DIGIT_RUN = b"0" * 19
+
+
+def is_utf8(filename: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE, sample_size: int = ENCODING_SAMPLE_SIZE) -> bool:
+    """Returns True if the first `sample_size` bytes of the file are valid UTF-8 without NUL bytes.
+
+    A file with NUL bytes is likely to be UTF-16 or UTF-32 even if it's valid UTF-8.
+    A character cut off at the end of the sample is valid if its bytes so far are.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open_binary(filename) as f:
+        remaining = sample_size
+        try:
+            while remaining > 0 and (binary := f.read(min(buffer_size, remaining))):
+                if b"\x00" in binary:
+                    return False
+                decoder.decode(binary)
+                remaining -= len(binary)
+            # The incomplete character at the end is an error only if the file ends there.
+            if remaining > 0 or not f.read(1):
+                decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def detect_encoding(
+    filename: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE, sample_size: int = ENCODING_SAMPLE_SIZE
+) -> str:
     """Detects character encoding automatically.
 
     If you want to know the supported encodings, please see the following document:
     https://chardet.readthedocs.io/en/latest/supported-encodings.html
 
+    The result is cached until the size or the modification time of the file changes,
+    so the parsers and the tasks reading the same file detect the encoding only once.
+
     Args:
         filename: the filename for detecting the encoding.
         buffer_size: the buffer size to read file contents incrementally.
+        sample_size: the maximum number of bytes which chardet reads.
 
     Returns:
         The character encoding.
     """
-    # For a small file.
-    if os.path.getsize(filename) < buffer_size:
-        detected = chardet.detect(open(filename, "rb").read())
-        return detected.get("encoding", "utf-8")
+    stat = stat_file(filename)
+    return _detect_encoding(os.path.abspath(filename), stat.st_size, stat.st_mtime_ns, buffer_size, sample_size)
+
 
-    # For a large file, call the Universal Encoding Detector incrementally.
-    # It will stop as soon as it is confident enough to report its results.
+@functools.lru_cache(maxsize=1024)
+def _detect_encoding(filename: str, size: int, mtime_ns: int, buffer_size: int, sample_size: int) -> str:
+    # Validating UTF-8 is much faster than chardet and covers most of the files.
+    if is_utf8(filename, buffer_size, sample_size):
+        with open_binary(filename) as f:
+            return "UTF-8-SIG" if f.read(len(UTF8_BOM)) == UTF8_BOM else "utf-8"
+
+    # Call the Universal Encoding Detector incrementally.
+    # It will stop as soon as it is confident enough or it reads `sample_size` bytes.
     # See: https://chardet.readthedocs.io/en/latest/usage.html
-    with open(filename, "rb") as f:
+    with open_binary(filename) as f:
         detector = UniversalDetector()
-        while True:
-            binary = f.read(buffer_size)
-            detector.feed(binary)
-            if binary == b"":
-                break
-            if detector.done:
+        remaining = sample_size
+        while remaining > 0 and not detector.done:
+            binary = f.read(min(buffer_size, remaining))
+            if not binary:
                 break
-        if detector.done:
-            return detector.result["encoding"] or "utf-8"
-        else:
-            return "utf-8"
+            detector.feed(binary)
+            remaining -= len(binary)
+        detector.close()
+        return detector.result["encoding"] or "utf-8"
 
 
-def decide_encoding(filename: str, encoding: str) -> str:
+def decide_encoding(filename: str, encoding: str, sample_size: int = ENCODING_SAMPLE_SIZE) -> str:
     """Decide character encoding automatically.
 
     If the encoding is DEFAULT_ENCODING, detects it automatically.
@@ -66,34 +160,285 @@ def decide_encoding(filename: str, encoding: str) -> str:
     Args:
          filename: The filename for decide the encoding.
          encoding: The specified encoding.
+         sample_size: The maximum number of bytes to detect the encoding.
 
     Returns:
         The character encoding.
     """
     if encoding == DEFAULT_ENCODING:
-        return detect_encoding(filename)
+        return detect_encoding(filename, sample_size=sample_size)
     else:
         return encoding
 
 
+class ByteRange(io.RawIOBase):
+    """ByteRange is a raw stream to read a part of a file.
+
+    Attributes:
+        filename: The filename to read.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+    """
+
+    def __init__(self, filename: str, start: int, end: int):
+        super().__init__()
+        self.file = open(filename, "rb", buffering=0)
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.remaining <= 0:
+            return 0
+        size = self.file.readinto(memoryview(buffer)[: self.remaining])
+        self.remaining -= size
+        return size
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def open_text(filename: str, encoding: str, start: int = 0, end: Optional[int] = None) -> IO[str]:
+    """Opens a file in text mode.
+
+    A compressed file is decompressed on the fly. If `start` or `end` is specified, only the bytes
+    in the range are read. The range must start and end at line boundaries of an uncompressed file.
+
+    Args:
+        filename: The filename to open.
+        encoding: The character encoding.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+
+    Returns:
+        The text stream.
+    """
+    if start == 0 and end is None:
+        return io.TextIOWrapper(open_binary(filename), encoding=encoding)
+    end = os.path.getsize(filename) if end is None else end
+    return io.TextIOWrapper(io.BufferedReader(ByteRange(filename, start, end)), encoding=encoding)
+
+
 class LineReader:
     """LineReader is a helper class to read a file line by line.
 
+    The lines are read by the text I/O. A UTF-8 file can also be read as bytes by `binary_lines`,
+    which memory-maps the file and splits it at line breaks without decoding it.
+
     Attributes:
         filename: The filename to read.
         encoding: The character encoding.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, filename: str, encoding: str = DEFAULT_ENCODING):
+    # The number of bytes to split into lines at once.
+    chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        filename: str,
+        encoding: str = DEFAULT_ENCODING,
+        start: int = 0,
+        end: Optional[int] = None,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+    ):
         self.filename = filename
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
+        self.start = start
+        self.end = end
+        self._decided_encoding: Optional[str] = None
 
     def __iter__(self) -> Iterator[str]:
-        encoding = decide_encoding(self.filename, self.encoding)
-        with open(self.filename, encoding=encoding) as f:
+        with open_text(self.filename, self.decided_encoding, self.start, self.end) as f:
             for line in f:
                 yield line.rstrip()
 
+    @property
+    def decided_encoding(self) -> str:
+        if self._decided_encoding is None:
+            self._decided_encoding = decide_encoding(self.filename, self.encoding, self.encoding_sample_size)
+        return self._decided_encoding
+
+    def is_binary_readable(self) -> bool:
+        """Returns True if the file can be read by `binary_lines`."""
+        return codecs.lookup(self.decided_encoding).name in BINARY_LINE_ENCODINGS
+
+    def binary_lines(self) -> Iterator[bytes]:
+        """Yields the lines as UTF-8 bytes.
+
+        The lines are split at the same positions as the text mode with universal newlines,
+        but the trailing whitespaces aren't stripped. For example, `\\r` of `\\r\\n` may remain.
+        The byte order mark at the start is removed if the encoding is UTF-8-SIG.
+        The caller must check `is_binary_readable` first.
+        """
+        if is_compressed(self.filename):
+            yield from self.stream_binary_lines()
+            return
+        end = os.path.getsize(self.filename) if self.end is None else self.end
+        if self.start >= end:
+            return
+        with open(self.filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = self.start
+            if codecs.lookup(self.decided_encoding).name == "utf-8-sig" and mm[pos : pos + 3] == UTF8_BOM:
+                pos += 3
+            # A lone carriage return is also a line break in the text mode.
+            universal = mm.find(b"\r", pos, end) != -1 and LONE_CR.search(mm, pos, end) is not None
+            while pos < end:
+                # Split a block of lines at once. The block ends at the last line break in the chunk.
+                cut = mm.rfind(b"\n", pos, min(pos + self.chunk_size, end))
+                if cut == -1:
+                    cut = mm.find(b"\n", pos, end)
+                if cut == -1:
+                    lines = NEWLINE.split(mm[pos:end]) if universal else [mm[pos:end]]
+                    yield from lines[:-1] if len(lines) > 1 and not lines[-1] else lines
+                    return
+                if universal:
+                    yield from NEWLINE.split(mm[pos : cut + 1])[:-1]
+                else:
+                    yield from mm[pos:cut].split(b"\n")
+                pos = cut + 1
+
+    def stream_binary_lines(self) -> Iterator[bytes]:
+        """Yields the lines as `binary_lines` does, reading a compressed file chunk by chunk."""
+        with open_binary(self.filename) as f:
+            rest = f.read(len(UTF8_BOM))
+            if codecs.lookup(self.decided_encoding).name == "utf-8-sig" and rest == UTF8_BOM:
+                rest = b""
+            while chunk := f.read(self.chunk_size):
+                # The last line may continue in the next chunk. So may a carriage return at the end.
+                block = rest + chunk
+                cut = block.rfind(b"\n")
+                if cut == -1:
+                    rest = block
+                    continue
+                lines, rest = block[: cut + 1], block[cut + 1 :]
+                if b"\r" in lines and LONE_CR.search(lines):
+                    yield from NEWLINE.split(lines)[:-1]
+                else:
+                    yield from lines[:-1].split(b"\n")
+            if rest:
+                last_lines = NEWLINE.split(rest) if LONE_CR.search(rest) else [rest]
+                yield from last_lines[:-1] if len(last_lines) > 1 and not last_lines[-1] else last_lines
+
+
+class JSONArrayReader:
+    """JSONArrayReader is a helper class to decode a JSON array element by element.
+
+    Only the element being decoded is kept in memory, so the memory usage doesn't depend on the file size.
+
+    Attributes:
+        f: The text stream to read.
+        buffer_size: The minimum number of characters to read at once.
+    """
+
+    # The number of characters which must follow an element before it's decoded.
+    # This ensures that a number or a literal isn't truncated at the end of the buffer.
+    lookahead = 64
+
+    def __init__(self, f: IO[str], buffer_size: int = io.DEFAULT_BUFFER_SIZE):
+        self.f = f
+        self.buffer_size = buffer_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # The location of `buffer[0]` in the file.
+        self.offset = 0
+        self.line_num = 1
+        self.line_start = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        """Yields the line number where an element starts and the element.
+
+        Raises:
+            json.JSONDecodeError: If the file isn't a JSON array. The location is the one in the file.
+        """
+        if self.peek() == "\ufeff":
+            self.raise_error("Unexpected UTF-8 BOM (decode using utf-8-sig)", self.pos)
+        if self.peek() != "[":
+            self.raise_error("Expecting '['" if self.peek() else "Expecting value", self.pos)
+        self.pos += 1
+        if self.peek() == "]":
+            self.pos += 1
+        else:
+            while True:
+                self.compact()
+                line_num = self.locate(self.pos)[0]
+                yield line_num, self.decode()
+                char = self.peek()
+                self.pos += 1
+                if char == "]":
+                    break
+                elif char != ",":
+                    self.raise_error("Expecting ',' delimiter", self.pos - 1)
+                elif self.peek() == "]":
+                    self.raise_error("Expecting value", self.pos)
+        if self.peek() is not None:
+            self.raise_error("Extra data", self.pos)
+
+    def read(self) -> bool:
+        """Appends the next characters to the buffer. Returns False at the end of the file."""
+        if not self.eof:
+            chunk = self.f.read(max(self.buffer_size, len(self.buffer)))
+            self.buffer += chunk
+            self.eof = not chunk
+        return not self.eof
+
+    def peek(self) -> Optional[str]:
+        """Skips whitespaces and returns the next character. Returns None at the end of the file."""
+        while True:
+            self.pos = json.decoder.WHITESPACE.match(self.buffer, self.pos).end()  # type: ignore
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read():
+                return None
+
+    def decode(self) -> Any:
+        while True:
+            try:
+                element, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                truncated = e.msg.startswith("Unterminated string") or e.pos >= len(self.buffer) - self.lookahead
+                if truncated and self.read():
+                    continue
+                self.raise_error(e.msg, e.pos)
+            if end >= len(self.buffer) - self.lookahead and self.read():
+                continue
+            self.pos = end
+            return element
+
+    def compact(self):
+        """Removes the decoded characters from the buffer."""
+        newlines = self.buffer.count("\n", 0, self.pos)
+        if newlines:
+            self.line_num += newlines
+            self.line_start = self.offset + self.buffer.rfind("\n", 0, self.pos) + 1
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+
+    def locate(self, pos: int) -> Tuple[int, int, int]:
+        """Returns the line number, the column number and the character offset in the file."""
+        newlines = self.buffer.count("\n", 0, pos)
+        if newlines:
+            column = pos - self.buffer.rfind("\n", 0, pos)
+        else:
+            column = self.offset + pos - self.line_start + 1
+        return self.line_num + newlines, column, self.offset + pos
+
+    def raise_error(self, message: str, pos: int):
+        line_num, column, offset = self.locate(pos)
+        error = json.JSONDecodeError(message, "", 0)
+        error.msg, error.pos, error.lineno, error.colno = message, offset, line_num, column
+        error.args = (f"{message}: line {line_num} column {column} (char {offset})",)
+        raise error
+
 
 class PlainParser(Parser):
     """PlainParser is a parser simply returns a dictionary.
@@ -113,73 +458,184 @@ class LineParser(Parser):
 
     Attributes:
         encoding: The character encoding.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+        line_offset: The number of lines before `start`.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        start: int = 0,
+        end: Optional[int] = None,
+        line_offset: int = 0,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
+        self.start = start
+        self.end = end
+        self.line_offset = line_offset
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+        reader = LineReader(filename, self.encoding, self.start, self.end, self.encoding_sample_size)
+        for line_num, line in enumerate(reader, start=self.line_offset + 1):
             yield {DEFAULT_TEXT_COLUMN: line, LINE_NUMBER_COLUMN: line_num}
 
 
 class TextFileParser(Parser):
     """TextFileParser is a parser to read an entire file content.
 
+    The content is a single text, so it's read into memory at once. A file longer than `max_text_length`
+    is skipped with an error instead of reading up to `MAX_DECOMPRESSED_SIZE` of a compressed file.
+
     Attributes:
         encoding: The character encoding.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
+        max_text_length: The maximum number of characters of a file.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        max_text_length: int = MAX_TEXT_LENGTH,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
+        self.max_text_length = max_text_length
+        self._errors: List[FileParseException] = []
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        encoding = decide_encoding(filename, self.encoding)
-        with open(filename, encoding=encoding) as f:
-            yield {DEFAULT_TEXT_COLUMN: f.read()}
+        encoding = decide_encoding(filename, self.encoding, self.encoding_sample_size)
+        with open_text(filename, encoding) as f:
+            text = f.read(self.max_text_length + 1)
+        if len(text) > self.max_text_length:
+            message = f"The file is longer than {self.max_text_length} characters."
+            self._errors.append(FileParseException(filename, line_num=-1, message=message))
+            return
+        yield {DEFAULT_TEXT_COLUMN: text}
+
+    @property
+    def errors(self) -> List[FileParseException]:
+        return self._errors
+
+
+def rows_to_columns(fieldnames: List[str], rows: List[List[str]]) -> Dict[Any, List[Any]]:
+    """Transposes the rows of a CSV file into columns, which have the same values as the rows of `csv.DictReader`.
+
+    The missing values of a short row are None, and the extra values of a long row are a list in the column None.
+    """
+    width = len(fieldnames)
+    lengths = set(map(len, rows))
+    if lengths == {width}:
+        return dict(zip(fieldnames, map(list, zip(*rows))))
+    padded = [row[:width] + [None] * (width - len(row)) for row in rows]
+    columns: Dict[Any, List[Any]] = dict(zip(fieldnames, map(list, zip(*padded))))
+    if max(lengths) > width:
+        columns[None] = [row[width:] if len(row) > width else MISSING for row in rows]
+    return columns
+
+
+def estimate_columns_size(columns: Dict[Any, List[Any]], size: int) -> int:
+    """Estimates the size of the records stored column by column like `estimate_size`."""
+    nbytes = 0
+    for key, values in columns.items():
+        nbytes += estimate_size(key) * size
+        if key is not None and None not in values:
+            # The values are strings, which are summed up without calling a Python function for each.
+            nbytes += sum(map(len, values))
+        else:
+            nbytes += sum(map(estimate_size, values))
+    return nbytes
 
 
 class CSVParser(Parser):
     """CSVParser is a parser to read a csv file and return its rows.
 
+    The rows can also be read in batches by `parse_batches`, which transposes the rows tokenized by
+    the `csv` module into columns, so no dict is created per row.
+
     Attributes:
         encoding: The character encoding.
         delimiter: A one-character string used to separate fields. It defaults to ','.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, delimiter: str = ",", **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        delimiter: str = ",",
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
         self.delimiter = delimiter
 
+    vectorized = True
+
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        encoding = decide_encoding(filename, self.encoding)
-        with open(filename, encoding=encoding) as f:
+        encoding = decide_encoding(filename, self.encoding, self.encoding_sample_size)
+        with open_text(filename, encoding) as f:
             reader = csv.DictReader(f, delimiter=self.delimiter)
             for line_num, row in enumerate(reader, start=1):
                 yield {LINE_NUMBER_COLUMN: line_num, **row}
 
+    def parse_batches(self, filename: str, batch_size: int) -> Iterator[RecordBatch]:
+        encoding = decide_encoding(filename, self.encoding, self.encoding_sample_size)
+        with open_text(filename, encoding) as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                return
+            line_num = 1
+            while rows := list(itertools.islice(reader, batch_size)):
+                # Blank lines are skipped like csv.DictReader.
+                if [] in rows:
+                    rows = [row for row in rows if row]
+                    if not rows:
+                        continue
+                size = len(rows)
+                columns = rows_to_columns(fieldnames, rows)
+                nbytes = estimate_columns_size(columns, size)
+                line_nums = list(range(line_num, line_num + size))
+                nbytes += estimate_size({LINE_NUMBER_COLUMN: line_num}) * size
+                yield RecordBatch({LINE_NUMBER_COLUMN: line_nums, **columns}, size, nbytes)
+                line_num += size
+
 
 class JSONParser(Parser):
     """JSONParser is a parser to read a json file and return its rows.
 
+    The file must contain an array of objects. The array is decoded incrementally,
+    so the rows before a malformed element are returned.
+
     Attributes:
         encoding: The character encoding.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
+    def __init__(self, encoding: str = DEFAULT_ENCODING, encoding_sample_size: int = ENCODING_SAMPLE_SIZE, **kwargs):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
         self._errors: List[FileParseException] = []
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        encoding = decide_encoding(filename, self.encoding)
-        with open(filename, encoding=encoding) as f:
+        encoding = decide_encoding(filename, self.encoding, self.encoding_sample_size)
+        with open_text(filename, encoding) as f:
             try:
-                rows = json.load(f)
-                for row in rows:
-                    yield row
+                for line_num, row in JSONArrayReader(f):
+                    if isinstance(row, dict):
+                        yield {LINE_NUMBER_COLUMN: line_num, **row}
+                    else:
+                        message = "An element of the array must be an object."
+                        self._errors.append(FileParseException(filename, line_num, message))
             except json.decoder.JSONDecodeError as e:
-                error = FileParseException(filename, line_num=1, message=str(e))
+                error = FileParseException(filename, line_num=e.lineno, message=str(e))
                 self._errors.append(error)
 
     @property
@@ -190,39 +646,193 @@ class JSONParser(Parser):
 class JSONLParser(Parser):
     """JSONLParser is a parser to read a JSONL file and return its rows.
 
+    If a fast JSON decoder is installed, a UTF-8 file is read as bytes and the lines are decoded by it.
+    A line is decoded by the standard library if the fast decoder fails or it may lose the precision
+    of large integers, so the rows and the error messages are the same as the standard library.
+
     Attributes:
         encoding: The character encoding.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+        line_offset: The number of lines before `start`.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        start: int = 0,
+        end: Optional[int] = None,
+        line_offset: int = 0,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
+        self.start = start
+        self.end = end
+        self.line_offset = line_offset
         self._errors: List[FileParseException] = []
+        self.fast_decoder = FAST_JSON_DECODER
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+        reader = LineReader(filename, self.encoding, self.start, self.end, self.encoding_sample_size)
+        if self.fast_decoder and reader.is_binary_readable():
+            lines: Iterator[Any] = reader.binary_lines()
+        else:
+            lines = iter(reader)
+        for line_num, line in enumerate(lines, start=self.line_offset + 1):
             try:
-                row = json.loads(line)
+                row = self.decode(line)
                 yield {LINE_NUMBER_COLUMN: line_num, **row}
             except json.decoder.JSONDecodeError as e:
                 error = FileParseException(filename, line_num, str(e))
                 self._errors.append(error)
 
+    def decode(self, line: Any) -> Any:
+        if isinstance(line, str):
+            return json.loads(line)
+        if DIGIT_RUN not in line.translate(DIGITS_TO_ZERO):
+            try:
+                return self.fast_decoder(line)  # type: ignore
+            except ValueError:
+                pass
+        return json.loads(line.decode("utf-8").rstrip())
+
     @property
     def errors(self) -> List[FileParseException]:
         return self._errors
 
 
+def split_sheet_path(path: str) -> Tuple[str, Optional[int]]:
+    """Splits the path of a sheet into the path of the workbook and the index of the sheet.
+
+    Returns:
+        The path of the workbook and the index of the sheet. The index is None if the path isn't a sheet.
+    """
+    workbook, separator, index = path.rpartition(SHEET_SEPARATOR)
+    if not separator or not index.isdigit() or os.path.exists(path):
+        return path, None
+    return workbook, int(index)
+
+
+def open_workbook(path: str) -> Optional[openpyxl.Workbook]:
+    """Opens an xlsx workbook in the read-only mode, which reads the rows on demand.
+
+    A compressed workbook is decompressed chunk by chunk into a temporary file, because it must be seekable.
+    The file is kept in memory while it's small, and deleted when the workbook is released.
+
+    Returns:
+        The workbook, which must be closed. None if the file isn't an xlsx file, e.g. an xls file.
+    """
+    source: Any = path
+    if is_compressed(path):
+        source = tempfile.SpooledTemporaryFile(max_size=WORKBOOK_MEMORY_SIZE)
+        with open_binary(path) as f:
+            shutil.copyfileobj(f, source)
+        source.seek(0)
+    if not zipfile.is_zipfile(source):
+        return None
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+
+def read_sheet(sheet: Any) -> Iterator[Dict[Any, Any]]:
+    """Reads the rows of a sheet as the records whose keys are the values of the first row.
+
+    The empty cells are read as empty strings like pyexcel, and the blank rows are skipped.
+    The line number of a record is its row number in the sheet.
+    """
+    # The dimension stored in the file may be wrong, so the rows are read until the end of the sheet.
+    sheet.reset_dimensions()
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    fieldnames = ["" if value is None else str(value) for value in header]
+    for line_num, row in enumerate(rows, start=2):
+        if all(value is None for value in row):
+            continue
+        values = ["" if value is None else value for value in row]
+        values.extend([""] * (len(fieldnames) - len(values)))
+        yield {LINE_NUMBER_COLUMN: line_num, **dict(zip(fieldnames, values))}
+
+
 class ExcelParser(Parser):
-    """ExcelParser is a parser to read a excel file."""
+    """ExcelParser is a parser to read a excel file.
 
-    def __init__(self, **kwargs):
-        self._errors = []
+    An xlsx workbook is read row by row in the read-only mode of openpyxl, so the memory usage doesn't grow
+    with the number of rows. The other workbooks, e.g. xls, are read by pyexcel. The first row of a sheet
+    is the header, and the line number of a record is its row number in the sheet.
+    A compressed xlsx file is decompressed into a temporary file, because the workbook can't be read sequentially.
+
+    Attributes:
+        all_sheets: Whether to read every sheet of an xlsx workbook as a separate file. Otherwise, only the first
+            sheet is read.
+    """
+
+    def __init__(self, all_sheets: bool = False, **kwargs):
+        self.all_sheets = all_sheets
+        self._errors: List[FileParseException] = []
+
+    def list_sources(self, filename: FileName) -> List[FileName]:
+        """Returns a source per sheet if `all_sheets` is True.
+
+        The upload name of a sheet is the upload name of the workbook followed by the sheet name, e.g.
+        `data.xlsx#Sheet1`. The size of the workbook is divided by the number of rows of each sheet.
+        """
+        if not self.all_sheets:
+            return [filename]
+        try:
+            workbook = open_workbook(filename.full_path)
+        except WORKBOOK_ERRORS:
+            # The error is reported when the file is parsed.
+            return [filename]
+        if workbook is None:
+            return [filename]
+        try:
+            sheets = [(sheet.title, sheet.max_row or 0) for sheet in workbook.worksheets]
+        finally:
+            workbook.close()
+        size = filename.get_size()
+        total_rows = sum(rows for _, rows in sheets)
+        sizes = [size * rows // total_rows if total_rows else size // len(sheets) for _, rows in sheets]
+        if sizes:
+            sizes[-1] += size - sum(sizes)
+        return [
+            FileName(
+                full_path=f"{filename.full_path}{SHEET_SEPARATOR}{i}",
+                generated_name=filename.generated_name,
+                upload_name=f"{filename.upload_name}{SHEET_SEPARATOR}{title}",
+                size=sheet_size,
+            )
+            for i, ((title, _), sheet_size) in enumerate(zip(sheets, sizes))
+        ]
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        rows = pyexcel.iget_records(file_name=filename)
+        path, sheet_index = split_sheet_path(filename) if self.all_sheets else (filename, None)
+        try:
+            workbook = open_workbook(path)
+            if workbook is None:
+                yield from self.parse_by_pyexcel(path)
+                return
+            try:
+                yield from read_sheet(workbook.worksheets[sheet_index or 0])
+            finally:
+                workbook.close()
+        except WORKBOOK_ERRORS as e:
+            error = FileParseException(filename, line_num=1, message=f"The workbook can't be read: {e}")
+            self._errors.append(error)
+
+    def parse_by_pyexcel(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        if is_compressed(filename):
+            with open_binary(filename) as f:
+                content = f.read()
+            rows = pyexcel.iget_records(file_content=content, file_type=content_extension(filename) or "xlsx")
+        else:
+            rows = pyexcel.iget_records(file_name=filename)
         try:
-            for line_num, row in enumerate(rows, start=1):
+            # The header is the first row.
+            for line_num, row in enumerate(rows, start=2):
                 yield {LINE_NUMBER_COLUMN: line_num, **row}
         except pyexcel.exceptions.FileTypeNotSupported as e:
             error = FileParseException(filename, line_num=1, message=str(e))
@@ -233,6 +843,94 @@ class ExcelParser(Parser):
         return self._errors
 
 
+class ColumnarParser(Parser):
+    """ColumnarParser is the base class of the parsers to read Apache Arrow record batches.
+
+    The batches are read one by one and converted to records, so the whole table isn't loaded into memory.
+    Each column becomes a field of the records, which are mapped to the text, the label and the meta
+    by the column names like the other formats. The dates, times and decimals are converted to strings,
+    because they can't be stored in JSON.
+    pyarrow must be installed to use this parser.
+
+    Attributes:
+        batch_size: The maximum number of rows to convert to records at once.
+    """
+
+    def __init__(self, batch_size: int = COLUMNAR_BATCH_SIZE, **kwargs):
+        self.batch_size = batch_size
+        self._errors: List[FileParseException] = []
+
+    def read_batches(self, filename: str) -> Iterator[Any]:
+        """Yields the record batches of the file lazily."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        try:
+            import pyarrow
+        except ImportError:
+            message = "pyarrow must be installed to read this format."
+            self._errors.append(FileParseException(filename, line_num=1, message=message))
+            return
+        line_num = 0
+        try:
+            for batch in self.read_batches(filename):
+                for offset in range(0, batch.num_rows, self.batch_size):
+                    rows = to_json_compatible(batch.slice(offset, self.batch_size)).to_pylist()
+                    for line_num, row in enumerate(rows, start=line_num + 1):
+                        yield {LINE_NUMBER_COLUMN: line_num, **row}
+        except (pyarrow.ArrowException, OSError) as e:
+            self._errors.append(FileParseException(filename, line_num=line_num + 1, message=str(e)))
+
+    @property
+    def errors(self) -> List[FileParseException]:
+        return self._errors
+
+
+def to_json_compatible(batch):
+    """Converts the columns of the types which aren't JSON compatible to strings."""
+    import pyarrow as pa
+    import pyarrow.types as types
+
+    columns = []
+    for column in batch.columns:
+        t = column.type
+        if types.is_temporal(t) or types.is_decimal(t) or types.is_binary(t) or types.is_large_binary(t):
+            column = column.cast(pa.string())
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+class ParquetParser(ColumnarParser):
+    """ParquetParser is a parser to read a Parquet file row group by row group."""
+
+    def read_batches(self, filename: str) -> Iterator[Any]:
+        import pyarrow.parquet as pq
+
+        with pq.ParquetFile(filename, memory_map=True) as f:
+            yield from f.iter_batches(batch_size=self.batch_size)
+
+
+class ArrowParser(ColumnarParser):
+    """ArrowParser is a parser to read an Arrow IPC file, which is in the file (Feather V2) or the stream format.
+
+    The file is memory-mapped, so the batches are read without copying them.
+    """
+
+    def read_batches(self, filename: str) -> Iterator[Any]:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        with pa.memory_map(filename) as source:
+            try:
+                reader = ipc.open_file(source)
+            except pa.ArrowInvalid:
+                source.seek(0)
+                yield from ipc.open_stream(source)
+                return
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
 class FastTextParser(Parser):
     """FastTextParser is a parser to read a fastText format and returns a text and labels.
 
@@ -244,15 +942,32 @@ class FastTextParser(Parser):
     Attributes:
         encoding: The character encoding.
         label: The label prefix. It defaults to `__label__`.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+        line_offset: The number of lines before `start`.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, label: str = "__label__", **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        label: str = "__label__",
+        start: int = 0,
+        end: Optional[int] = None,
+        line_offset: int = 0,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
         self.label = label
+        self.start = start
+        self.end = end
+        self.line_offset = line_offset
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+        reader = LineReader(filename, self.encoding, self.start, self.end, self.encoding_sample_size)
+        for line_num, line in enumerate(reader, start=self.line_offset + 1):
             labels = []
             tokens = []
             for token in line.rstrip().split(" "):
@@ -265,6 +980,40 @@ class FastTextParser(Parser):
             yield {DEFAULT_TEXT_COLUMN: text, DEFAULT_LABEL_COLUMN: labels, LINE_NUMBER_COLUMN: line_num}
 
 
+def find_entities(tags: List[str], scheme: Type[Token]) -> List[Tuple[int, int, str]]:
+    """Finds the entities in the tags like `seqeval.scheme.Tokens.entities`, in linear time.
+
+    seqeval copies the rest of the tokens to find the end of each entity, which is quadratic in the length
+    of an entity-dense sentence. This function walks the tokens once with the same patterns of the scheme.
+
+    Returns:
+        The index of the first word, the index after the last word and the tag of each entity.
+    """
+    tokens = Tokens(tags, scheme)
+    extended = tokens.extended_tokens
+    entities = []
+    i = 0
+    prev = tokens.outside_token
+    while i < len(extended):
+        token = extended[i]
+        token.is_valid()
+        if token.is_start(prev):
+            end = i + 1
+            inside = token
+            while end < len(extended) and extended[end].is_inside(inside):
+                inside = extended[end]
+                end += 1
+            if end == len(extended):
+                end = len(tokens.tokens) - 1
+            if extended[end].is_end(extended[end - 1]):
+                entities.append((i, end, token.tag))
+            i = end
+        else:
+            i += 1
+        prev = extended[i - 1]
+    return entities
+
+
 class CoNLLParser(Parser):
     """CoNLLParser is a parser to read conll like format and returns a text and labels.
 
@@ -282,23 +1031,45 @@ class CoNLLParser(Parser):
         Peter B-PER
         Blackburn I-PER
     This format expects a token in the first column, and a tag in the second column.
-    The each data is separated by a new line.
+    The each data is separated by a new line. Every malformed line is reported as an error,
+    and the data which has it is skipped.
 
     Attributes:
         encoding: The character encoding.
         delimiter: A one-character string used to separate fields. It defaults to ' '.
         scheme: The tagging scheme. It supports `IOB2`, `IOE2`, `IOBES`, and `BILOU`.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at.
+        line_offset: The number of lines before `start`.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, delimiter: str = " ", scheme: str = "IOB2", **kwargs):
+    def __init__(
+        self,
+        encoding: str = DEFAULT_ENCODING,
+        delimiter: str = " ",
+        scheme: str = "IOB2",
+        start: int = 0,
+        end: Optional[int] = None,
+        line_offset: int = 0,
+        encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+        **kwargs,
+    ):
         self.encoding = encoding
+        self.encoding_sample_size = encoding_sample_size
         self.delimiter = delimiter
+        self.start = start
+        self.end = end
+        self.line_offset = line_offset
         mapping = {"IOB2": IOB2, "IOE2": IOE2, "IOBES": IOBES, "BILOU": BILOU}
         self._errors: List[FileParseException] = []
+        self.scheme_name = scheme
         if scheme in mapping:
             self.scheme = mapping[scheme]
         else:
             self.scheme = None
+        # The tags which have been checked, mapped to the error message if they are invalid.
+        self._checked_tags: Dict[str, Optional[str]] = {}
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -311,24 +1082,59 @@ class CoNLLParser(Parser):
             self._errors.append(error)
             return
 
-        reader = LineReader(filename, self.encoding)
-        words, tags = [], []
-        for line_num, line in enumerate(reader, start=1):
+        reader = LineReader(filename, self.encoding, self.start, self.end, self.encoding_sample_size)
+        for line_num, words, tags in self.read_sentences(filename, reader):
+            yield {LINE_NUMBER_COLUMN: line_num, **self.create_record(tags, words)}
+
+    def read_sentences(self, filename: str, lines: Iterable[str]) -> Iterator[Tuple[int, List[str], List[str]]]:
+        """Reads the sentences, which are separated by blank lines.
+
+        Every malformed line is reported as an error, and the sentence which has it is skipped.
+
+        Returns:
+            The line number of the first line, the words and the tags of each sentence.
+        """
+        words: List[str] = []
+        tags: List[str] = []
+        first_line_num = self.line_offset + 1
+        is_broken = False
+        for line_num, line in enumerate(lines, start=self.line_offset + 1):
             line = line.rstrip()
-            if line:
-                tokens = line.split("\t")
-                if len(tokens) != 2:
-                    message = "A line must be separated by tab and has two columns."
-                    self._errors.append(FileParseException(filename, line_num, message))
-                    return
-                word, tag = tokens
-                words.append(word)
-                tags.append(tag)
-            else:
-                yield self.create_record(tags, words)
+            if not line:
+                if words and not is_broken:
+                    yield first_line_num, words, tags
                 words, tags = [], []
-        if words:
-            yield self.create_record(tags, words)
+                first_line_num = line_num + 1
+                is_broken = False
+                continue
+            tokens = line.split("\t")
+            message: Optional[str]
+            if len(tokens) != 2:
+                message = "A line must be separated by tab and has two columns."
+            else:
+                message = self.check_tag(tokens[1])
+            if message:
+                self._errors.append(FileParseException(filename, line_num, message))
+                is_broken = True
+                continue
+            word, tag = tokens
+            words.append(word)
+            tags.append(tag)
+        if words and not is_broken:
+            yield first_line_num, words, tags
+
+    def check_tag(self, tag: str) -> Optional[str]:
+        """Returns the error message if the tag is invalid in the scheme. Otherwise, returns None."""
+        if tag not in self._checked_tags:
+            try:
+                # The prefix must be known to seqeval and allowed in the scheme, e.g. `B-` isn't allowed in IOE2.
+                is_valid = self.scheme(tag).is_valid()
+            except (KeyError, ValueError):
+                is_valid = False
+            self._checked_tags[tag] = (
+                None if is_valid else f"The tag {tag!r} is invalid in the {self.scheme_name} scheme."
+            )
+        return self._checked_tags[tag]
 
     def create_record(self, tags, words):
         text = self.delimiter.join(words)
@@ -336,13 +1142,11 @@ class CoNLLParser(Parser):
         return {DEFAULT_TEXT_COLUMN: text, DEFAULT_LABEL_COLUMN: labels}
 
     def align_span(self, words: List[str], tags: List[str]) -> List[Tuple[int, int, str]]:
-        tokens = Tokens(tags, self.scheme)
-        labels = []
-        for entity in tokens.entities:
-            text = self.delimiter.join(words[: entity.start])
-            start = len(text) + len(self.delimiter) if text else len(text)
-            chunk = words[entity.start : entity.end]
-            text = self.delimiter.join(chunk)
-            end = start + len(text)
-            labels.append((start, end, entity.tag))
-        return labels
+        """Converts the tags to the character offsets of the entities in the text joined by the delimiter.
+
+        The offset of each word is computed once as a running sum of the word lengths,
+        so the time is linear in the number of words regardless of the number of entities.
+        """
+        gap = len(self.delimiter)
+        offsets = list(itertools.accumulate((len(word) + gap for word in words), initial=0))
+        return [(offsets[start], offsets[end] - gap, tag) for start, end, tag in find_entities(tags, self.scheme)]
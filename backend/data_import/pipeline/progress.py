@@ -0,0 +1,80 @@
+import dataclasses
+from typing import Any, Dict, Optional
+
+
+@dataclasses.dataclass
+class Progress:
+    """Progress is a snapshot of a running import.
+
+    Attributes:
+        total_bytes: The number of bytes of the files to import.
+        bytes_read: The number of bytes read from the files.
+        rows: The number of records parsed.
+        examples: The number of examples saved.
+        labels: The number of labels saved.
+        errors: The number of errors found.
+        rows_per_sec: The number of records parsed per second.
+        eta: The estimated number of seconds to finish. None if it can't be estimated yet.
+    """
+
+    total_bytes: int = 0
+    bytes_read: int = 0
+    rows: int = 0
+    examples: int = 0
+    labels: int = 0
+    errors: int = 0
+    rows_per_sec: float = 0.0
+    eta: Optional[float] = None
+
+    @classmethod
+    def measure(
+        cls,
+        elapsed: float,
+        total_bytes: int,
+        bytes_read: int,
+        rows: int = 0,
+        **kwargs,
+    ) -> "Progress":
+        """Creates a snapshot whose speed and ETA are calculated from the work done in `elapsed` seconds.
+
+        Args:
+            elapsed: The number of seconds since the import started.
+            total_bytes: The number of bytes of the files to import.
+            bytes_read: The number of bytes read from the files.
+            rows: The number of records parsed.
+            kwargs: The other attributes.
+
+        Returns:
+            The snapshot.
+        """
+        rows_per_sec = rows / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if bytes_read >= total_bytes:
+            eta = 0.0
+        elif elapsed > 0 and bytes_read > 0:
+            eta = (total_bytes - bytes_read) * elapsed / bytes_read
+        return cls(
+            total_bytes=total_bytes,
+            bytes_read=bytes_read,
+            rows=rows,
+            rows_per_sec=rows_per_sec,
+            eta=eta,
+            **kwargs,
+        )
+
+    def merge(self, other: "Progress"):
+        """Adds the progress of another import running in parallel, such as a shard of the same file."""
+        self.total_bytes += other.total_bytes
+        self.bytes_read += other.bytes_read
+        self.rows += other.rows
+        self.examples += other.examples
+        self.labels += other.labels
+        self.errors += other.errors
+        self.rows_per_sec += other.rows_per_sec
+        if self.eta is None or other.eta is None:
+            self.eta = None
+        else:
+            self.eta = max(self.eta, other.eta)
+
+    def dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
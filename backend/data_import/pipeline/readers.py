@@ -1,12 +1,17 @@
 import abc
+import collections
 import collections.abc
 import dataclasses
+import functools
+import itertools
+import os
 import uuid
-from typing import Any, Dict, Iterator, List
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import pandas as pd
+import billiard
 
 from .exceptions import FileParseException
+from .records import RecordBatch, estimate_size
 
 DEFAULT_TEXT_COLUMN = "text"
 DEFAULT_LABEL_COLUMN = "label"
@@ -34,57 +39,338 @@ class BaseReader(collections.abc.Iterable):
         raise NotImplementedError("Please implement this method in the subclass.")
 
     @abc.abstractmethod
-    def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
+    def clear_errors(self):
+        """Forgets the errors found so far, after the caller has collected them."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    @abc.abstractmethod
+    def batch(self, batch_size: int, skip: int = 0, max_bytes: int = 0) -> Iterator[RecordBatch]:
+        """Returns the records in batches.
+
+        A batch is closed when it has `batch_size` records or its records reach `max_bytes`,
+        so a batch of long documents has fewer records than a batch of short sentences.
+
+        Args:
+            batch_size: The maximum number of records in a batch.
+            skip: The number of records to read and drop at first, e.g. the ones imported before.
+                The errors found while skipping them are dropped too, as they were reported before.
+            max_bytes: The estimated size of records in a batch in bytes. 0 doesn't limit the size.
+        """
         raise NotImplementedError("Please implement this method in the subclass.")
 
 
 class Parser(abc.ABC):
     """The abstract file parser."""
 
+    # Whether the parser implements `parse_batches`.
+    vectorized = False
+
     @abc.abstractmethod
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
         """Parses the file and returns the dictionary."""
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def list_sources(self, filename: "FileName") -> List["FileName"]:
+        """Returns the sources in the file, which are read as separate files. By default, the file itself."""
+        return [filename]
+
+    def parse_batches(self, filename: str, batch_size: int) -> Iterator[RecordBatch]:
+        """Parses the file into batches of records stored column by column, without creating a dict per record.
+
+        The batches have the same values as the records returned by `parse`, and their sizes are estimated.
+
+        Args:
+            filename: The filename to parse.
+            batch_size: The maximum number of records in a batch.
+        """
+        raise NotImplementedError("Please implement this method in the subclass.")
+
     @property
     def errors(self) -> List[FileParseException]:
         """Returns parsing errors."""
         return []
 
+    def clear_errors(self):
+        """Forgets the parsing errors. The subclasses which collect errors must return their list by `errors`."""
+        self.errors.clear()
+
 
 @dataclasses.dataclass
 class FileName:
+    """FileName is an uploaded file to read.
+
+    Attributes:
+        full_path: The path of the file.
+        generated_name: The name of the file in the upload directory.
+        upload_name: The name of the file uploaded by the user.
+        size: The number of bytes to read, which is used to report the progress. None means the whole file.
+    """
+
     full_path: str
     generated_name: str
     upload_name: str
+    size: Optional[int] = None
+
+    def get_size(self) -> int:
+        if self.size is not None:
+            return self.size
+        try:
+            return os.path.getsize(self.full_path)
+        except OSError:
+            return 0
+
+
+def add_file_columns(batch: RecordBatch, filename: FileName) -> RecordBatch:
+    """Adds the columns which `read_file` adds to each record."""
+    size = len(batch)
+    file_columns: Dict[str, Any] = {
+        UUID_COLUMN: [uuid.uuid4() for _ in range(size)],
+        FILE_NAME_COLUMN: [filename.generated_name] * size,
+        UPLOAD_NAME_COLUMN: [filename.upload_name] * size,
+    }
+    nbytes = batch.nbytes
+    if size:
+        nbytes += estimate_size({key: values[0] for key, values in file_columns.items()}) * size
+    return RecordBatch({**file_columns, **batch.columns}, size, nbytes)
+
+
+def read_file(parser: Parser, filename: FileName) -> Iterator[Dict[Any, Any]]:
+    rows = parser.parse(filename.full_path)
+    for row in rows:
+        yield {
+            UUID_COLUMN: uuid.uuid4(),
+            FILE_NAME_COLUMN: filename.generated_name,
+            UPLOAD_NAME_COLUMN: filename.upload_name,
+            **row,
+        }
+
+
+# A chunk of a file sent by a worker process: the records, and the errors with the number of
+# the records in the chunk parsed before each of them.
+Chunk = Tuple[List[Dict[Any, Any]], List[Tuple[int, FileParseException]]]
+
+# The queues which the worker processes send the chunks through, one per file in flight.
+# They are given to a worker when it starts, because a queue can't be passed to a task.
+_chunk_queues: List[Any] = []
+
+
+def init_worker(queues: List[Any]):
+    _chunk_queues[:] = queues
+
+
+def parse_chunks(parser: Parser, filename: FileName, chunk_size: int) -> Iterator[Chunk]:
+    """Parses a single file into chunks of at most `chunk_size` records.
+
+    The parser is a pickled copy of the one held by the main process, so its errors
+    only contain the ones raised while parsing this file. They are cleared as they are
+    added to a chunk, so a file with many broken lines doesn't pile them up.
+    """
+    records: List[Dict[Any, Any]] = []
+    errors: List[Tuple[int, FileParseException]] = []
+    for record in read_file(parser, filename):
+        if parser.errors:
+            errors.extend((len(records), error) for error in parser.errors)
+            parser.clear_errors()
+        records.append(record)
+        if len(records) == chunk_size:
+            yield records, errors
+            records, errors = [], []
+    errors.extend((len(records), error) for error in parser.errors)
+    parser.clear_errors()
+    if records or errors:
+        yield records, errors
+
+
+def send_chunks(parser: Parser, filename: FileName, chunk_size: int, slot: int):
+    """Parses a single file in a worker process, and sends the chunks through the queue of the slot.
+
+    A chunk is written to the pipe of the queue directly, so the worker waits while the main process
+    is behind. None is sent at the end even if the parsing fails, and the error is raised by the result
+    of the task.
+    """
+    queue = _chunk_queues[slot]
+    try:
+        for chunk in parse_chunks(parser, filename, chunk_size):
+            queue.put(chunk)
+    finally:
+        queue.put(None)
 
 
 class Reader(BaseReader):
+    """Reader reads the files one by one.
+
+    Attributes:
+        bytes_read: The number of bytes read so far. It is estimated from the records while reading a file,
+            and becomes exact when the file is finished.
+    """
+
     def __init__(self, filenames: List[FileName], parser: Parser):
         self.filenames = filenames
         self.parser = parser
+        self.bytes_read = 0
 
     def __iter__(self) -> Iterator[Dict[Any, Any]]:
         for filename in self.filenames:
-            rows = self.parser.parse(filename.full_path)
-            for row in rows:
-                yield {
-                    UUID_COLUMN: uuid.uuid4(),
-                    FILE_NAME_COLUMN: filename.generated_name,
-                    UPLOAD_NAME_COLUMN: filename.upload_name,
-                    **row,
-                }
-
-    def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
+            yield from self.count_bytes(filename, read_file(self.parser, filename))
+
+    @property
+    def total_bytes(self) -> int:
+        """The number of bytes of all the files."""
+        return sum(filename.get_size() for filename in self.filenames)
+
+    def count_bytes(self, filename: FileName, records: Iterable[Dict[Any, Any]]) -> Iterator[Dict[Any, Any]]:
+        """Passes through the records of a file while advancing `bytes_read`."""
+        start = self.bytes_read
+        end = start + filename.get_size()
+        for record in records:
+            self.bytes_read = min(self.bytes_read + estimate_size(record), end)
+            yield record
+        self.bytes_read = end
+
+    @property
+    def vectorized(self) -> bool:
+        """Whether the batches are read by `Parser.parse_batches` instead of grouping the records."""
+        return self.parser.vectorized
+
+    def batch(self, batch_size: int, skip: int = 0, max_bytes: int = 0) -> Iterator[RecordBatch]:
+        if self.vectorized:
+            yield from self.read_batches(batch_size, skip, max_bytes)
+            return
         batch = []
-        for record in self:
+        nbytes = 0
+        records = iter(self)
+        if skip > 0:
+            for _ in itertools.islice(records, skip):
+                pass
+            self.clear_errors()
+        for record in records:
             batch.append(record)
-            if len(batch) == batch_size:
-                yield pd.DataFrame(batch)
+            if max_bytes > 0:
+                nbytes += estimate_size(record)
+            if len(batch) == batch_size or (max_bytes > 0 and nbytes >= max_bytes):
+                yield RecordBatch.from_records(batch, nbytes)
                 batch = []
+                nbytes = 0
         if batch:
-            yield pd.DataFrame(batch)
+            yield RecordBatch.from_records(batch, nbytes)
+
+    def read_batches(self, batch_size: int, skip: int, max_bytes: int) -> Iterator[RecordBatch]:
+        """Reads the batches of each file from the parser. A batch doesn't contain the records of two files.
+
+        The byte limit is applied by assuming the records of a parsed batch have the same size.
+        """
+        for filename in self.filenames:
+            end = self.bytes_read + filename.get_size()
+            for batch in self.parser.parse_batches(filename.full_path, batch_size):
+                batch = add_file_columns(batch, filename)
+                self.bytes_read = min(self.bytes_read + batch.nbytes, end)
+                if skip > 0:
+                    skipped = min(skip, len(batch))
+                    skip -= skipped
+                    if skip == 0:
+                        self.clear_errors()
+                    if skipped == len(batch):
+                        continue
+                    batch = batch.slice(skipped, len(batch))
+                yield from batch.split(max_bytes)
+            self.bytes_read = end
+        if skip > 0:
+            self.clear_errors()
 
     @property
     def errors(self) -> List[FileParseException]:
         return self.parser.errors
+
+    def clear_errors(self):
+        self.parser.clear_errors()
+
+
+class ParallelReader(Reader):
+    """ParallelReader parses files concurrently in a pool of worker processes.
+
+    Each file is parsed by a single worker, but records and errors are returned in the
+    order of `filenames`, so the result is the same as the one of `Reader`. Each error is added
+    just before the record which follows it in the file, so skipping records drops the same errors.
+    The pool is made by billiard, the multiprocessing fork of Celery, because the daemonic processes
+    of the Celery prefork pool can't have children of multiprocessing. Workers are started
+    with the `spawn` method to avoid sharing the database connection of the main process.
+
+    A worker sends the records of a file in chunks through a queue, which the main process reads
+    while the worker goes on parsing. At most `max_workers` files are in flight, so only
+    a chunk or so per worker is in memory however large the files are. The queues are simple ones
+    without a feeder thread, because the thread can take the signal which terminates the worker,
+    and then the pool waits forever for the worker left running.
+
+    Attributes:
+        max_workers: The maximum number of worker processes.
+        chunk_size: The maximum number of records sent at once. `batch` sets it to the batch size.
+    """
+
+    def __init__(self, filenames: List[FileName], parser: Parser, max_workers: int, chunk_size: int = 1000):
+        super().__init__(filenames, parser)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._errors: List[FileParseException] = []
+
+    def is_parallel(self) -> bool:
+        return self.max_workers > 1 and len(self.filenames) > 1
+
+    @property
+    def vectorized(self) -> bool:
+        # The workers return records, so the batches are made from them.
+        return super().vectorized and not self.is_parallel()
+
+    def __iter__(self) -> Iterator[Dict[Any, Any]]:
+        if not self.is_parallel():
+            yield from super().__iter__()
+            return
+
+        context = billiard.get_context("spawn")
+        queues = [context.SimpleQueue() for _ in range(self.max_workers)]
+        with context.Pool(processes=self.max_workers, initializer=init_worker, initargs=(queues,)) as pool:
+            # A file in flight has a slot, whose queue is reused by the next file once the file is read.
+            filenames = iter(self.filenames)
+            submit = functools.partial(pool.apply_async, send_chunks)
+            results: Deque[Tuple[FileName, int, Any]] = collections.deque(
+                (filename, slot, submit((self.parser, filename, self.chunk_size, slot)))
+                for slot, filename in enumerate(itertools.islice(filenames, self.max_workers))
+            )
+            while results:
+                filename, slot, result = results.popleft()
+                yield from self.count_bytes(filename, self.receive(queues[slot], result))
+                for next_filename in itertools.islice(filenames, 1):
+                    results.append((next_filename, slot, submit((self.parser, next_filename, self.chunk_size, slot))))
+
+    def receive(self, queue, result) -> Iterator[Dict[Any, Any]]:
+        """Passes through the records of the chunks sent by a worker until the end of the file."""
+        while (chunk := queue.get()) is not None:
+            records, errors = chunk
+            yield from self.add_errors(records, errors)
+        # Raises the error of the worker if the parsing failed.
+        result.get()
+
+    def batch(self, batch_size: int, skip: int = 0, max_bytes: int = 0) -> Iterator[RecordBatch]:
+        self.chunk_size = batch_size
+        yield from super().batch(batch_size, skip, max_bytes)
+
+    def add_errors(
+        self, records: List[Dict[Any, Any]], errors: List[Tuple[int, FileParseException]]
+    ) -> Iterator[Dict[Any, Any]]:
+        """Passes through the records of a chunk while adding each error before the record which follows it.
+
+        The errors of the records skipped by `batch` are added before the skip ends, so they are cleared.
+        """
+        pending = collections.deque(errors)
+        for i, record in enumerate(records):
+            while pending and pending[0][0] <= i:
+                self._errors.append(pending.popleft()[1])
+            yield record
+        self._errors.extend(error for _, error in pending)
+
+    @property
+    def errors(self) -> List[FileParseException]:
+        return self.parser.errors + self._errors
+
+    def clear_errors(self):
+        super().clear_errors()
+        self._errors.clear()
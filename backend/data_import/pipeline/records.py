@@ -0,0 +1,152 @@
+import dataclasses
+import math
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class Missing:
+    """Missing is the value of a column which a record doesn't have."""
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = Missing()
+
+
+def is_null(value: Any) -> bool:
+    """Returns True if the value is missing, None or NaN."""
+    return value is None or value is MISSING or (isinstance(value, float) and math.isnan(value))
+
+
+def is_uuid4(value: Any) -> bool:
+    """Returns True if the value is a UUID object of version 4."""
+    return type(value) is uuid.UUID and value.version == 4
+
+
+def explode(value: Any) -> List[Any]:
+    """Splits a list-like value into its elements. The other values are returned as a single element list."""
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def estimate_size(value: Any) -> int:
+    """Estimates the size of a value read from a file in bytes. A string is counted by its length."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    return 8
+
+
+class RecordBatch:
+    """RecordBatch is a batch of records stored column by column.
+
+    Records don't need to have the same keys. If a record doesn't have a key,
+    its value in the column is `MISSING`, which is skipped when the record is restored.
+
+    Attributes:
+        columns: The mapping from a column name to its values.
+        size: The number of records.
+        nbytes: The estimated size of the records in bytes. 0 if it isn't estimated.
+    """
+
+    def __init__(self, columns: Dict[Any, List[Any]], size: int, nbytes: int = 0):
+        self.columns = columns
+        self.size = size
+        self.nbytes = nbytes
+
+    @classmethod
+    def from_records(cls, records: List[Dict[Any, Any]], nbytes: int = 0) -> "RecordBatch":
+        size = len(records)
+        columns: Dict[Any, List[Any]] = {}
+        for i, record in enumerate(records):
+            for key, value in record.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [MISSING] * size
+                column[i] = value
+        return cls(columns, size, nbytes)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, column: Any) -> bool:
+        return column in self.columns
+
+    def __getitem__(self, column: Any) -> List[Any]:
+        return self.columns[column]
+
+    def get(self, column: Any, default: Any = MISSING) -> List[Any]:
+        """Returns the values of the column. If the column doesn't exist, the values are `default`."""
+        if column in self.columns:
+            return self.columns[column]
+        return [default] * self.size
+
+    def slice(self, start: int, stop: int) -> "RecordBatch":
+        """Returns the records from `start` to `stop`. The size in bytes is prorated by the number of records."""
+        columns = {key: values[start:stop] for key, values in self.columns.items()}
+        size = stop - start
+        nbytes = self.nbytes * size // self.size if self.size else 0
+        return RecordBatch(columns, size, nbytes)
+
+    def split(self, max_bytes: int) -> Iterator["RecordBatch"]:
+        """Splits the batch into the batches of at most `max_bytes`, assuming the records have the same size.
+
+        Args:
+            max_bytes: The estimated size of a batch in bytes. 0 doesn't split the batch.
+        """
+        if max_bytes <= 0 or self.nbytes <= max_bytes:
+            yield self
+            return
+        step = max(1, self.size * max_bytes // self.nbytes)
+        for start in range(0, self.size, step):
+            yield self.slice(start, min(start + step, self.size))
+
+    def records(self, exclude_columns: Optional[Iterable[Any]] = None) -> Iterator[Dict[Any, Any]]:
+        """Restores records without `exclude_columns` and missing values."""
+        exclude = set(exclude_columns or [])
+        items = [(key, values) for key, values in self.columns.items() if key not in exclude]
+        for i in range(self.size):
+            yield {key: values[i] for key, values in items if values[i] is not MISSING}
+
+
+@dataclasses.dataclass
+class BatchStats:
+    """BatchStats summarizes the sizes of the batches saved by an import.
+
+    Attributes:
+        count: The number of batches.
+        min_rows: The number of records in the smallest batch.
+        max_rows: The number of records in the largest batch.
+        total_rows: The number of records in all the batches.
+        max_bytes: The estimated size of the largest batch in bytes.
+    """
+
+    count: int = 0
+    min_rows: int = 0
+    max_rows: int = 0
+    total_rows: int = 0
+    max_bytes: int = 0
+
+    def add(self, batch: RecordBatch):
+        self.min_rows = len(batch) if self.count == 0 else min(self.min_rows, len(batch))
+        self.max_rows = max(self.max_rows, len(batch))
+        self.max_bytes = max(self.max_bytes, batch.nbytes)
+        self.total_rows += len(batch)
+        self.count += 1
+
+    def merge(self, other: "BatchStats"):
+        if other.count == 0:
+            return
+        self.min_rows = other.min_rows if self.count == 0 else min(self.min_rows, other.min_rows)
+        self.max_rows = max(self.max_rows, other.max_rows)
+        self.max_bytes = max(self.max_bytes, other.max_bytes)
+        self.total_rows += other.total_rows
+        self.count += other.count
+
+    def dict(self) -> Dict[str, int]:
+        return dataclasses.asdict(self)
@@ -0,0 +1,147 @@
+import codecs
+import dataclasses
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .catalog import JSONL, CoNLL, FastText, Format, TextLine
+from .compression import is_compressed
+from .parsers import DEFAULT_ENCODING, ENCODING_SAMPLE_SIZE, decide_encoding
+from .readers import FileName
+
+# The formats which can be split into shards.
+# The value is True if records are separated by blank lines instead of line breaks.
+# CSV isn't included because a quoted field can contain line breaks.
+SHARDABLE_FORMATS = {
+    FastText.name: False,
+    JSONL.name: False,
+    TextLine.name: False,
+    CoNLL.name: True,
+}
+
+
+@dataclasses.dataclass
+class Shard:
+    """Shard is a byte range of a file, which is imported by a separate task.
+
+    Attributes:
+        filename: The file to read.
+        start: The byte offset to start reading from.
+        end: The byte offset to stop reading at. None means the end of the file.
+        line_offset: The number of lines before `start`.
+        encoding: The character encoding of the file.
+    """
+
+    filename: FileName
+    start: int
+    end: Optional[int]
+    line_offset: int
+    encoding: str
+
+    def dict(self) -> Dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def parse(cls, obj: Dict[str, Any]) -> "Shard":
+        return cls(**{**obj, "filename": FileName(**obj["filename"])})
+
+    @property
+    def parser_kwargs(self) -> Dict[str, Any]:
+        return {"start": self.start, "end": self.end, "line_offset": self.line_offset, "encoding": self.encoding}
+
+
+def is_shardable(file_format: Format) -> bool:
+    return file_format.name in SHARDABLE_FORMATS
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """Returns True if a line break is encoded as the single byte `\\n`."""
+    codec = codecs.lookup(encoding)
+    return codec.name == "utf-8-sig" or "\n".encode(codec.name) == b"\n"
+
+
+def count_lines(filename: str, start: int, end: int, buffer_size: int = 1024 * 1024) -> int:
+    """Counts the line breaks in a byte range like the parsers do, that is, `\\r\\n`, `\\n` and a lone `\\r`."""
+    with open(filename, "rb") as f:
+        f.seek(start)
+        count = 0
+        remaining = end - start
+        last = b""
+        while remaining > 0:
+            binary = f.read(min(buffer_size, remaining))
+            if not binary:
+                break
+            count += binary.count(b"\n") + binary.count(b"\r") - binary.count(b"\r\n")
+            # `\r\n` split across two reads is a single line break.
+            if last == b"\r" and binary[:1] == b"\n":
+                count -= 1
+            last = binary[-1:]
+            remaining -= len(binary)
+        return count
+
+
+def split_file(filename: str, shard_size: int, by_blank_line: bool = False) -> Iterator[Tuple[int, int, int]]:
+    """Splits a file into byte ranges at record boundaries.
+
+    Args:
+        filename: The filename to split.
+        shard_size: The approximate size of a shard in bytes.
+        by_blank_line: If True, a shard ends at a blank line. Otherwise, it ends at a line break.
+
+    Returns:
+        The tuples of the start offset, the end offset and the number of lines before the start offset.
+    """
+    size = os.path.getsize(filename)
+    start = 0
+    line_offset = 0
+    with open(filename, "rb") as f:
+        while start < size:
+            f.seek(start + shard_size - 1)
+            f.readline()
+            if by_blank_line:
+                line = f.readline()
+                while line.strip():
+                    line = f.readline()
+            end = min(f.tell(), size)
+            yield start, end, line_offset
+            line_offset += count_lines(filename, start, end)
+            start = end
+
+
+def split_files(
+    filenames: List[FileName],
+    file_format: Format,
+    shard_size: int,
+    encoding: str = DEFAULT_ENCODING,
+    encoding_sample_size: int = ENCODING_SAMPLE_SIZE,
+) -> List[Shard]:
+    """Splits files into shards.
+
+    A file is imported as a single shard if its encoding doesn't allow to split it at byte level (e.g. UTF-16)
+    or it's compressed.
+
+    Args:
+        filenames: The files to split.
+        file_format: The file format. It must be shardable.
+        shard_size: The approximate size of a shard in bytes.
+        encoding: The character encoding specified by the user.
+        encoding_sample_size: The maximum number of bytes to detect the encoding.
+
+    Returns:
+        The shards in the order of the files.
+    """
+    by_blank_line = SHARDABLE_FORMATS[file_format.name]
+    shards = []
+    for filename in filenames:
+        file_encoding = decide_encoding(filename.full_path, encoding, encoding_sample_size)
+        if is_compressed(filename.full_path):
+            shards.append(Shard(filename, 0, None, 0, file_encoding))
+            continue
+        if is_ascii_compatible(file_encoding):
+            ranges = split_file(filename.full_path, shard_size, by_blank_line)
+        else:
+            ranges = iter([(0, os.path.getsize(filename.full_path), 0)])
+        for start, end, line_offset in ranges:
+            shards.append(
+                Shard(dataclasses.replace(filename, size=end - start), start, end, line_offset, file_encoding)
+            )
+    return shards
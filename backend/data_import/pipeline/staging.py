@@ -0,0 +1,169 @@
+import datetime
+import functools
+from typing import List, Optional, Type
+
+from celery.result import AsyncResult
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from .examples import duplicate_key, fill_content_hashes, lock_project
+from data_import.models import ImportStaging
+from examples.models import Assignment, Comment, Example, ExampleState, MediaFile
+from label_types.models import CategoryType, RelationType, SpanType
+from labels.models import BoundingBox, Category, Relation, Segmentation, Span, TextLabel
+from projects.models import Project
+
+# The label types and the fields of the labels which refer to them.
+TYPE_REFERENCES = [
+    (CategoryType, [(Category, "label"), (BoundingBox, "label"), (Segmentation, "label")]),
+    (SpanType, [(Span, "label")]),
+    (RelationType, [(Relation, "type")]),
+]
+
+# The models which refer to the examples, in the order to delete them. Relations refer to spans.
+EXAMPLE_CHILDREN: List[Type[models.Model]] = [
+    Relation,
+    Category,
+    Span,
+    TextLabel,
+    BoundingBox,
+    Segmentation,
+    ExampleState,
+    Comment,
+    Assignment,
+]
+
+
+def delete_rows(queryset: models.QuerySet) -> int:
+    """Deletes the rows by a single DELETE statement, without collecting the related objects.
+
+    The rows which refer to them must be deleted beforehand.
+    """
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+class StagingProject:
+    """StagingProject is a hidden copy of a project which an atomic import loads the data into.
+
+    The copy has the settings of the project but no members, so it isn't listed to the annotators.
+    The import commits batch by batch into the copy, and `publish` moves the examples and label types
+    to the project in one short transaction with a few UPDATE statements per model. If the import fails,
+    `discard` deletes the copy with a few DELETE statements, leaving the project untouched.
+    The copies left by a crashed worker are deleted by `discard_orphans`.
+
+    Attributes:
+        project: The project to publish into.
+        staging: The copy which the data is loaded into.
+    """
+
+    def __init__(self, project: Project, staging: Project):
+        self.project = project
+        self.staging = staging
+
+    @classmethod
+    def create(cls, project: Project, task_id: str = "") -> "StagingProject":
+        """Creates a copy of the project without its examples, label types and members.
+
+        Args:
+            project: The project to publish into.
+            task_id: The id of the Celery task which imports the data, if any.
+        """
+        with transaction.atomic():
+            staging = Project.objects.get(pk=project.pk)
+            staging.pk = None
+            staging.id = None
+            staging._state.adding = True
+            staging.name = f"{project.name} (importing)"[: Project._meta.get_field("name").max_length]
+            staging.save()
+            ImportStaging.objects.create(staging=staging, project=project, task_id=task_id)
+        return cls(project, staging)
+
+    @classmethod
+    def discard_orphans(cls, timeout: float) -> int:
+        """Discards the copies whose import has stopped without publishing or discarding them.
+
+        A copy is orphaned if its project has been deleted, its task has finished, e.g. failed
+        by a killed worker, or it was created more than `timeout` seconds ago.
+
+        Args:
+            timeout: The number of seconds after which a copy is discarded even if its task seems running.
+
+        Returns:
+            The number of the discarded copies.
+        """
+        expired_at = timezone.now() - datetime.timedelta(seconds=timeout)
+        discarded = 0
+        for record in ImportStaging.objects.select_related("staging", "project"):
+            finished = bool(record.task_id) and AsyncResult(record.task_id).ready()
+            if record.project is None or finished or record.created_at < expired_at:
+                cls.delete_copy(record.staging)
+                discarded += 1
+        return discarded
+
+    def publish(self, drop_duplicates: bool = False, columns: Optional[List[str]] = None) -> int:
+        """Moves the examples and label types to the project and deletes the copy.
+
+        The labels of the staged label types whose names are already in the project are moved
+        to the existing types, and the other types are moved as they are.
+
+        Args:
+            drop_duplicates: Whether to drop the staged examples whose content is already in the project,
+                e.g. the ones imported by another task while this import was running.
+            columns: The meta columns which the duplicates must also share.
+
+        Returns:
+            The number of the dropped examples.
+        """
+        with transaction.atomic():
+            dropped = 0
+            if drop_duplicates:
+                lock_project(self.project)
+                fill_content_hashes(self.project)
+                published = Example.objects.filter(project=self.project).only("content_hash", "meta")
+                staged = Example.objects.filter(
+                    project=self.staging, content_hash__in=published.values("content_hash")
+                ).only("content_hash", "meta")
+                keys = {
+                    duplicate_key(example, columns)
+                    for example in published.filter(content_hash__in=staged.values("content_hash"))
+                }
+                duplicate_ids = [example.pk for example in staged if duplicate_key(example, columns) in keys]
+                dropped = self.delete_examples(Example.objects.filter(pk__in=duplicate_ids))
+            for type_model, references in TYPE_REFERENCES:
+                existing = dict(type_model.objects.filter(project=self.project).values_list("text", "pk"))
+                staged = type_model.objects.filter(project=self.staging)
+                conflicts = staged.filter(text__in=list(existing))
+                for staged_id, text in conflicts.values_list("pk", "text"):
+                    for label_model, field in references:
+                        label_model.objects.filter(**{field: staged_id}).update(**{field: existing[text]})
+                delete_rows(conflicts)
+                staged.update(project=self.project)
+            Example.objects.filter(project=self.staging).update(project=self.project)
+            self.staging.delete()
+        return dropped
+
+    def discard(self):
+        """Deletes the copy with the data loaded into it."""
+        self.delete_copy(self.staging)
+
+    @classmethod
+    def delete_copy(cls, staging: Project):
+        with transaction.atomic():
+            cls.delete_examples(Example.objects.filter(project=staging))
+            for type_model, _ in TYPE_REFERENCES:
+                delete_rows(type_model.objects.filter(project=staging))
+            staging.delete()
+
+    @staticmethod
+    def delete_examples(examples: models.QuerySet) -> int:
+        """Deletes the examples with their labels. Returns the number of the deleted examples.
+
+        The media files which no example refers to any more are released after the transaction is committed.
+        """
+        digests = list(examples.filter(media_file__isnull=False).values_list("media_file", flat=True).distinct())
+        for model in EXAMPLE_CHILDREN:
+            delete_rows(model.objects.filter(example__in=examples))
+        deleted = delete_rows(examples)
+        if digests:
+            transaction.on_commit(functools.partial(MediaFile.objects.release, digests))
+        return deleted
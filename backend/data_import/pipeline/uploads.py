@@ -0,0 +1,235 @@
+import errno
+import os
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import django_drf_filepond.drf_filepond_settings as filepond_settings
+from django.db import transaction
+from django_drf_filepond.api import store_upload
+from django_drf_filepond.models import (
+    DrfFilePondStoredStorage,
+    StoredUpload,
+    TemporaryUpload,
+)
+
+from examples.models import MediaFile
+from examples.storage import hash_file, media_path, parse_media_path
+
+T = TypeVar("T")
+
+# The errors of os.link which mean that the file can't be linked but can be copied.
+UNLINKABLE_ERRORS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP}
+
+# The number of rows to write at once when the uploads are recorded as stored.
+STORE_BATCH_SIZE = 1000
+
+
+def map_in_threads(func: Callable[..., T], items: List, max_workers: int) -> List[T]:
+    """Applies the function to the items in a thread pool, for the functions which mostly wait for I/O.
+
+    The results are in the order of the items. The items are processed one by one if `max_workers` is 1 or less.
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, items))
+
+
+def link_or_copy(source: str, target: str) -> bool:
+    """Links the file to the target, or copies it if they aren't on the same file system.
+
+    A hard link shares the content with the source, so no data is copied. Unlike a rename,
+    the source is kept until it's deleted, which leaves the temporary upload intact if the import fails.
+
+    Returns:
+        True if the target is created. False if the target is already a link to the source.
+
+    Raises:
+        FileExistsError: If the target is a different file.
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+        return True
+    except FileExistsError:
+        if os.path.samefile(source, target):
+            return False
+        raise
+    except OSError as e:
+        if e.errno not in UNLINKABLE_ERRORS:
+            raise
+    if os.path.exists(target):
+        raise FileExistsError(errno.EEXIST, "The file store already has the file.", target)
+    shutil.copy2(source, target)
+    return True
+
+
+def uses_local_store() -> bool:
+    """Returns True if the file store is a local directory, not a storage backend such as S3."""
+    return not filepond_settings.STORAGES_BACKEND
+
+
+def add_media_files(files: List[Tuple[str, str]], max_workers: int = 1) -> List[str]:
+    """Adds the files to the content-addressable media store, and returns their paths in the store.
+
+    The files are hashed by a thread pool. A file whose content is already in the store is mapped
+    to the stored file, so it isn't stored again. The files themselves are stored by `UploadStore`
+    or `store_media_files`.
+
+    Args:
+        files: The paths of the images or audio files and their original names, which give the extensions.
+        max_workers: The maximum number of threads to hash the files.
+
+    Returns:
+        The paths of the files relative to the file store, in the order of the files.
+    """
+    digests = map_in_threads(lambda file: hash_file(file[0]), files, max_workers)
+    media_files = {
+        digest: MediaFile(digest=digest, file=media_path(digest, os.path.splitext(name)[1]), size=os.path.getsize(path))
+        for (path, name), digest in zip(files, digests)
+    }
+    MediaFile.objects.bulk_create(media_files.values(), batch_size=STORE_BATCH_SIZE, ignore_conflicts=True)
+    stored = dict(MediaFile.objects.filter(pk__in=list(media_files)).values_list("digest", "file"))
+    return [stored[digest] for digest in digests]
+
+
+def store_media_files(files: List[Tuple[str, str]], max_workers: int = 1) -> List[str]:
+    """Adds the local files to the media store and links them into it, without uploading them.
+
+    A file which no example refers to, e.g. after a failed import, is deleted by `collect_media`.
+
+    Args:
+        files: The paths of the images or audio files and their original names.
+        max_workers: The maximum number of threads to hash and link the files.
+
+    Returns:
+        The paths of the files relative to the file store, in the order of the files.
+    """
+    names = add_media_files(files, max_workers)
+    if uses_local_store():
+        targets = [os.path.join(filepond_settings.FILE_STORE_PATH, name) for name in names]
+        map_in_threads(
+            lambda args: UploadStore.link(*args), list(zip([path for path, _ in files], targets)), max_workers
+        )
+        return names
+    storage = DrfFilePondStoredStorage()
+    for (path, _), name in zip(files, names):
+        if not storage.exists(name):
+            with open(path, "rb") as f:
+                storage.save(name, f)
+    return names
+
+
+class UploadStore:
+    """UploadStore stores the temporary uploads of an import into the file store of django-drf-filepond.
+
+    With the local file store, `start` links (or copies) the files into the store by a thread pool,
+    so it runs while the examples are inserted. `commit` then waits for the files, records them as stored uploads
+    and deletes the temporary uploads in a few queries. If the import fails, `discard` deletes the files
+    linked into the store, and the temporary uploads are kept for a retry.
+    With a storage backend, `commit` stores the files one by one by `store_upload` of django-drf-filepond.
+
+    The files in the content-addressable media store are shared by the imports, so a file which is already
+    in the store isn't stored again, and `discard` leaves them to `MediaFileManager.release`.
+
+    Attributes:
+        temporary_uploads: The uploads to store.
+        max_workers: The maximum number of threads to store the files.
+        paths: The paths in the store by the upload ids. The other uploads are stored at the paths of the uploads.
+    """
+
+    def __init__(
+        self,
+        temporary_uploads: List[TemporaryUpload],
+        max_workers: int = 1,
+        paths: Optional[Dict[str, str]] = None,
+    ):
+        self.temporary_uploads = temporary_uploads
+        self.max_workers = max_workers
+        self.paths = paths or {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+
+    def start(self):
+        """Starts to link the files into the local file store in the background."""
+        if not uses_local_store() or self._futures:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=max(self.max_workers, 1))
+        self._futures = [
+            self._executor.submit(self.link, tu.get_file_path(), self.get_store_path(tu))
+            for tu in self.temporary_uploads
+        ]
+
+    def get_name(self, tu: TemporaryUpload) -> str:
+        """Returns the path of the upload relative to the file store."""
+        return self.paths.get(tu.upload_id, tu.file.name)
+
+    def get_store_path(self, tu: TemporaryUpload) -> str:
+        return os.path.join(filepond_settings.FILE_STORE_PATH, self.get_name(tu))
+
+    @staticmethod
+    def link(source: str, target: str) -> Tuple[str, bool]:
+        try:
+            return target, link_or_copy(source, target)
+        except FileExistsError:
+            # The same content is already in the media store.
+            if parse_media_path(os.path.relpath(target, filepond_settings.FILE_STORE_PATH)):
+                return target, False
+            raise
+
+    def wait(self) -> List[Tuple[str, bool]]:
+        """Waits for the files to be linked, and returns the targets and whether they are created."""
+        try:
+            return [future.result() for future in self._futures]
+        finally:
+            if self._executor:
+                self._executor.shutdown()
+
+    def commit(self):
+        """Stores the uploads and deletes the temporary uploads."""
+        if not uses_local_store():
+            storage = DrfFilePondStoredStorage()
+            for tu in self.temporary_uploads:
+                name = self.get_name(tu)
+                if parse_media_path(name) and storage.exists(name):
+                    StoredUpload.objects.create(
+                        upload_id=tu.upload_id, file=name, uploaded=tu.uploaded, uploaded_by_id=tu.uploaded_by_id
+                    )
+                    tu.delete()
+                    continue
+                store_upload(tu.upload_id, destination_file_path=name)
+            return
+        self.start()
+        self.wait()
+        stored_uploads = [
+            StoredUpload(
+                upload_id=tu.upload_id,
+                file=self.get_name(tu),
+                uploaded=tu.uploaded,
+                uploaded_by_id=tu.uploaded_by_id,
+            )
+            for tu in self.temporary_uploads
+        ]
+        upload_ids = [tu.upload_id for tu in self.temporary_uploads]
+        with transaction.atomic():
+            StoredUpload.objects.bulk_create(stored_uploads, batch_size=STORE_BATCH_SIZE)
+            for i in range(0, len(upload_ids), STORE_BATCH_SIZE):
+                # The signal of django-drf-filepond deletes the temporary files and their directories.
+                TemporaryUpload.objects.filter(upload_id__in=upload_ids[i : i + STORE_BATCH_SIZE]).delete()
+
+    def discard(self):
+        """Deletes the files linked into the store. The temporary uploads are kept."""
+        for future in self._futures:
+            future.cancel()
+        for future in self._futures:
+            if future.cancelled() or future.exception():
+                continue
+            target, created = future.result()
+            if parse_media_path(os.path.relpath(target, filepond_settings.FILE_STORE_PATH)):
+                continue
+            if created and os.path.exists(target):
+                os.remove(target)
+        if self._executor:
+            self._executor.shutdown()
+        self._futures = []
@@ -0,0 +1,104 @@
+import os
+import pathlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from data_import.management.commands.import_dataset import find_files, parse_options
+from examples.models import Example, MediaFile
+from label_types.models import CategoryType
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+DATA_DIR = pathlib.Path(__file__).parent / "data"
+
+
+class TestImportCommand(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        error_report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, error_report_dir)
+        error_report_settings = override_settings(IMPORT_ERROR_REPORT_DIR=error_report_dir)
+        error_report_settings.enable()
+        self.addCleanup(error_report_settings.disable)
+
+    def import_dataset(self, *paths, **options):
+        stdout = StringIO()
+        call_command(
+            "import_dataset", self.project.item.id, *map(str, paths), stdout=stdout, stderr=StringIO(), **options
+        )
+        return stdout.getvalue()
+
+    def test_import_file(self):
+        output = self.import_dataset(
+            DATA_DIR / "text_classification/example.jsonl", format="JSONL", option=["column_label=labels"]
+        )
+        self.assertIn("Imported 3 examples", output)
+        self.assertEqual(Example.objects.filter(project=self.project.item).count(), 3)
+        self.assertEqual(CategoryType.objects.filter(project=self.project.item).count(), 2)
+        self.assertTrue(all(example.filename.name == "." for example in Example.objects.all()))
+
+    def test_import_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in ["a.jsonl", "b.jsonl", ".hidden.jsonl"]:
+            shutil.copy(DATA_DIR / "text_classification/example.jsonl", os.path.join(directory, name))
+        self.import_dataset(directory, format="JSONL", batch_size=1, atomic=True)
+        self.assertEqual(Example.objects.filter(project=self.project.item).count(), 6)
+
+    def test_raise_error_for_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.import_dataset(DATA_DIR / "missing.jsonl", format="JSONL")
+
+    def test_raise_error_for_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.import_dataset(DATA_DIR / "text_classification/example.jsonl", format="Unknown")
+
+
+class TestImportMediaCommand(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.IMAGE_CLASSIFICATION)
+        self.store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store_dir)
+        store_path = patch("django_drf_filepond.drf_filepond_settings.FILE_STORE_PATH", self.store_dir)
+        store_path.start()
+        self.addCleanup(store_path.stop)
+
+    def test_link_images_into_media_store(self):
+        image = DATA_DIR / "images/1500x500.jpeg"
+        stderr = StringIO()
+        call_command(
+            "import_dataset",
+            self.project.item.id,
+            str(image),
+            str(image),
+            format="ImageFile",
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+        self.assertIn("2 examples, 0 errors", stderr.getvalue())
+        media_file = MediaFile.objects.get()
+        self.assertEqual(media_file.examples.count(), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.store_dir, media_file.file.name)))
+
+
+class TestFindFiles(TestCase):
+    def test_walk_directories_in_order(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in ["b/2.txt", "a/1.txt", ".git/config", "b/.DS_Store"]:
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pathlib.Path(path).touch()
+        files = find_files([directory])
+        self.assertEqual(files, [os.path.join(directory, "a/1.txt"), os.path.join(directory, "b/2.txt")])
+
+    def test_parse_options(self):
+        options = parse_options(["column_data=text", "all_sheets=true", "delimiter=,"])
+        self.assertEqual(options, {"column_data": "text", "all_sheets": True, "delimiter": ","})
+        with self.assertRaises(CommandError):
+            parse_options(["column_data"])
@@ -0,0 +1,129 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from django.test import override_settings
+
+from data_import.pipeline.compression import (
+    check_decompressed_size,
+    content_extension,
+    expand_archives,
+    is_compressed,
+    open_binary,
+    split_member_path,
+    stat_file,
+)
+from data_import.pipeline.exceptions import MaximumDecompressedSizeException
+from data_import.pipeline.readers import FileName
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.content = b"line1\nline2\n"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_zip(self, members):
+        path = os.path.join(self.test_dir, "upload")
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, content in members.items():
+                zf.writestr(name, content)
+        return path
+
+    def test_open_compressed_file(self):
+        for compress in [gzip.compress, bz2.compress, lzma.compress]:
+            path = os.path.join(self.test_dir, "upload")
+            with open(path, "wb") as f:
+                f.write(compress(self.content))
+            with self.subTest(compress=compress.__module__):
+                self.assertTrue(is_compressed(path))
+                with open_binary(path) as f:
+                    self.assertEqual(f.read(), self.content)
+
+    def test_open_plain_file(self):
+        path = os.path.join(self.test_dir, "upload")
+        with open(path, "wb") as f:
+            f.write(self.content)
+        self.assertFalse(is_compressed(path))
+        self.assertEqual(split_member_path(path), (path, None))
+        with open_binary(path) as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_open_zip_member(self):
+        archive = self.create_zip({"dir/a.jsonl": self.content})
+        path = f"{archive}/dir/a.jsonl"
+        self.assertEqual(split_member_path(path), (archive, "dir/a.jsonl"))
+        self.assertTrue(is_compressed(path))
+        self.assertEqual(stat_file(path).st_size, os.path.getsize(archive))
+        with open_binary(path) as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_limit_decompressed_size(self):
+        path = os.path.join(self.test_dir, "upload.gz")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(self.content))
+        member = f"{self.create_zip({'a.jsonl': self.content})}/a.jsonl"
+        for filename in [path, member]:
+            with self.subTest(filename=filename):
+                with override_settings(MAX_DECOMPRESSED_SIZE=len(self.content)), open_binary(filename) as f:
+                    self.assertEqual(f.read(), self.content)
+                with override_settings(MAX_DECOMPRESSED_SIZE=len(self.content) - 1), open_binary(filename) as f:
+                    with self.assertRaises(MaximumDecompressedSizeException):
+                        f.read()
+
+    def test_check_decompressed_size(self):
+        archive = self.create_zip({"a.jsonl": self.content})
+        path = os.path.join(self.test_dir, "upload.gz")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(self.content))
+        for filename in [
+            FileName(full_path=archive, generated_name="upload", upload_name="data.zip"),
+            FileName(full_path=path, generated_name="upload.gz", upload_name="data.jsonl.gz"),
+        ]:
+            with self.subTest(filename=filename.upload_name):
+                with override_settings(MAX_DECOMPRESSED_SIZE=len(self.content)):
+                    self.assertIsNone(check_decompressed_size(filename))
+                with override_settings(MAX_DECOMPRESSED_SIZE=len(self.content) - 1):
+                    self.assertEqual(check_decompressed_size(filename).filename, filename.upload_name)
+
+    def test_check_decompressed_size_of_broken_file(self):
+        path = os.path.join(self.test_dir, "upload.gz")
+        with open(path, "wb") as f:
+            f.write(gzip.compress(self.content)[:-8])
+        filename = FileName(full_path=path, generated_name="upload.gz", upload_name="data.jsonl.gz")
+        self.assertIsNone(check_decompressed_size(filename))
+
+    def test_missing_file_is_not_member(self):
+        path = os.path.join(self.test_dir, "missing", "a.jsonl")
+        self.assertEqual(split_member_path(path), (path, None))
+
+    def test_expand_archives(self):
+        archive = self.create_zip(
+            {"a.jsonl": self.content, "dir/": b"", "dir/b.jsonl": b"", "__MACOSX/._a.jsonl": b"", ".DS_Store": b""}
+        )
+        filenames = [
+            FileName(full_path=archive, generated_name="upload", upload_name="data.zip"),
+            FileName(full_path=archive, generated_name="upload", upload_name="data.xlsx"),
+        ]
+        expanded = expand_archives(filenames)
+        self.assertEqual(
+            [(f.full_path, f.upload_name, f.get_size()) for f in expanded[:2]],
+            [
+                (f"{archive}/a.jsonl", "data.zip/a.jsonl", len(self.content)),
+                (f"{archive}/dir/b.jsonl", "data.zip/dir/b.jsonl", 0),
+            ],
+        )
+        self.assertEqual(expanded[2], filenames[1])
+        self.assertEqual(len(expanded), 3)
+
+    def test_content_extension(self):
+        self.assertEqual(content_extension("data.XLSX.gz"), "xlsx")
+        self.assertEqual(content_extension("data.zip/a.xls"), "xls")
+        self.assertEqual(content_extension("upload"), "")
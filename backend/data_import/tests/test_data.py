@@ -2,7 +2,7 @@ import uuid
 
 from django.test import TestCase
 
-from data_import.pipeline.data import BinaryData, TextData
+from data_import.pipeline.data import BinaryData, TextData, TextDataRecord
 from examples.models import Example
 from projects.tests.utils import prepare_project
 
@@ -36,6 +36,24 @@ class TestTextData(TestCase):
         self.assertIsInstance(example, Example)
         self.assertEqual(example.uuid, self.dic["example_uuid"])
 
+    def test_parse_batch(self):
+        rows = [
+            {**self.dic, "meta": 1},
+            {**self.dic, "text": ""},
+            {**self.dic, "text": 1},
+            {**self.dic, "example_uuid": str(self.dic["example_uuid"])},
+        ]
+        data = TextData.parse_batch(rows)
+        self.assertIsInstance(data[0], TextDataRecord)
+        self.assertEqual(data[0].meta, {"meta": 1})
+        self.assertIsNone(data[1])
+        self.assertIsNone(data[2])
+        self.assertIsInstance(data[3], TextData)
+        example = data[0].create(self.project.item)
+        self.assertIsInstance(example, Example)
+        self.assertEqual(example.text, self.dic["text"])
+        self.assertEqual(example.meta, {"meta": 1})
+
 
 class TestBinaryData(TestCase):
     def setUp(self):
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from data_import.pipeline.error_reports import ErrorReport, delete_expired_reports
+
+
+class TestErrorReport(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "1", "report.jsonl")
+        self.errors = [
+            {"filename": "example.jsonl", "line": i, "message": f"Invalid data in line {i}"} for i in range(3)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_add_and_head(self):
+        report = ErrorReport(self.path)
+        report.add(self.errors)
+        report.add([])
+        self.assertEqual(report.count, 3)
+        self.assertEqual(report.name, "report")
+        self.assertEqual(report.head(2), self.errors[:2])
+        self.assertEqual(report.head(10), self.errors)
+
+    def test_reopen_at_offset(self):
+        report = ErrorReport(self.path)
+        report.add(self.errors[:1])
+        count, offset = report.count, report.offset
+        report.add(self.errors[1:])
+        reopened = ErrorReport(self.path, count=count, offset=offset)
+        self.assertEqual(reopened.count, 1)
+        self.assertEqual(reopened.head(10), self.errors[:1])
+
+    def test_reopen_without_offset_keeps_errors(self):
+        ErrorReport(self.path).add(self.errors)
+        self.assertEqual(ErrorReport(self.path, count=3).head(10), self.errors)
+
+    def test_extend(self):
+        report = ErrorReport(self.path)
+        report.add(self.errors[:1])
+        other = ErrorReport(os.path.join(self.test_dir, "1", "other.jsonl"))
+        other.add(self.errors[1:])
+        report.extend(other)
+        self.assertEqual(report.count, 3)
+        self.assertEqual(report.head(10), self.errors)
+
+    def test_delete(self):
+        report = ErrorReport(self.path)
+        report.delete()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestDeleteExpiredReports(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_delete_expired_reports(self):
+        expired = ErrorReport(os.path.join(self.test_dir, "1", "expired.jsonl"))
+        recent = ErrorReport(os.path.join(self.test_dir, "2", "recent.jsonl"))
+        an_hour_ago = time.time() - 60 * 60
+        os.utime(expired.path, (an_hour_ago, an_hour_ago))
+        self.assertEqual(delete_expired_reports(self.test_dir, timeout=60), 1)
+        self.assertFalse(os.path.exists(expired.path))
+        self.assertTrue(os.path.exists(recent.path))
+
+    def test_missing_directory(self):
+        self.assertEqual(delete_expired_reports(os.path.join(self.test_dir, "missing"), timeout=0), 0)
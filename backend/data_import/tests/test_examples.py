@@ -1,8 +1,14 @@
+import unittest
 import uuid
 
 from django.test import TestCase
 
-from data_import.pipeline.examples import Examples
+from data_import.pipeline.examples import (
+    Examples,
+    content_hash,
+    duplicate_key,
+    fill_content_hashes,
+)
 from examples.models import Example
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
@@ -15,6 +21,10 @@ class TestExamples(TestCase):
         example = Example(uuid=self.example_uuid, text="A", project=self.project.item)
         self.examples = Examples([example])
 
+    def test_save_content_hash(self):
+        self.examples.save()
+        self.assertEqual(Example.objects.get().content_hash, content_hash("A"))
+
     def test_save(self):
         self.examples.save()
         self.assertEqual(Example.objects.count(), 1)
@@ -23,3 +33,97 @@ class TestExamples(TestCase):
         self.examples.save()
         example = self.examples[self.example_uuid]
         self.assertEqual(example.uuid, self.example_uuid)
+
+
+class TestContentHash(unittest.TestCase):
+    def test_same_text(self):
+        self.assertEqual(content_hash("A"), content_hash("A"))
+
+    def test_different_text(self):
+        self.assertNotEqual(content_hash("A"), content_hash("B"))
+
+    def test_no_text(self):
+        self.assertIsNone(content_hash(None))
+
+
+class TestDuplicateKey(unittest.TestCase):
+    def make_example(self, meta):
+        return Example(text="A", meta=meta, content_hash=content_hash("A"))
+
+    def test_same_meta_columns(self):
+        self.assertEqual(
+            duplicate_key(self.make_example({"x": 1, "y": 2}), ["y", "x"]),
+            duplicate_key(self.make_example({"y": 2, "x": 1}), ["x", "y"]),
+        )
+
+    def test_ignore_unselected_meta(self):
+        self.assertEqual(duplicate_key(self.make_example({"x": 1})), duplicate_key(self.make_example({"x": 2})))
+        self.assertNotEqual(
+            duplicate_key(self.make_example({"x": 1}), ["x"]), duplicate_key(self.make_example({"x": 2}), ["x"])
+        )
+
+
+class TestDeduplicateExamples(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        examples = Examples([Example(text="A", project=self.project.item)])
+        examples.deduplicate(self.project.item)
+        examples.save()
+        self.existing = Example.objects.get()
+
+    def make_examples(self, texts):
+        return Examples([Example(uuid=uuid.uuid4(), text=text, project=self.project.item) for text in texts])
+
+    def test_skip(self):
+        examples = self.make_examples(["A", "B", "B"])
+        examples.deduplicate(self.project.item)
+        examples.save()
+        self.assertEqual([example.text for example in examples.examples], ["B"])
+        self.assertEqual(examples.duplicate_count, 2)
+        self.assertEqual(Example.objects.count(), 2)
+        self.assertEqual(Example.objects.get(text="B").content_hash, content_hash("B"))
+
+    def test_skip_examples_saved_without_deduplication(self):
+        examples = self.make_examples(["B"])
+        examples.save()
+        examples = self.make_examples(["B"])
+        examples.deduplicate(self.project.item)
+        self.assertEqual(len(examples), 0)
+
+    def test_skip_examples_without_content_hash(self):
+        Example.objects.create(text="B", project=self.project.item)
+        examples = self.make_examples(["B"])
+        examples.deduplicate(self.project.item)
+        self.assertEqual(len(examples), 0)
+        self.assertEqual(Example.objects.get(text="B").content_hash, content_hash("B"))
+
+    def test_skip_by_meta_columns(self):
+        examples = Examples([Example(text="A", meta={"x": 1}, project=self.project.item)])
+        examples.deduplicate(self.project.item, columns=["x"])
+        self.assertEqual(len(examples), 1)
+
+    def test_merge(self):
+        examples = self.make_examples(["A", "B", "B"])
+        uuids = [example.uuid for example in examples.examples]
+        examples.deduplicate(self.project.item, merge=True)
+        examples.save()
+        self.assertEqual(examples[uuids[0]].pk, self.existing.pk)
+        self.assertEqual(examples[uuids[2]].pk, examples[uuids[1]].pk)
+        self.assertEqual({example.text for example in examples.merge_targets}, {"A", "B"})
+
+    def test_other_project(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        examples = Examples([Example(text="A", project=project.item)])
+        examples.deduplicate(project.item)
+        self.assertEqual(len(examples), 1)
+
+
+class TestFillContentHashes(TestCase):
+    def test_fill_content_hashes(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        for text in ["A", "B", "C"]:
+            Example.objects.create(text=text, project=project.item)
+        Example.objects.create(text=None, project=project.item)
+        fill_content_hashes(project.item, batch_size=2)
+        hashes = dict(Example.objects.values_list("text", "content_hash"))
+        self.assertEqual(hashes, {"A": content_hash("A"), "B": content_hash("B"), "C": content_hash("C"), None: None})
@@ -6,9 +6,13 @@ from model_mommy import mommy
 
 from data_import.pipeline.label import (
     CategoryLabel,
+    CategoryRecord,
     RelationLabel,
+    RelationRecord,
     SpanLabel,
+    SpanRecord,
     TextLabel,
+    TextLabelRecord,
 )
 from label_types.models import CategoryType, RelationType, SpanType
 from labels.models import Category as CategoryModel
@@ -175,3 +179,72 @@ class TestRelationLabel(TestLabel):
         }
         relation_model = relation.create(self.user, self.example, types, id_to_span=id_to_span)
         self.assertIsInstance(relation_model, RelationModel)
+
+
+class TestParseBatch(TestLabel):
+    task = ProjectType.SEQUENCE_LABELING
+
+    def assert_same_as_parse(self, label_class, objs, fields):
+        example_uuids = [uuid.uuid4() for _ in objs]
+        expected = [label_class.parse_or_none(example_uuid, obj) for example_uuid, obj in zip(example_uuids, objs)]
+        expected = [label for label in expected if label is not None]
+        labels = label_class.parse_batch(example_uuids, objs)
+        self.assertEqual(
+            [[getattr(label, field) for field in ["id", "example_uuid", *fields]] for label in labels],
+            [[getattr(label, field) for field in ["id", "example_uuid", *fields]] for label in expected],
+        )
+        return labels
+
+    def test_category(self):
+        labels = self.assert_same_as_parse(CategoryLabel, ["A", "", 1, True, "B"], ["label"])
+        self.assertIsInstance(labels[0], CategoryRecord)
+        self.assertEqual(labels[0].type_name, "A")
+
+    def test_span(self):
+        objs = [
+            [0, 1, "A"],
+            (1, 3, "B"),
+            [1, 0, "A"],
+            [-1, 1, "A"],
+            [0, 1, ""],
+            [0, 1],
+            [0, 1, "A", "B"],
+            [True, 2, "A"],
+            ["0", 1, "A"],
+            {"start_offset": 0, "end_offset": 1, "label": "A", "id": 3},
+            {"start_offset": 0, "end_offset": 1, "label": "A", "extra": 3},
+            {"start_offset": 0, "label": "A"},
+            "A",
+        ]
+        labels = self.assert_same_as_parse(SpanLabel, objs, ["start_offset", "end_offset", "label"])
+        self.assertIsInstance(labels[0], SpanRecord)
+
+    def test_text(self):
+        labels = self.assert_same_as_parse(TextLabel, ["A", "", 2.0, []], ["text"])
+        self.assertIsInstance(labels[0], TextLabelRecord)
+        self.assertIsNone(labels[0].create_type(self.project.item))
+
+    def test_relation(self):
+        objs = [
+            {"from_id": 0, "to_id": 1, "type": "A"},
+            {"from_id": 0, "to_id": 1, "type": ""},
+            {"from_id": 0, "to_id": 1, "type": "A", "id": 5},
+            {"from_id": "0", "to_id": 1, "type": "A"},
+            {"from_id": 0, "to_id": 1},
+        ]
+        labels = self.assert_same_as_parse(RelationLabel, objs, ["from_id", "to_id", "type"])
+        self.assertIsInstance(labels[0], RelationRecord)
+
+    def test_record_is_saved_like_label(self):
+        types = MagicMock()
+        types.__getitem__.return_value = mommy.make(SpanType, project=self.project.item)
+        span = SpanLabel.parse_batch([self.example.uuid], [[0, 1, "A"]])[0]
+        span_model = span.create(self.user, self.example, types)
+        self.assertIsInstance(span_model, SpanModel)
+        self.assertEqual(span_model.uuid, span.uuid)
+        self.assertEqual(span.create_type(self.project.item).text, "A")
+
+    def test_record_comparison(self):
+        example_uuid = uuid.uuid4()
+        span1, span2 = SpanLabel.parse_batch([example_uuid, example_uuid], [[1, 2, "A"], [0, 1, "A"]])
+        self.assertLess(span2, span1)
@@ -27,3 +27,13 @@ class TestCategoryLabel(TestCase):
         label_types.update(self.project.item)
         category_type = label_types["A"]
         self.assertEqual(category_type.text, "A")
+
+    def test_update_only_given_texts(self):
+        label_types = LabelTypes(CategoryType)
+        label_types.save([CategoryType(text=text, project=self.project.item) for text in ["A", "B"]])
+        label_types.update(self.project.item, texts=["A"])
+        self.assertIn("A", label_types)
+        self.assertNotIn("B", label_types)
+        label_types.update(self.project.item, texts=["B"])
+        self.assertIn("A", label_types)
+        self.assertIn("B", label_types)
@@ -1,6 +1,7 @@
 import uuid
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+from django.db import connection
 from django.test import TestCase
 from model_mommy import mommy
 
@@ -55,6 +56,25 @@ class TestCategories(TestCase):
         self.categories.save_types(self.project.item)
         self.assertEqual(CategoryType.objects.count(), 2)
 
+    def test_save_only_new_types(self):
+        self.categories.save_types(self.project.item)
+        example_uuid = uuid.uuid4()
+        labels = [CategoryLabel(example_uuid=example_uuid, label=label) for label in ["A", "B", "C", "C"]]
+        categories = Categories(labels, self.types)
+        # insert and fetch "C" only
+        with self.assertNumQueries(2):
+            categories.save_types(self.project.item)
+        with self.assertNumQueries(0):
+            categories.save_types(self.project.item)
+        self.assertEqual(CategoryType.objects.count(), 3)
+        self.assertEqual(self.types["C"].text, "C")
+
+    def test_save_types_existing_in_project(self):
+        category_type = mommy.make("CategoryType", project=self.project.item, text="A")
+        self.categories.save_types(self.project.item)
+        self.assertEqual(CategoryType.objects.count(), 2)
+        self.assertEqual(self.types["A"], category_type)
+
 
 class TestSpans(TestCase):
     def setUp(self):
@@ -109,6 +129,24 @@ class TestSpans(TestCase):
         self.spans.save_types(self.project.item)
         self.assertEqual(SpanType.objects.count(), 2)
 
+    def assert_id_to_span(self, num_queries):
+        self.spans.save_types(self.project.item)
+        self.spans.save(self.user, self.examples)
+        with self.assertNumQueries(num_queries):
+            id_to_span = self.spans.id_to_span
+        self.assertEqual(len(id_to_span), 1)
+        span = next(iter(id_to_span.values()))
+        self.assertEqual(Span.objects.get(pk=span.pk).uuid, span.uuid)
+
+    def test_id_to_span_uses_returned_primary_keys(self):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.skipTest("The database doesn't return rows from bulk inserts.")
+        self.assert_id_to_span(num_queries=0)
+
+    def test_id_to_span_fetches_primary_keys(self):
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            self.assert_id_to_span(num_queries=1)
+
 
 class TestTexts(TestCase):
     def setUp(self):
@@ -171,3 +209,8 @@ class TestRelations(TestCase):
     def test_save_types(self):
         self.relations.save_types(self.project.item)
         self.assertEqual(RelationType.objects.count(), 1)
+
+    def test_save_only_new_types(self):
+        self.relations.save_types(self.project.item)
+        with self.assertNumQueries(0):
+            self.relations.save_types(self.project.item)
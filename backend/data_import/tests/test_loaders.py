@@ -0,0 +1,154 @@
+import unittest
+import uuid
+
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase
+
+from data_import.pipeline.loaders import (
+    COPY_LOADER,
+    ORM_LOADER,
+    ORMLoader,
+    PostgresCopyLoader,
+    create_loader,
+    to_copy_text,
+)
+from examples.models import Example
+from label_types.models import CategoryType, RelationType, SpanType
+from labels.models import Category, Relation, Span
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestToCopyText(unittest.TestCase):
+    def test_null(self):
+        self.assertEqual(to_copy_text(None), "\\N")
+
+    def test_bool(self):
+        self.assertEqual(to_copy_text(True), "t")
+        self.assertEqual(to_copy_text(False), "f")
+
+    def test_escape_special_characters(self):
+        self.assertEqual(to_copy_text("a\tb\nc\rd\\e"), "a\\tb\\nc\\rd\\\\e")
+
+    def test_number_and_uuid(self):
+        value = uuid.uuid4()
+        self.assertEqual(to_copy_text(value), str(value))
+        self.assertEqual(to_copy_text(1.5), "1.5")
+
+
+class TestCreateLoader(TestCase):
+    def test_orm_loader(self):
+        self.assertIsInstance(create_loader(ORM_LOADER), ORMLoader)
+
+    @unittest.skipIf(connection.vendor == "postgresql", "The database supports COPY.")
+    def test_copy_loader_falls_back_to_orm(self):
+        self.assertIsInstance(create_loader(COPY_LOADER), ORMLoader)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "The database doesn't support COPY.")
+    def test_copy_loader(self):
+        self.assertIsInstance(create_loader(COPY_LOADER), PostgresCopyLoader)
+
+
+class TestCopyStatements(TestCase):
+    """Checks the statements and the rows of the COPY loader, which are built without a PostgreSQL server."""
+
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING, use_relation=True)
+        self.user = self.project.admin
+        self.example = Example.objects.create(project=self.project.item, text="Alice knows Bob")
+        self.loader = PostgresCopyLoader()
+
+    def build(self, model, objs):
+        statements = self.loader.build_statements(model, objs, connection)
+        rows = [line.split("\t") for line in statements.payload.getvalue().splitlines()]
+        return statements, rows
+
+    def test_resolve_example_by_uuid(self):
+        label_type = CategoryType.objects.create(text="A", project=self.project.item)
+        categories = [Category(example=self.example, user=self.user, label=label_type) for _ in range(2)]
+        statements, rows = self.build(Category, categories)
+        self.assertEqual(
+            statements.setup[1],
+            'ALTER TABLE "import_staging_labels_category" ADD COLUMN import_seq integer, '
+            'ADD COLUMN "import_example_id_uuid" uuid',
+        )
+        self.assertTrue(statements.copy.startswith('COPY "import_staging_labels_category" (import_seq, '))
+        self.assertTrue(statements.copy.endswith(', "import_example_id_uuid") FROM STDIN'))
+        self.assertIn(
+            'LEFT JOIN "examples_example" "j_example_id" ON "j_example_id"."uuid" = s."import_example_id_uuid"',
+            statements.insert,
+        )
+        self.assertIn('COALESCE("j_example_id"."id", s."example_id")', statements.insert)
+        self.assertIn('s."label_id"', statements.insert)
+        self.assertTrue(statements.insert.endswith('ORDER BY s.import_seq RETURNING "id", "uuid"'))
+
+        columns = ["import_seq", *[field.column for field in Category._meta.concrete_fields[1:]]]
+        columns.append("import_example_id_uuid")
+        records = [dict(zip(columns, row)) for row in rows]
+        self.assertEqual([record["import_seq"] for record in records], ["0", "1"])
+        for record in records:
+            self.assertEqual(len(record), len(rows[0]))
+            self.assertEqual(record["example_id"], "\\N")
+            self.assertEqual(record["import_example_id_uuid"], str(self.example.uuid))
+            self.assertEqual(record["label_id"], str(label_type.pk))
+            self.assertEqual(record["user_id"], str(self.user.pk))
+
+    def test_resolve_spans_of_relation_by_uuid(self):
+        span_type = SpanType.objects.create(text="PERSON", project=self.project.item)
+        relation_type = RelationType.objects.create(text="knows", project=self.project.item)
+        alice = Span.objects.create(example=self.example, user=self.user, label=span_type, start_offset=0, end_offset=5)
+        bob = Span.objects.create(example=self.example, user=self.user, label=span_type, start_offset=12, end_offset=15)
+        relation = Relation(example=self.example, user=self.user, type=relation_type, from_id=alice, to_id=bob)
+        statements, rows = self.build(Relation, [relation])
+        for column in ["from_id_id", "to_id_id"]:
+            self.assertIn(f'LEFT JOIN "labels_span" "j_{column}"', statements.insert)
+        self.assertEqual(set(rows[0][-3:]), {str(self.example.uuid), str(alice.uuid), str(bob.uuid)})
+
+    def test_copy_id_if_related_object_is_not_loaded(self):
+        label_type = CategoryType.objects.create(text="A", project=self.project.item)
+        category = Category(example_id=self.example.pk, user=self.user, label=label_type)
+        _, rows = self.build(Category, [category])
+        self.assertIn(str(self.example.pk), rows[0])
+        self.assertEqual(rows[0][-1], "\\N")
+
+    def test_no_join_without_uuid_key(self):
+        statements, rows = self.build(Example, [Example(project=self.project.item, text="a\tb")])
+        self.assertNotIn("JOIN", statements.insert)
+        self.assertIn("a\\tb", rows[0])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "The database doesn't support COPY.")
+class TestPostgresCopyLoader(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.user = self.project.admin
+        self.label_type = CategoryType.objects.create(text="A", project=self.project.item)
+
+    def load(self, loader, text):
+        examples = [
+            Example(project=self.project.item, text=text, meta={"i": i}, upload_name="upload.jsonl") for i in range(3)
+        ]
+        examples = loader.load(Example, examples)
+        categories = [Category(example=example, user=self.user, label=self.label_type) for example in examples]
+        return examples, loader.load(Category, categories)
+
+    def assert_same_rows(self, expected, actual):
+        exclude = ["id", "uuid", "example", "created_at", "updated_at"]
+        for x, y in zip(expected, actual):
+            x = type(x).objects.get(pk=x.pk)
+            y = type(y).objects.get(pk=y.pk)
+            self.assertEqual(
+                {k: v for k, v in model_to_dict(x).items() if k not in exclude},
+                {k: v for k, v in model_to_dict(y).items() if k not in exclude},
+            )
+
+    def test_load_same_rows_as_orm(self):
+        text = "tab\tnewline\nbackslash\\ and unicode こんにちは"
+        orm_examples, orm_categories = self.load(ORMLoader(), text)
+        copy_examples, copy_categories = self.load(PostgresCopyLoader(), text)
+        self.assert_same_rows(orm_examples, copy_examples)
+        self.assert_same_rows(orm_categories, copy_categories)
+        for example, category in zip(copy_examples, copy_categories):
+            self.assertEqual(Example.objects.get(uuid=example.uuid).pk, example.pk)
+            self.assertEqual(Category.objects.get(uuid=category.uuid).example_id, example.pk)
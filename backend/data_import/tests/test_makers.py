@@ -1,6 +1,5 @@
 import uuid
 
-import pandas as pd
 from django.test import TestCase
 
 from data_import.pipeline.data import TextData
@@ -12,6 +11,7 @@ from data_import.pipeline.readers import (
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
 )
+from data_import.pipeline.records import RecordBatch
 from projects.tests.utils import prepare_project
 
 
@@ -31,30 +31,43 @@ class TestExamplesMaker(TestCase):
         self.maker = ExampleMaker(self.project.item, TextData, self.text_column, [self.label_column])
 
     def test_make_examples(self):
-        df = pd.DataFrame([self.record])
-        examples = self.maker.make(df)
+        batch = RecordBatch.from_records([self.record])
+        examples = self.maker.make(batch)
         self.assertEqual(len(examples), 1)
 
     def test_check_column_existence(self):
         self.record.pop(self.text_column)
-        df = pd.DataFrame([self.record])
-        examples = self.maker.make(df)
+        batch = RecordBatch.from_records([self.record])
+        examples = self.maker.make(batch)
         self.assertEqual(len(examples), 0)
         self.assertEqual(len(self.maker.errors), 1)
 
     def test_empty_text_raises_error(self):
         self.record[self.text_column] = ""
-        df = pd.DataFrame([self.record])
-        examples = self.maker.make(df)
+        batch = RecordBatch.from_records([self.record])
+        examples = self.maker.make(batch)
         self.assertEqual(len(examples), 0)
         self.assertEqual(len(self.maker.errors), 1)
 
+    def test_invalid_rows_are_reported_with_line_numbers(self):
+        records = [
+            {**self.record, LINE_NUMBER_COLUMN: 1, UUID_COLUMN: uuid.uuid4()},
+            {**self.record, LINE_NUMBER_COLUMN: 2, UUID_COLUMN: uuid.uuid4(), self.text_column: ""},
+            {**self.record, LINE_NUMBER_COLUMN: 3, UUID_COLUMN: uuid.uuid4(), self.text_column: 1},
+            {**self.record, LINE_NUMBER_COLUMN: 4, UUID_COLUMN: uuid.uuid4(), "meta": 1},
+        ]
+        examples = self.maker.make(RecordBatch.from_records(records))
+        self.assertEqual([example.uuid for example in examples], [records[0][UUID_COLUMN], records[3][UUID_COLUMN]])
+        self.assertEqual(examples[1].meta, {"meta": 1})
+        self.assertEqual([error.line_num for error in self.maker.errors], [2, 3])
+        self.assertEqual(self.maker.errors[0].message, "Invalid data in line 2")
+
 
 class TestLabelFormatter(TestCase):
     def setUp(self):
         self.label_column = "label"
         self.label_class = CategoryLabel
-        self.df = pd.DataFrame(
+        self.batch = RecordBatch.from_records(
             [
                 {LINE_NUMBER_COLUMN: 1, UUID_COLUMN: uuid.uuid4(), self.label_column: ["A"]},
                 {LINE_NUMBER_COLUMN: 2, UUID_COLUMN: uuid.uuid4(), self.label_column: ["B", "C"]},
@@ -63,7 +76,7 @@ class TestLabelFormatter(TestCase):
 
     def test_make(self):
         label_maker = LabelMaker(column=self.label_column, label_class=self.label_class)
-        labels = label_maker.make(self.df)
+        labels = label_maker.make(self.batch)
         self.assertEqual(len(labels), 3)
         with self.subTest():
             for label, expected in zip(labels, ["A", "B", "C"]):
@@ -72,11 +85,11 @@ class TestLabelFormatter(TestCase):
     def test_format_without_specified_column(self):
         label_maker = LabelMaker(column="invalid_column", label_class=self.label_class)
         with self.assertRaises(KeyError):
-            label_maker.make(self.df)
+            label_maker.make(self.batch)
 
     def test_format_with_partially_correct_column(self):
         label_maker = LabelMaker(column=self.label_column, label_class=self.label_class)
-        df = pd.DataFrame(
+        batch = RecordBatch.from_records(
             [
                 {LINE_NUMBER_COLUMN: 1, UUID_COLUMN: uuid.uuid4(), self.label_column: ["A"]},
                 {LINE_NUMBER_COLUMN: 2, UUID_COLUMN: uuid.uuid4(), "invalid_column": ["B"]},
@@ -84,5 +97,5 @@ class TestLabelFormatter(TestCase):
                 {LINE_NUMBER_COLUMN: 3, UUID_COLUMN: uuid.uuid4(), self.label_column: [{}]},
             ]
         )
-        labels = label_maker.make(df)
+        labels = label_maker.make(batch)
         self.assertEqual(len(labels), 1)
@@ -1,11 +1,20 @@
+import datetime
+import decimal
+import gzip
+import importlib.util
 import json
 import os
 import shutil
 import tempfile
 import unittest
+import zipfile
+from unittest.mock import patch
+
+import openpyxl
+from seqeval.scheme import BILOU, IOB2, IOBES, IOE2, Tokens
 
 from data_import.pipeline import parsers
-from data_import.pipeline.readers import LINE_NUMBER_COLUMN
+from data_import.pipeline.readers import LINE_NUMBER_COLUMN, FileName
 
 
 class TestParser(unittest.TestCase):
@@ -31,6 +40,58 @@ class TestParser(unittest.TestCase):
             next(it)
 
 
+class TestDetectEncoding(TestParser):
+    def create_binary_file(self, binary):
+        with open(self.test_file, "wb") as f:
+            f.write(binary)
+
+    def test_detect_utf8_without_chardet(self):
+        self.create_binary_file("こんにちは\n".encode("utf-8") * 10000)
+        with patch.object(parsers, "UniversalDetector") as detector:
+            self.assertEqual(parsers.detect_encoding(self.test_file), "utf-8")
+        detector.assert_not_called()
+
+    def test_detect_utf8_with_bom(self):
+        self.create_binary_file("こんにちは".encode("utf-8-sig"))
+        self.assertEqual(parsers.detect_encoding(self.test_file), "UTF-8-SIG")
+
+    def test_detect_utf16(self):
+        self.create_binary_file("hello\n".encode("utf-16"))
+        self.assertEqual(parsers.detect_encoding(self.test_file).upper(), "UTF-16")
+
+    def test_detect_non_utf8(self):
+        self.create_binary_file("こんにちは、世界。\n".encode("shift_jis") * 1000)
+        self.assertEqual(parsers.detect_encoding(self.test_file).upper(), "SHIFT_JIS")
+
+    def test_validate_utf8_only_in_sample(self):
+        self.create_binary_file("こんにちは\n".encode("utf-8") * 1000 + b"caf\xe9\n")
+        self.assertTrue(parsers.is_utf8(self.test_file, buffer_size=1024, sample_size=4096))
+        self.assertFalse(parsers.is_utf8(self.test_file, buffer_size=1024, sample_size=100000))
+
+    def test_allow_character_cut_off_at_sample_end(self):
+        # Each character has 3 bytes, so the sample ends in the middle of the second one.
+        self.create_binary_file("ここ".encode("utf-8"))
+        self.assertTrue(parsers.is_utf8(self.test_file, sample_size=4))
+        self.create_binary_file("ここ".encode("utf-8")[:4])
+        self.assertFalse(parsers.is_utf8(self.test_file, sample_size=4))
+
+    def test_chardet_reads_only_sample(self):
+        self.create_binary_file(b"caf\xe9\n" * 100000)
+        with patch.object(parsers.UniversalDetector, "feed", autospec=True) as feed:
+            parsers.detect_encoding(self.test_file, buffer_size=1024, sample_size=4096)
+        self.assertEqual(sum(len(call.args[1]) for call in feed.call_args_list), 4096)
+
+    def test_detection_is_cached_until_file_changes(self):
+        self.create_binary_file(b"caf\xe9\n")
+        with patch.object(parsers, "UniversalDetector", wraps=parsers.UniversalDetector) as detector:
+            parsers.detect_encoding(self.test_file)
+            parsers.detect_encoding(self.test_file)
+            self.assertEqual(detector.call_count, 1)
+            self.create_binary_file(b"caf\xe9\ncaf\xe9\n")
+            parsers.detect_encoding(self.test_file)
+            self.assertEqual(detector.call_count, 2)
+
+
 class TestPlainParser(TestParser):
     def test_read(self):
         content = "example"
@@ -54,6 +115,14 @@ class TestTextFileParser(TestParser):
         expected = [{"text": content}]
         self.assert_record(content, parser, expected)
 
+    def test_skip_too_long_file(self):
+        parser = parsers.TextFileParser(max_text_length=5)
+        self.assert_record("Hello", parser, [{"text": "Hello"}])
+        self.assertEqual(parser.errors, [])
+        self.assert_record("Hello!", parser, [])
+        self.assertEqual(len(parser.errors), 1)
+        self.assertEqual(parser.errors[0].line_num, -1)
+
 
 class TestCsvParser(TestParser):
     def test_read(self):
@@ -74,6 +143,38 @@ class TestCsvParser(TestParser):
         expected = [{"text": "Text", "label": None}]
         self.assert_record(content, parser, expected)
 
+    def assert_same_batches(self, content, batch_size=2, **kwargs):
+        self.create_file(content)
+        expected = list(parsers.CSVParser(**kwargs).parse(self.test_file))
+        batches = list(parsers.CSVParser(**kwargs).parse_batches(self.test_file, batch_size))
+        self.assertTrue(all(0 < len(batch) <= batch_size for batch in batches))
+        self.assertTrue(all(batch.nbytes > 0 for batch in batches))
+        self.assertEqual([record for batch in batches for record in batch.records()], expected)
+
+    def test_parse_batches(self):
+        self.assert_same_batches("label,text\nA,1\nB,2\nC,3\n")
+        self.assert_same_batches("label\ttext\nA\t1\nB\t2\n", delimiter="\t")
+
+    def test_parse_batches_with_short_and_long_rows(self):
+        self.assert_same_batches("text,label\nText\nA,B,C,D\nE,F\n", batch_size=3)
+
+    def test_parse_batches_with_duplicate_header(self):
+        self.assert_same_batches("a,b,a\n1,2\n1,2,3\n")
+
+    def test_parse_batches_skips_blank_lines(self):
+        self.assert_same_batches("label,text\n\n\nA,1\n\nB,2\n", batch_size=1)
+
+    def test_parse_batches_with_quoted_newline(self):
+        self.assert_same_batches('label,text\nA,"line1\nline2"\nB,2\n')
+
+    def test_parse_batches_of_empty_file(self):
+        self.assert_same_batches("")
+        self.assert_same_batches("label,text\n")
+
+    def test_parse_batches_from_middle_of_file(self):
+        content = "label,text\nA,1\nB,2\nC,3\n"
+        self.assert_same_batches(content, start=content.index("B"), line_offset=2)
+
 
 class TestJSONParser(TestParser):
     def test_read(self):
@@ -82,6 +183,46 @@ class TestJSONParser(TestParser):
         expected = json.loads(content)
         self.assert_record(content, parser, expected)
 
+    def test_read_line_number(self):
+        content = '[\n  {"text": "line1"},\n\n  {\n    "text": "line2"\n  }\n]\n'
+        self.create_file(content)
+        parser = parsers.JSONParser()
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual([row[LINE_NUMBER_COLUMN] for row in rows], [2, 4])
+        self.assertEqual(parser.errors, [])
+
+    def test_read_in_small_chunks(self):
+        content = json.dumps([{"text": "a" * 100, "labels": [1.5, None, True]}] * 10, indent=2)
+        self.create_file(content)
+        with open(self.test_file) as f:
+            rows = [row for _, row in parsers.JSONArrayReader(f, buffer_size=1)]
+        self.assertEqual(rows, json.loads(content))
+
+    def test_read_until_malformed_element(self):
+        content = '[\n{"text": "line1"},\n{"text": "line2",}\n]'
+        self.create_file(content)
+        parser = parsers.JSONParser()
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(parser.errors), 1)
+        self.assertEqual(parser.errors[0].line_num, 3)
+        self.assertIn("line 3 column 18", parser.errors[0].message)
+
+    def test_read_non_object_element(self):
+        content = '[{"text": "line1"},\n"line2"]'
+        self.create_file(content)
+        parser = parsers.JSONParser()
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(parser.errors[0].line_num, 2)
+
+    def test_read_non_array(self):
+        self.create_file('{"text": "line1"}\n{"text": "line2"}')
+        parser = parsers.JSONParser()
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(rows, [])
+        self.assertEqual(parser.errors[0].line_num, 1)
+
 
 class TestJSONLParser(TestParser):
     def test_read(self):
@@ -92,6 +233,210 @@ class TestJSONLParser(TestParser):
         expected = [json.loads(line1), json.loads(line2)]
         self.assert_record(content, parser, expected)
 
+    def parse_with(self, fast_decoder):
+        parser = parsers.JSONLParser(encoding="utf-8")
+        parser.fast_decoder = fast_decoder
+        rows = list(parser.parse(self.test_file))
+        return rows, [(error.line_num, error.message) for error in parser.errors]
+
+    def test_fast_path_is_same_as_standard_library(self):
+        lines = [
+            '{"text": "line1", "id": 18446744073709551616}',
+            '{"text": "line2", "score": NaN}',
+            '{"text": "line3",}',
+            "",
+            '{"text": "\u00e9\u3042", "labels": [1.5, null, true]}',
+        ]
+        with open(self.test_file, "wb") as f:
+            f.write("\r\n".join(lines).encode("utf-8"))
+        fast_decoder = parsers.FAST_JSON_DECODER or json.loads
+        self.assertEqual(self.parse_with(fast_decoder), self.parse_with(None))
+        rows, errors = self.parse_with(fast_decoder)
+        self.assertEqual([row[LINE_NUMBER_COLUMN] for row in rows], [1, 2, 5])
+        self.assertIsInstance(rows[0]["id"], int)
+        self.assertEqual([line_num for line_num, _ in errors], [3, 4])
+
+
+class TestLineReader(TestParser):
+    def assert_same_lines(self, binary, encoding="utf-8", start=0, end=None):
+        with open(self.test_file, "wb") as f:
+            f.write(binary)
+        reader = parsers.LineReader(self.test_file, encoding, start, end)
+        self.assertTrue(reader.is_binary_readable())
+        lines = [line.decode("utf-8").rstrip() for line in reader.binary_lines()]
+        self.assertEqual(lines, list(reader))
+
+    def test_binary_lines(self):
+        self.assert_same_lines(b"line1\nline2\n\nline4")
+
+    def test_binary_lines_with_carriage_return(self):
+        self.assert_same_lines(b"line1\r\nline2\rline3\r\r\nline5\r")
+
+    def test_binary_lines_with_bom(self):
+        self.assert_same_lines(b"\xef\xbb\xbfline1\nline2", encoding="utf-8-sig")
+        self.assert_same_lines(b"\xef\xbb\xbfline1\nline2", encoding="utf-8")
+
+    def test_binary_lines_in_range(self):
+        self.assert_same_lines(b"line1\nline2\nline3\nline4\n", start=6, end=18)
+
+    def test_binary_lines_in_small_chunks(self):
+        parsers.LineReader.chunk_size = 4
+        self.addCleanup(setattr, parsers.LineReader, "chunk_size", 1024 * 1024)
+        self.assert_same_lines(b"line1\nline2\r\nline3\n\nline4")
+        self.assert_same_lines(b"line1\rline2\r\nline3\n\nline4")
+
+    def test_binary_lines_of_compressed_file(self):
+        parsers.LineReader.chunk_size = 4
+        self.addCleanup(setattr, parsers.LineReader, "chunk_size", 1024 * 1024)
+        for binary in [b"line1\nline2\r\nline3\n\nline4", b"line1\rline2\r\nline3\r\r\nline5\r", b"\xef\xbb\xbfa\nb"]:
+            with gzip.open(self.test_file, "wb") as f:
+                f.write(binary)
+            reader = parsers.LineReader(self.test_file, "utf-8-sig")
+            lines = [line.decode("utf-8").rstrip() for line in reader.binary_lines()]
+            self.assertEqual(lines, list(reader))
+
+
+class TestCompressedFile(TestParser):
+    def create_file(self, content):
+        with gzip.open(self.test_file, "wt") as f:
+            f.write(content)
+
+    def test_jsonl(self):
+        content = '{"text": "line1"}\n{"text": "line2"}\n'
+        self.assert_record(content, parsers.JSONLParser(), [{"text": "line1"}, {"text": "line2"}])
+
+    def test_csv(self):
+        content = "text,label\nexample,positive\n"
+        self.assert_record(content, parsers.CSVParser(), [{"text": "example", "label": "positive"}])
+
+    def test_json(self):
+        content = '[{"text": "line1"}]'
+        self.assert_record(content, parsers.JSONParser(), [{"text": "line1"}])
+
+    def test_text_file(self):
+        self.assert_record("Hello\nWorld", parsers.TextFileParser(), [{"text": "Hello\nWorld"}])
+
+    def test_detect_encoding(self):
+        with gzip.open(self.test_file, "wb") as f:
+            f.write("こんにちは、世界".encode("shift_jis") * 100)
+        self.assertEqual(parsers.detect_encoding(self.test_file).lower(), "shift_jis")
+
+
+class TestExcelParser(TestParser):
+    def setUp(self):
+        super().setUp()
+        self.test_file = os.path.join(self.test_dir, "test_file.xlsx")
+
+    def create_workbook(self, *sheets):
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for title, rows in sheets:
+            sheet = workbook.create_sheet(title)
+            for row in rows:
+                sheet.append(row)
+        workbook.save(self.test_file)
+
+    def test_read(self):
+        self.create_workbook(("Sheet1", [["text", "label"], ["a", "x"], [None, None], ["b", None], [None, "y"]]))
+        rows = list(parsers.ExcelParser().parse(self.test_file))
+        expected = [
+            {LINE_NUMBER_COLUMN: 2, "text": "a", "label": "x"},
+            {LINE_NUMBER_COLUMN: 4, "text": "b", "label": ""},
+            {LINE_NUMBER_COLUMN: 5, "text": "", "label": "y"},
+        ]
+        self.assertEqual(rows, expected)
+
+    def test_read_only_first_sheet(self):
+        self.create_workbook(("Sheet1", [["text"], ["a"]]), ("Sheet2", [["text"], ["b"]]))
+        rows = list(parsers.ExcelParser().parse(self.test_file))
+        self.assertEqual(rows, [{LINE_NUMBER_COLUMN: 2, "text": "a"}])
+
+    def test_list_sheets(self):
+        self.create_workbook(("Sheet1", [["text"], ["a"], ["b"]]), ("Sheet2", [["text"], ["c"]]))
+        parser = parsers.ExcelParser(all_sheets=True)
+        filename = FileName(full_path=self.test_file, generated_name="generated", upload_name="data.xlsx")
+        sources = parser.list_sources(filename)
+        self.assertEqual([source.upload_name for source in sources], ["data.xlsx#Sheet1", "data.xlsx#Sheet2"])
+        self.assertEqual(sum(source.get_size() for source in sources), os.path.getsize(self.test_file))
+        records = [[row["text"] for row in parser.parse(source.full_path)] for source in sources]
+        self.assertEqual(records, [["a", "b"], ["c"]])
+
+    def test_list_sources_without_all_sheets(self):
+        self.create_workbook(("Sheet1", [["text"], ["a"]]), ("Sheet2", [["text"], ["b"]]))
+        filename = FileName(full_path=self.test_file, generated_name="generated", upload_name="data.xlsx")
+        self.assertEqual(parsers.ExcelParser().list_sources(filename), [filename])
+
+    def test_compressed_workbook(self):
+        self.create_workbook(("Sheet1", [["text"], ["a"]]))
+        with open(self.test_file, "rb") as f, gzip.open(self.test_file + ".gz", "wb") as gz:
+            gz.write(f.read())
+        rows = list(parsers.ExcelParser().parse(self.test_file + ".gz"))
+        self.assertEqual(rows, [{LINE_NUMBER_COLUMN: 2, "text": "a"}])
+
+    def test_broken_workbook(self):
+        with zipfile.ZipFile(self.test_file, "w") as zf:
+            zf.writestr("a.txt", "text")
+        parser = parsers.ExcelParser()
+        self.assertEqual(list(parser.parse(self.test_file)), [])
+        self.assertEqual(len(parser.errors), 1)
+
+    def test_split_sheet_path(self):
+        self.create_workbook(("Sheet1", [["text"]]))
+        self.assertEqual(parsers.split_sheet_path(self.test_file + "#1"), (self.test_file, 1))
+        self.assertEqual(parsers.split_sheet_path(self.test_file), (self.test_file, None))
+        self.assertEqual(parsers.split_sheet_path("a#b.xlsx"), ("a#b.xlsx", None))
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow isn't installed.")
+class TestColumnarParser(TestParser):
+    def create_table(self):
+        import pyarrow as pa
+
+        return pa.table(
+            {
+                "text": ["a", "b", "c", "d", "e"],
+                "label": [["x"], [], ["y"], ["x", "y"], None],
+                "date": [datetime.date(2024, 1, i) for i in range(1, 6)],
+                "score": [decimal.Decimal("1.5")] * 5,
+            }
+        )
+
+    def assert_rows(self, parser):
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(parser.errors, [])
+        self.assertEqual([row[LINE_NUMBER_COLUMN] for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual([row["text"] for row in rows], ["a", "b", "c", "d", "e"])
+        self.assertEqual(rows[3]["label"], ["x", "y"])
+        self.assertEqual(rows[0]["date"], "2024-01-01")
+        self.assertEqual(rows[0]["score"], "1.5")
+
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.create_table(), self.test_file, row_group_size=2)
+        self.assertEqual(pq.ParquetFile(self.test_file).num_row_groups, 3)
+        self.assert_rows(parsers.ParquetParser(batch_size=2))
+
+    def test_arrow_file(self):
+        import pyarrow.feather as feather
+
+        feather.write_feather(self.create_table(), self.test_file, chunksize=3)
+        self.assert_rows(parsers.ArrowParser(batch_size=2))
+
+    def test_arrow_stream(self):
+        import pyarrow as pa
+
+        table = self.create_table()
+        with pa.OSFile(self.test_file, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=4)
+        self.assert_rows(parsers.ArrowParser())
+
+    def test_invalid_file(self):
+        self.create_file("text,label")
+        parser = parsers.ParquetParser()
+        self.assertEqual(list(parser.parse(self.test_file)), [])
+        self.assertEqual(len(parser.errors), 1)
+
 
 class TestFastTextParser(TestParser):
     def test_read(self):
@@ -126,3 +471,53 @@ Blackburn\tI-PER
             {"text": "Peter Blackburn", "label": [(0, 15, "PER")]},
         ]
         self.assert_record(content, parser, expected)
+
+    def test_report_every_malformed_line(self):
+        content = "EU\tB-ORG\nrejects\nGerman\tB-MISC\n\nPeter\tB-PER\n\nEU\tB-ORG\nrejects O\nBritish\tX-MISC\n\n"
+        self.create_file(content)
+        parser = parsers.CoNLLParser()
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(rows, [{LINE_NUMBER_COLUMN: 5, "text": "Peter", "label": [(0, 5, "PER")]}])
+        self.assertEqual([error.line_num for error in parser.errors], [2, 8, 9])
+
+    def test_report_prefix_not_allowed_in_ioe2(self):
+        content = "Peter\tI-PER\nBlackburn\tE-PER\n\nEU\tB-ORG\n\n"
+        self.create_file(content)
+        parser = parsers.CoNLLParser(scheme="IOE2")
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(rows, [{LINE_NUMBER_COLUMN: 1, "text": "Peter Blackburn", "label": [(0, 15, "PER")]}])
+        self.assertEqual([error.line_num for error in parser.errors], [4])
+        self.assertIn("IOE2", parser.errors[0].message)
+
+    def test_report_prefix_not_allowed_in_bilou(self):
+        content = "Peter\tB-PER\nBlackburn\tL-PER\n\nEU\tE-ORG\nrejects\tO\n\n"
+        self.create_file(content)
+        parser = parsers.CoNLLParser(scheme="BILOU")
+        rows = list(parser.parse(self.test_file))
+        self.assertEqual(rows, [{LINE_NUMBER_COLUMN: 1, "text": "Peter Blackburn", "label": [(0, 15, "PER")]}])
+        self.assertEqual([error.line_num for error in parser.errors], [4])
+
+    def test_line_number_of_data(self):
+        content = "\n\nEU\tB-ORG\n\n\nPeter\tB-PER\nBlackburn\tI-PER"
+        self.create_file(content)
+        rows = list(parsers.CoNLLParser(line_offset=10).parse(self.test_file))
+        self.assertEqual([row[LINE_NUMBER_COLUMN] for row in rows], [13, 16])
+
+    def test_align_span_with_delimiter(self):
+        parser = parsers.CoNLLParser(delimiter="")
+        labels = parser.align_span(["東京", "都", "に", "住む"], ["B-LOC", "I-LOC", "O", "B-ACT"])
+        self.assertEqual(labels, [(0, 3, "LOC"), (4, 6, "ACT")])
+
+
+class TestFindEntities(unittest.TestCase):
+    def test_same_as_seqeval(self):
+        cases = [
+            (IOB2, ["B-PER", "I-PER", "O", "B-LOC", "I-ORG", "I-ORG", "B-LOC", "B-LOC"]),
+            (IOE2, ["I-PER", "E-PER", "E-LOC", "O", "I-ORG", "I-LOC", "E-LOC"]),
+            (IOBES, ["B-PER", "I-PER", "E-PER", "S-LOC", "B-ORG", "O", "I-ORG", "E-ORG", "S-LOC"]),
+            (BILOU, ["B-PER", "L-PER", "U-LOC", "B-ORG", "I-ORG", "O", "L-ORG", "U-LOC"]),
+        ]
+        for scheme, tags in cases:
+            with self.subTest(scheme=scheme.__name__):
+                expected = [(entity.start, entity.end, entity.tag) for entity in Tokens(tags, scheme).entities]
+                self.assertEqual(parsers.find_entities(tags, scheme), expected)
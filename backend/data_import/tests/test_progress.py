@@ -0,0 +1,34 @@
+import unittest
+
+from data_import.pipeline.progress import Progress
+
+
+class TestProgress(unittest.TestCase):
+    def test_measure(self):
+        progress = Progress.measure(elapsed=2.0, total_bytes=100, bytes_read=25, rows=10, examples=10)
+        self.assertEqual(progress.rows_per_sec, 5.0)
+        self.assertEqual(progress.eta, 6.0)
+        self.assertEqual(progress.examples, 10)
+
+    def test_eta_is_unknown_before_reading(self):
+        progress = Progress.measure(elapsed=0.0, total_bytes=100, bytes_read=0)
+        self.assertEqual(progress.rows_per_sec, 0.0)
+        self.assertIsNone(progress.eta)
+
+    def test_eta_is_zero_when_finished(self):
+        progress = Progress.measure(elapsed=1.0, total_bytes=100, bytes_read=100, rows=3)
+        self.assertEqual(progress.eta, 0.0)
+
+    def test_merge(self):
+        progress = Progress(eta=0.0)
+        progress.merge(Progress(total_bytes=10, bytes_read=5, rows=2, labels=1, rows_per_sec=1.0, eta=3.0))
+        progress.merge(Progress(total_bytes=20, bytes_read=20, rows=4, errors=1, rows_per_sec=2.0, eta=0.0))
+        expected = Progress(
+            total_bytes=30, bytes_read=25, rows=6, examples=0, labels=1, errors=1, rows_per_sec=3.0, eta=3.0
+        )
+        self.assertEqual(progress, expected)
+
+    def test_merge_unknown_eta(self):
+        progress = Progress(eta=0.0)
+        progress.merge(Progress())
+        self.assertIsNone(progress.eta)
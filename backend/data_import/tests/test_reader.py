@@ -1,24 +1,40 @@
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
-import pandas as pd
-from pandas.testing import assert_frame_equal
+import billiard
 
+from data_import.pipeline.parsers import CSVParser, JSONLParser
 from data_import.pipeline.readers import (
+    DEFAULT_TEXT_COLUMN,
     FILE_NAME_COLUMN,
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
+    FileName,
+    ParallelReader,
     Reader,
+    parse_chunks,
 )
+from data_import.pipeline.records import RecordBatch
+
+
+def read_in_parallel(filenames):
+    reader = ParallelReader(filenames, JSONLParser(), max_workers=2)
+    assert reader.is_parallel()
+    return [record[DEFAULT_TEXT_COLUMN] for record in reader]
 
 
 class TestReader(unittest.TestCase):
     def setUp(self):
         self.parser = MagicMock()
+        self.parser.vectorized = False
         self.parser.parse.return_value = [{"a": 1}, {"a": 2}]
         filename = MagicMock()
         filename.generated_name = "filename"
         filename.upload_name = "upload_name"
+        filename.get_size.return_value = 100
         self.filenames = MagicMock()
         self.filenames.__iter__.return_value = [filename]
         self.rows = [
@@ -47,5 +63,163 @@ class TestReader(unittest.TestCase):
         mock.return_value = "uuid"
         reader = Reader(self.filenames, self.parser)
         batch = next(reader.batch(2))
-        expected_df = pd.DataFrame(self.rows)
-        assert_frame_equal(batch, expected_df)
+        expected = RecordBatch.from_records(self.rows)
+        self.assertEqual(batch.columns, expected.columns)
+        self.assertEqual(list(batch.records()), self.rows)
+
+    @patch("data_import.pipeline.readers.uuid.uuid4")
+    def test_batch_with_skip(self, mock):
+        mock.return_value = "uuid"
+        reader = Reader(self.filenames, self.parser)
+        batches = list(reader.batch(2, skip=1))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(list(batches[0].records()), self.rows[1:])
+
+    def test_batch_with_max_bytes(self):
+        reader = Reader(self.filenames, self.parser)
+        batches = list(reader.batch(100, max_bytes=1))
+        self.assertEqual([len(batch) for batch in batches], [1] * len(self.rows))
+        self.assertTrue(all(batch.nbytes > 0 for batch in batches))
+        batches = list(reader.batch(100, max_bytes=1024 * 1024))
+        self.assertEqual([len(batch) for batch in batches], [len(self.rows)])
+
+    def test_bytes_read(self):
+        reader = Reader(self.filenames, self.parser)
+        self.assertEqual(reader.total_bytes, 100)
+        records = iter(reader)
+        next(records)
+        self.assertGreater(reader.bytes_read, 0)
+        self.assertLess(reader.bytes_read, 100)
+        list(records)
+        self.assertEqual(reader.bytes_read, 100)
+
+
+class TestVectorizedReader(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.filenames = []
+        for i in range(2):
+            full_path = os.path.join(self.test_dir, f"{i}.csv")
+            with open(full_path, "w") as f:
+                f.write("text,label\n")
+                for j in range(5):
+                    f.write(f"file{i}-{j},label{j}\n")
+            self.filenames.append(FileName(full_path=full_path, generated_name=f"{i}.csv", upload_name=f"{i}"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read(self, vectorized, batch_size, skip=0, max_bytes=0):
+        parser = CSVParser()
+        parser.vectorized = vectorized
+        reader = Reader(self.filenames, parser)
+        self.assertEqual(reader.vectorized, vectorized)
+        batches = list(reader.batch(batch_size, skip=skip, max_bytes=max_bytes))
+        self.assertEqual(reader.bytes_read, reader.total_bytes)
+        return [[{k: v for k, v in record.items() if k != UUID_COLUMN} for record in b.records()] for b in batches]
+
+    def test_same_records_as_rows(self):
+        batches = self.read(True, batch_size=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 2, 3, 2])
+        records = [record for batch in batches for record in batch]
+        self.assertEqual(records, [record for batch in self.read(False, batch_size=3) for record in batch])
+
+    def test_batch_with_skip(self):
+        for skip in [2, 5, 7, 10, 11]:
+            with self.subTest(skip=skip):
+                batches = self.read(True, batch_size=3, skip=skip)
+                records = [record for batch in batches for record in batch]
+                expected = [record for batch in self.read(False, batch_size=3, skip=skip) for record in batch]
+                self.assertEqual(records, expected)
+
+    def test_batch_with_max_bytes(self):
+        batches = self.read(True, batch_size=100, max_bytes=1)
+        self.assertEqual([len(batch) for batch in batches], [1] * 10)
+
+    def test_parallel_reader_is_not_vectorized(self):
+        self.assertFalse(ParallelReader(self.filenames, CSVParser(), max_workers=2).vectorized)
+        self.assertTrue(ParallelReader(self.filenames, CSVParser(), max_workers=1).vectorized)
+        self.assertTrue(ParallelReader(self.filenames[:1], CSVParser(), max_workers=2).vectorized)
+
+
+class TestParallelReader(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.filenames = []
+        for i in range(3):
+            full_path = os.path.join(self.test_dir, f"{i}.jsonl")
+            with open(full_path, "w") as f:
+                f.write(f'{{"text": "file{i}-1"}}\n')
+                f.write("broken\n")
+                f.write(f'{{"text": "file{i}-2"}}\n')
+            self.filenames.append(FileName(full_path=full_path, generated_name=f"{i}.jsonl", upload_name=f"{i}"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    @staticmethod
+    def read(reader):
+        records = [{k: v for k, v in record.items() if k != UUID_COLUMN} for record in reader]
+        errors = [error.dict() for error in reader.errors]
+        return records, errors
+
+    def test_keeps_records_and_errors_in_file_order(self):
+        expected = self.read(Reader(self.filenames, JSONLParser()))
+        actual = self.read(ParallelReader(self.filenames, JSONLParser(), max_workers=2))
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(actual[0]), 6)
+        self.assertEqual(len(actual[1]), 3)
+
+    def test_skip_drops_errors_of_skipped_records(self):
+        reader = Reader(self.filenames, JSONLParser())
+        batches = list(reader.batch(10, skip=3))
+        self.assertEqual(sum(len(batch) for batch in batches), 3)
+        self.assertEqual([error.line_num for error in reader.errors], [2, 2])
+
+    def test_skip_drops_same_errors_as_sequential_reading(self):
+        for skip in [1, 2, 4]:
+            with self.subTest(skip=skip):
+                sequential = Reader(self.filenames, JSONLParser())
+                parallel = ParallelReader(self.filenames, JSONLParser(), max_workers=2)
+                self.assertEqual(
+                    sum(len(batch) for batch in parallel.batch(10, skip=skip)),
+                    sum(len(batch) for batch in sequential.batch(10, skip=skip)),
+                )
+                self.assertEqual(
+                    [error.dict() for error in parallel.errors], [error.dict() for error in sequential.errors]
+                )
+
+    def test_read_in_daemonic_process(self):
+        # The Celery prefork pool runs the imports in the daemonic processes forked by billiard.
+        with billiard.get_context("fork").Pool(1) as pool:
+            self.assertTrue(pool._pool[0].daemon)
+            records = pool.apply(read_in_parallel, (self.filenames,))
+        self.assertEqual(records, [record[DEFAULT_TEXT_COLUMN] for record in Reader(self.filenames, JSONLParser())])
+
+    def test_parse_chunks(self):
+        chunks = list(parse_chunks(JSONLParser(), self.filenames[0], chunk_size=1))
+        self.assertEqual(
+            [[record[DEFAULT_TEXT_COLUMN] for record in records] for records, _ in chunks], [["file0-1"], ["file0-2"]]
+        )
+        self.assertEqual([[(i, error.line_num) for i, error in errors] for _, errors in chunks], [[], [(0, 2)]])
+
+    def test_keeps_order_with_small_chunks(self):
+        expected = self.read(Reader(self.filenames, JSONLParser()))
+        actual = self.read(ParallelReader(self.filenames, JSONLParser(), max_workers=2, chunk_size=1))
+        self.assertEqual(actual, expected)
+
+    def test_raises_error_of_worker(self):
+        missing = FileName(full_path=os.path.join(self.test_dir, "missing"), generated_name="missing", upload_name="m")
+        reader = ParallelReader([*self.filenames, missing], JSONLParser(), max_workers=2)
+        with self.assertRaises(FileNotFoundError):
+            list(reader)
+
+    def test_counts_bytes_read(self):
+        reader = ParallelReader(self.filenames, JSONLParser(), max_workers=2)
+        list(reader)
+        self.assertEqual(reader.bytes_read, sum(os.path.getsize(filename.full_path) for filename in self.filenames))
+
+    def test_falls_back_to_sequential_reading(self):
+        expected = self.read(Reader(self.filenames, JSONLParser()))
+        actual = self.read(ParallelReader(self.filenames, JSONLParser(), max_workers=1))
+        self.assertEqual(actual, expected)
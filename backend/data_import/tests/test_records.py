@@ -0,0 +1,99 @@
+import unittest
+import uuid
+
+from data_import.pipeline.records import (
+    MISSING,
+    BatchStats,
+    RecordBatch,
+    estimate_size,
+    explode,
+    is_null,
+    is_uuid4,
+)
+
+
+class TestRecordBatch(unittest.TestCase):
+    def setUp(self):
+        self.records = [{"text": "a", "label": ["A"]}, {"text": "b", "meta": 1}, {"text": None}]
+        self.batch = RecordBatch.from_records(self.records)
+
+    def test_columns(self):
+        self.assertEqual(len(self.batch), 3)
+        self.assertIn("meta", self.batch)
+        self.assertNotIn("invalid_column", self.batch)
+        self.assertEqual(self.batch["text"], ["a", "b", None])
+        self.assertEqual(self.batch["meta"], [MISSING, 1, MISSING])
+
+    def test_get_column_with_default(self):
+        self.assertEqual(self.batch.get("invalid_column", 0), [0, 0, 0])
+
+    def test_records_skip_missing_values(self):
+        self.assertEqual(list(self.batch.records()), self.records)
+
+    def test_records_without_columns(self):
+        records = list(self.batch.records(exclude_columns=["label", "meta"]))
+        self.assertEqual(records, [{"text": "a"}, {"text": "b"}, {"text": None}])
+
+    def test_raises_key_error_with_unknown_column(self):
+        with self.assertRaises(KeyError):
+            self.batch["invalid_column"]
+
+    def test_slice(self):
+        batch = RecordBatch.from_records(self.records, nbytes=30).slice(1, 3)
+        self.assertEqual(list(batch.records()), self.records[1:])
+        self.assertEqual(batch.nbytes, 20)
+
+    def test_split(self):
+        batch = RecordBatch.from_records(self.records, nbytes=30)
+        self.assertEqual([len(b) for b in batch.split(20)], [2, 1])
+        self.assertEqual([len(b) for b in batch.split(1)], [1, 1, 1])
+        self.assertEqual([len(b) for b in batch.split(0)], [3])
+        records = [record for b in batch.split(10) for record in b.records()]
+        self.assertEqual(records, self.records)
+
+
+class TestFunctions(unittest.TestCase):
+    def test_is_null(self):
+        for value in [None, MISSING, float("nan")]:
+            self.assertTrue(is_null(value))
+        for value in ["", 0, [], {}]:
+            self.assertFalse(is_null(value))
+
+    def test_explode(self):
+        self.assertEqual(explode(["A", "B"]), ["A", "B"])
+        self.assertEqual(explode((0, 1, "A")), [0, 1, "A"])
+        self.assertEqual(explode("A"), ["A"])
+        self.assertEqual(explode({"label": "A"}), [{"label": "A"}])
+        self.assertEqual(explode([]), [])
+
+
+class TestIsUUID4(unittest.TestCase):
+    def test_is_uuid4(self):
+        self.assertTrue(is_uuid4(uuid.uuid4()))
+        self.assertFalse(is_uuid4(uuid.uuid1()))
+        self.assertFalse(is_uuid4(str(uuid.uuid4())))
+
+
+class TestEstimateSize(unittest.TestCase):
+    def test_string(self):
+        self.assertEqual(estimate_size("abc"), 3)
+
+    def test_nested_values(self):
+        self.assertEqual(estimate_size({"text": "abc", "label": ["A", [0, 1, "B"]]}), 4 + 3 + 5 + 1 + 8 + 8 + 1)
+
+
+class TestBatchStats(unittest.TestCase):
+    def test_add(self):
+        stats = BatchStats()
+        stats.add(RecordBatch.from_records([{"text": "a"}] * 3, nbytes=30))
+        stats.add(RecordBatch.from_records([{"text": "a"}], nbytes=10))
+        expected = {"count": 2, "min_rows": 1, "max_rows": 3, "total_rows": 4, "max_bytes": 30}
+        self.assertEqual(stats.dict(), expected)
+
+    def test_merge(self):
+        stats = BatchStats()
+        stats.merge(BatchStats())
+        stats.merge(BatchStats(count=2, min_rows=2, max_rows=5, total_rows=7, max_bytes=50))
+        stats.merge(BatchStats(count=1, min_rows=1, max_rows=1, total_rows=1, max_bytes=10))
+        expected = {"count": 3, "min_rows": 1, "max_rows": 5, "total_rows": 8, "max_bytes": 50}
+        self.assertEqual(stats.dict(), expected)
@@ -0,0 +1,106 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_import.pipeline.catalog import CSV, JSONL, CoNLL
+from data_import.pipeline.parsers import CoNLLParser, JSONLParser
+from data_import.pipeline.readers import FileName
+from data_import.pipeline.shards import (
+    Shard,
+    count_lines,
+    is_shardable,
+    split_file,
+    split_files,
+)
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "test_file")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, content, encoding="utf-8"):
+        with open(self.test_file, "w", encoding=encoding) as f:
+            f.write(content)
+
+    def parse_shards(self, parser_class, shard_size, by_blank_line=False, **kwargs):
+        records = []
+        errors = []
+        for start, end, line_offset in split_file(self.test_file, shard_size, by_blank_line):
+            parser = parser_class(start=start, end=end, line_offset=line_offset, **kwargs)
+            records.extend(parser.parse(self.test_file))
+            errors.extend(error.dict() for error in parser.errors)
+        return records, errors
+
+    def parse_file(self, parser_class, **kwargs):
+        parser = parser_class(**kwargs)
+        records = list(parser.parse(self.test_file))
+        return records, [error.dict() for error in parser.errors]
+
+    def test_split_file_at_line_breaks(self):
+        self.create_file("a\nbb\nccc\n")
+        shards = list(split_file(self.test_file, shard_size=3))
+        self.assertEqual(shards, [(0, 5, 0), (5, 9, 2)])
+
+    def test_split_file_at_blank_lines(self):
+        self.create_file("a\nb\n\nc\n\nd\n")
+        shards = list(split_file(self.test_file, shard_size=1, by_blank_line=True))
+        self.assertEqual(shards, [(0, 5, 0), (5, 8, 3), (8, 10, 5)])
+
+    def test_jsonl_shards_are_identical_to_file(self):
+        self.create_file('{"text": "あ"}\n{"text": "b"}\nbroken\n\n{"text": "c"}\n')
+        expected = self.parse_file(JSONLParser, encoding="utf_8")
+        for shard_size in [1, 10, 20, 100]:
+            actual = self.parse_shards(JSONLParser, shard_size, encoding="utf_8")
+            self.assertEqual(actual, expected)
+
+    def test_count_lines_like_parsers(self):
+        self.create_file("a\rb\r\nc\nd")
+        self.assertEqual(count_lines(self.test_file, 0, 9), 3)
+        self.assertEqual(count_lines(self.test_file, 0, 9, buffer_size=4), 3)
+
+    def test_jsonl_shards_with_lone_cr_are_identical_to_file(self):
+        self.create_file('{"text": "a"}\rbroken\n{"text": "b"}\r\nbroken\n')
+        expected = self.parse_file(JSONLParser, encoding="utf_8")
+        for shard_size in [1, 20, 100]:
+            actual = self.parse_shards(JSONLParser, shard_size, encoding="utf_8")
+            self.assertEqual(actual, expected)
+
+    def test_csv_is_not_shardable(self):
+        self.assertFalse(is_shardable(CSV()))
+
+    def test_conll_shards_are_identical_to_file(self):
+        self.create_file("EU\tB-ORG\nrejects\tO\n\nPeter\tB-PER\nBlackburn\tI-PER\n\nJapan\tB-LOC\n")
+        expected = self.parse_file(CoNLLParser, encoding="utf_8")
+        for shard_size in [1, 20, 100]:
+            actual = self.parse_shards(CoNLLParser, shard_size, by_blank_line=True, encoding="utf_8")
+            self.assertEqual(actual, expected)
+
+    def test_split_files(self):
+        self.create_file("a\nb\n")
+        filename = FileName(full_path=self.test_file, generated_name="test_file", upload_name="test_file")
+        shards = split_files([filename], JSONL(), shard_size=1, encoding="utf_8")
+        self.assertEqual(len(shards), 2)
+        self.assertEqual(Shard.parse(shards[1].dict()), shards[1])
+        self.assertEqual([shard.filename.get_size() for shard in shards], [2, 2])
+
+    def test_does_not_split_compressed_file(self):
+        with gzip.open(self.test_file, "wt") as f:
+            f.write('{"text": "a"}\n{"text": "b"}\n')
+        filename = FileName(full_path=self.test_file, generated_name="test_file", upload_name="test_file.jsonl.gz")
+        shards = split_files([filename], JSONL(), shard_size=1, encoding="utf_8")
+        self.assertEqual(len(shards), 1)
+        self.assertEqual(shards[0].filename, filename)
+        records = list(JSONLParser(**shards[0].parser_kwargs).parse(self.test_file))
+        self.assertEqual([record["text"] for record in records], ["a", "b"])
+
+    def test_does_not_split_utf16_file(self):
+        self.create_file("a\n\nb\n", encoding="utf_16")
+        filename = FileName(full_path=self.test_file, generated_name="test_file", upload_name="test_file")
+        shards = split_files([filename], CoNLL(), shard_size=1, encoding="utf_16")
+        self.assertEqual(len(shards), 1)
@@ -0,0 +1,123 @@
+import datetime
+
+from celery import states
+from django.test import TestCase
+from model_mommy import mommy
+
+from data_import.celery_tasks import import_dataset
+from data_import.models import ImportStaging
+from data_import.pipeline.examples import content_hash
+from data_import.pipeline.staging import StagingProject
+from examples.models import Example
+from label_types.models import RelationType, SpanType
+from labels.models import Relation, Span
+from projects.models import Member, Project, ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestStagingProject(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING, use_relation=True)
+        self.user = self.project.admin
+        self.staging = StagingProject.create(self.project.item)
+
+    def make_labels(self, project, span_type="PERSON"):
+        example = mommy.make("Example", project=project, text="Alice knows Bob")
+        span_type, _ = SpanType.objects.get_or_create(project=project, text=span_type)
+        relation_type, _ = RelationType.objects.get_or_create(project=project, text="knows")
+        alice = mommy.make(Span, example=example, user=self.user, label=span_type, start_offset=0, end_offset=5)
+        bob = mommy.make(Span, example=example, user=self.user, label=span_type, start_offset=12, end_offset=15)
+        mommy.make(Relation, example=example, user=self.user, type=relation_type, from_id=alice, to_id=bob)
+        return example
+
+    def test_create_hidden_copy(self):
+        staging = self.staging.staging
+        self.assertNotEqual(staging.pk, self.project.item.pk)
+        self.assertEqual(type(staging), type(self.project.item))
+        self.assertTrue(staging.use_relation)
+        self.assertFalse(Member.objects.filter(project=staging).exists())
+
+    def test_publish_moves_examples_and_types(self):
+        self.make_labels(self.project.item)
+        example = self.make_labels(self.staging.staging, span_type="ORG")
+        self.staging.publish()
+        self.assertFalse(Project.objects.filter(pk=self.staging.staging.pk).exists())
+        self.assertEqual(Example.objects.get(pk=example.pk).project_id, self.project.item.id)
+        span_types = SpanType.objects.filter(project=self.project.item).values_list("text", flat=True)
+        self.assertEqual(sorted(span_types), ["ORG", "PERSON"])
+        relation_type = RelationType.objects.get(project=self.project.item)
+        self.assertEqual(Relation.objects.filter(type=relation_type).count(), 2)
+
+    def test_publish_merges_types_with_same_name(self):
+        self.make_labels(self.project.item)
+        example = self.make_labels(self.staging.staging)
+        self.staging.publish()
+        span_type = SpanType.objects.get(project=self.project.item)
+        self.assertEqual(list(example.spans.values_list("label", flat=True)), [span_type.pk, span_type.pk])
+        self.assertFalse(SpanType.objects.exclude(project=self.project.item).exists())
+
+    def test_publish_drops_duplicates(self):
+        mommy.make("Example", project=self.project.item, content_hash="a")
+        mommy.make("Example", project=self.staging.staging, content_hash="a")
+        mommy.make("Example", project=self.staging.staging, content_hash="b")
+        self.assertEqual(self.staging.publish(drop_duplicates=True), 1)
+        hashes = Example.objects.filter(project=self.project.item).values_list("content_hash", flat=True)
+        self.assertEqual(sorted(hashes), ["a", "b"])
+
+    def test_publish_drops_duplicates_of_examples_without_content_hash(self):
+        mommy.make("Example", project=self.project.item, text="a", content_hash=None)
+        mommy.make("Example", project=self.staging.staging, text="a", content_hash=content_hash("a"))
+        self.assertEqual(self.staging.publish(drop_duplicates=True), 1)
+        self.assertEqual(Example.objects.filter(project=self.project.item).count(), 1)
+
+    def test_publish_drops_duplicates_by_meta_columns(self):
+        mommy.make("Example", project=self.project.item, content_hash="a", meta={"x": 1})
+        mommy.make("Example", project=self.staging.staging, content_hash="a", meta={"x": 1})
+        mommy.make("Example", project=self.staging.staging, content_hash="a", meta={"x": 2})
+        self.assertEqual(self.staging.publish(drop_duplicates=True, columns=["x"]), 1)
+        metas = Example.objects.filter(project=self.project.item).values_list("meta", flat=True)
+        self.assertEqual(sorted(meta["x"] for meta in metas), [1, 2])
+
+    def test_discard(self):
+        self.make_labels(self.project.item)
+        self.make_labels(self.staging.staging)
+        self.staging.discard()
+        self.assertFalse(Project.objects.filter(pk=self.staging.staging.pk).exists())
+        self.assertEqual(Example.objects.count(), 1)
+        self.assertEqual(Span.objects.count(), 2)
+        self.assertEqual(Relation.objects.count(), 1)
+        self.assertEqual(SpanType.objects.count(), 1)
+        self.assertFalse(ImportStaging.objects.exists())
+
+
+class TestDiscardOrphans(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        self.timeout = 60
+
+    def assert_discarded(self, staging, discarded):
+        self.assertEqual(StagingProject.discard_orphans(self.timeout), int(discarded))
+        self.assertEqual(Project.objects.filter(pk=staging.staging.pk).exists(), not discarded)
+
+    def test_keep_running_import(self):
+        staging = StagingProject.create(self.project.item, task_id="running")
+        mommy.make("Example", project=staging.staging)
+        self.assert_discarded(staging, False)
+
+    def test_discard_finished_task(self):
+        staging = StagingProject.create(self.project.item, task_id="failed")
+        mommy.make("Example", project=staging.staging)
+        import_dataset.backend.store_result("failed", ValueError("killed"), states.FAILURE)
+        self.assert_discarded(staging, True)
+        self.assertFalse(Example.objects.exists())
+
+    def test_discard_expired(self):
+        staging = StagingProject.create(self.project.item)
+        expired_at = ImportStaging.objects.get().created_at - datetime.timedelta(seconds=self.timeout + 1)
+        ImportStaging.objects.update(created_at=expired_at)
+        self.assert_discarded(staging, True)
+
+    def test_discard_when_project_is_deleted(self):
+        staging = StagingProject.create(self.project.item)
+        self.project.item.delete()
+        self.assert_discarded(staging, True)
@@ -1,18 +1,30 @@
+import gzip
+import importlib.util
+import json
 import os
 import pathlib
 import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
 
 from django.core.files import File
+from django.db import OperationalError
 from django.test import TestCase, override_settings
 from django_drf_filepond.models import StoredUpload, TemporaryUpload
 from django_drf_filepond.utils import _get_file_id
 
-from data_import.celery_tasks import import_dataset
+from data_import.celery_tasks import PROGRESS, import_dataset
+from data_import.datasets import TextClassificationDataset
+from data_import.models import ImportCheckpoint
 from data_import.pipeline.catalog import RELATION_EXTRACTION
-from examples.models import Example
-from label_types.models import SpanType
+from data_import.pipeline.exceptions import MaximumDecompressedSizeException
+from data_import.pipeline.readers import DEFAULT_TEXT_COLUMN
+from examples.models import Example, MediaFile
+from label_types.models import CategoryType, SpanType
 from labels.models import Category, Span
-from projects.models import ProjectType
+from projects.models import Project, ProjectType
 from projects.tests.utils import prepare_project
 
 
@@ -26,6 +38,11 @@ class TestImportData(TestCase):
         self.user = self.project.admin
         self.data_path = pathlib.Path(__file__).parent / "data"
         self.upload_id = _get_file_id()
+        self.error_report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.error_report_dir)
+        error_report_settings = override_settings(IMPORT_ERROR_REPORT_DIR=self.error_report_dir)
+        error_report_settings.enable()
+        self.addCleanup(error_report_settings.disable)
 
     def tearDown(self):
         try:
@@ -125,6 +142,30 @@ class TestImportClassificationData(TestImportData):
         self.import_dataset(filename, file_format, self.task)
         self.assert_examples(dataset)
 
+    def test_excel_with_all_sheets(self):
+        filename = "text_classification/example_sheets.xlsx"
+        file_format = "Excel"
+        dataset = [("exampleA", ["positive"]), ("exampleB", ["positive"]), ("exampleC", ["negative"])]
+        self.import_dataset(filename, file_format, self.task, {"all_sheets": True})
+        self.assert_examples(dataset)
+        upload_names = Example.objects.order_by("upload_name").values_list("upload_name", flat=True).distinct()
+        self.assertEqual(list(upload_names), [f"{filename}#negative", f"{filename}#positive"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow isn't installed.")
+    def test_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        filename = os.path.join(temp_dir, "example.parquet")
+        table = pa.table({"text": ["exampleA", "exampleB"], "labels": [["positive"], []], "source": ["a", "b"]})
+        pq.write_table(table, filename)
+        dataset = [("exampleA", ["positive"]), ("exampleB", [])]
+        self.import_dataset(filename, "Parquet", self.task, {"column_label": "labels"})
+        self.assert_examples(dataset)
+        self.assertEqual(Example.objects.get(text="exampleA").meta, {"source": "a"})
+
     def test_json(self):
         filename = "text_classification/example.json"
         file_format = "JSON"
@@ -173,6 +214,162 @@ class TestImportClassificationData(TestImportData):
         self.assert_parse_error(response)
 
 
+@override_settings(IMPORT_SHARD_SIZE=32)
+class TestShardedImport(TestImportClassificationData):
+    def import_dataset(self, filename, file_format, task, kwargs=None):
+        file_path = str(self.data_path / filename)
+        TemporaryUpload.objects.create(
+            upload_id=self.upload_id,
+            file_id="1",
+            file=File(open(file_path, mode="rb"), filename.split("/")[-1]),
+            upload_name=filename,
+            upload_type="F",
+        )
+        args = (self.user.id, self.project.item.id, file_format, [self.upload_id], task)
+        return import_dataset.apply(args=args, kwargs=kwargs or {}).get()
+
+    def test_jsonl_with_shards(self):
+        filename = "text_classification/example.jsonl"
+        file_format = "JSONL"
+        kwargs = {"column_label": "labels"}
+        dataset = [("exampleA", ["positive"]), ("exampleB", ["positive", "negative"]), ("exampleC", [])]
+        response = self.import_dataset(filename, file_format, self.task, kwargs)
+        self.assert_examples(dataset)
+        self.assertEqual(response["count"], 3)
+        self.assertEqual(response["batches"]["total_rows"], 3)
+        self.assertEqual(response["progress"]["rows"], 3)
+        self.assertEqual(response["progress"]["examples"], 3)
+        self.assertEqual(response["progress"]["labels"], 3)
+        self.assertEqual(response["progress"]["bytes_read"], os.path.getsize(self.data_path / filename))
+        self.assertEqual(response["progress"]["eta"], 0.0)
+
+
+@override_settings(IMPORT_BATCH_SIZE=1)
+class TestResumableImport(TestImportData):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+    task_id = "import-task"
+    kwargs = {"column_label": "labels"}
+
+    def import_dataset(self, filename, file_format, task, kwargs=None):
+        file_path = str(self.data_path / filename)
+        TemporaryUpload.objects.create(
+            upload_id=self.upload_id,
+            file_id="1",
+            file=File(open(file_path, mode="rb"), filename.split("/")[-1]),
+            upload_name=filename,
+            upload_type="F",
+        )
+        args = (self.user.id, self.project.item.id, file_format, [self.upload_id], task)
+        return import_dataset.apply(args=args, kwargs=kwargs or {}, task_id=self.task_id).get()
+
+    def test_retry_resumes_from_checkpoint(self):
+        save_batch = TextClassificationDataset.save_batch
+        texts = []
+
+        def fail_at_second_batch(dataset, user, records):
+            texts.extend(records[DEFAULT_TEXT_COLUMN])
+            examples = save_batch(dataset, user, records)
+            if len(texts) == 2:
+                raise OperationalError("connection lost")
+            return examples
+
+        with patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=fail_at_second_batch):
+            response = self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        self.assertEqual(response["error"], [])
+        self.assertEqual(texts, ["exampleA", "exampleB", "exampleB", "exampleC"])
+        self.assertEqual(sorted(Example.objects.values_list("text", flat=True)), ["exampleA", "exampleB", "exampleC"])
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_file_error_while_saving_leaves_no_checkpoint_and_report(self):
+        save_batch = TextClassificationDataset.save_batch
+
+        def fail_at_second_batch(dataset, user, records):
+            if records[DEFAULT_TEXT_COLUMN] == ["exampleB"]:
+                raise MaximumDecompressedSizeException("example.jsonl", 1024)
+            return save_batch(dataset, user, records)
+
+        with patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=fail_at_second_batch):
+            response = self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        self.assertIn("decompressed", response["error"][0]["message"])
+        self.assertFalse(ImportCheckpoint.objects.exists())
+        self.assertEqual([files for _, _, files in os.walk(self.error_report_dir) if files], [])
+
+    def test_checkpoint_is_advanced_with_batch(self):
+        advance = ImportCheckpoint.advance
+        checkpoints = []
+
+        def record_checkpoint(checkpoint, *args, **kwargs):
+            advance(checkpoint, *args, **kwargs)
+            checkpoint.refresh_from_db()
+            checkpoints.append((checkpoint.record_count, checkpoint.example_count, checkpoint.line_num))
+
+        with patch.object(ImportCheckpoint, "advance", autospec=True, side_effect=record_checkpoint):
+            self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        self.assertEqual(checkpoints, [(1, 1, 1), (2, 2, 2), (3, 3, 3)])
+
+    @override_settings(IMPORT_PROGRESS_INTERVAL=0)
+    def test_publish_progress(self):
+        with patch.object(import_dataset, "update_state") as update_state:
+            self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        states = [call.kwargs["state"] for call in update_state.call_args_list]
+        self.assertEqual(states, [PROGRESS] * 3)
+        metas = [call.kwargs["meta"] for call in update_state.call_args_list]
+        self.assertEqual([meta["project_id"] for meta in metas], [self.project.item.id] * 3)
+        self.assertEqual([meta["progress"]["rows"] for meta in metas], [1, 2, 3])
+        self.assertEqual([meta["progress"]["examples"] for meta in metas], [1, 2, 3])
+        self.assertEqual(metas[-1]["progress"]["eta"], 0.0)
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_report_batch_sizes(self):
+        response = self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        self.assertEqual(response["batches"]["count"], 2)
+        self.assertEqual(response["batches"]["min_rows"], 1)
+        self.assertEqual(response["batches"]["max_rows"], 2)
+
+    def create_broken_file(self):
+        path = os.path.join(self.error_report_dir, "broken.jsonl")
+        with open(path, "w") as f:
+            f.write('{"text": "exampleA", "labels": ["positive"]}\nbroken\n')
+            f.write('{"text": "exampleB", "labels": ["negative"]}\nbroken\n')
+            f.write('{"text": "exampleC", "labels": []}\n')
+        return path
+
+    def read_error_report(self, response):
+        path = os.path.join(self.error_report_dir, str(self.project.item.id), f"{response['error_report']}.jsonl")
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_retry_reports_errors_once(self):
+        save_batch = TextClassificationDataset.save_batch
+        calls = []
+
+        def fail_at_second_batch(dataset, user, records):
+            calls.append(records)
+            examples = save_batch(dataset, user, records)
+            if len(calls) == 2:
+                raise OperationalError("connection lost")
+            return examples
+
+        with patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=fail_at_second_batch):
+            response = self.import_dataset(self.create_broken_file(), "JSONL", self.task, self.kwargs)
+        self.assertEqual(response["error_count"], 2)
+        self.assertEqual([error["line"] for error in response["error"]], [2, 4])
+        self.assertEqual(self.read_error_report(response), response["error"])
+
+    @override_settings(IMPORT_MAX_ERRORS=1)
+    def test_result_has_first_errors(self):
+        response = self.import_dataset(self.create_broken_file(), "JSONL", self.task, self.kwargs)
+        self.assertEqual(response["error_count"], 2)
+        self.assertEqual([error["line"] for error in response["error"]], [2])
+        self.assertEqual([error["line"] for error in self.read_error_report(response)], [2, 4])
+
+    def test_empty_error_report_is_deleted(self):
+        response = self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, self.kwargs)
+        self.assertEqual(response["error_count"], 0)
+        self.assertIsNone(response["error_report"])
+        self.assertEqual(os.listdir(os.path.join(self.error_report_dir, str(self.project.item.id))), [])
+
+
 class TestImportSequenceLabelingData(TestImportData):
     task = ProjectType.SEQUENCE_LABELING
 
@@ -318,6 +515,25 @@ class TestImportImageClassificationData(TestImportData):
         self.import_dataset(filename, file_format, self.task)
         self.assertEqual(Example.objects.count(), 1)
 
+    def test_store_same_image_once(self):
+        filename = "images/1500x500.jpeg"
+        self.import_dataset(filename, "ImageFile", self.task)
+        self.upload_id = _get_file_id()
+        self.import_dataset(filename, "ImageFile", self.task)
+        media_file = MediaFile.objects.get()
+        examples = Example.objects.all()
+        self.assertEqual(examples.count(), 2)
+        self.assertTrue(all(example.media_file_id == media_file.digest for example in examples))
+        self.assertTrue(all(example.filename.name == media_file.file.name for example in examples))
+        self.assertTrue(os.path.exists(media_file.file.path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Example.objects.first().delete()
+        self.assertTrue(MediaFile.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            Example.objects.first().delete()
+        self.assertFalse(MediaFile.objects.exists())
+
 
 @override_settings(ENABLE_FILE_TYPE_CHECK=True)
 class TestFileTypeChecking(TestImportData):
@@ -329,3 +545,224 @@ class TestFileTypeChecking(TestImportData):
         response = self.import_dataset(filename, file_format, self.task)
         self.assertEqual(len(response["error"]), 1)
         self.assertIn("unexpected", response["error"][0]["message"])
+
+
+class TestDeduplication(TestImportData):
+    def setUp(self):
+        super().setUp()
+        self.upload_ids = []
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        for upload_id in self.upload_ids:
+            self.upload_id = upload_id
+            super().tearDown()
+
+    def import_file(self, filename, task, kwargs):
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "JSONL", task, kwargs)
+        self.assertEqual(response["error"], [])
+
+    def write_file(self, records):
+        filename = os.path.join(self.temp_dir, "example.jsonl")
+        with open(filename, "w") as f:
+            f.write("\n".join(json.dumps(record) for record in records))
+        return filename
+
+
+class TestDeduplicatedImport(TestDeduplication):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+
+    def test_import_duplicates_without_deduplication(self):
+        kwargs = {"column_label": "labels"}
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 6)
+
+    def test_skip_duplicates(self):
+        kwargs = {"column_label": "labels", "deduplication": "skip"}
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        filename = self.write_file([{"text": "exampleA", "labels": ["negative"]}, {"text": "exampleD", "labels": []}])
+        self.import_file(filename, self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 4)
+        labels = Example.objects.get(text="exampleA").categories.values_list("label__text", flat=True)
+        self.assertEqual(list(labels), ["positive"])
+
+    def test_skip_duplicates_in_file(self):
+        kwargs = {"column_label": "labels", "deduplication": "skip"}
+        filename = self.write_file([{"text": "exampleA", "labels": ["A"]}, {"text": "exampleA", "labels": ["B"]}])
+        self.import_file(filename, self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 1)
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_merge_duplicates(self):
+        kwargs = {"column_label": "labels", "deduplication": "merge"}
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        filename = self.write_file(
+            [{"text": "exampleA", "labels": ["positive", "negative"]}, {"text": "exampleA", "labels": ["neutral"]}]
+        )
+        self.import_file(filename, self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 3)
+        labels = Example.objects.get(text="exampleA").categories.values_list("label__text", flat=True)
+        self.assertEqual(sorted(labels), ["negative", "neutral", "positive"])
+
+    def test_deduplicate_with_meta_columns(self):
+        kwargs = {"column_label": "labels", "deduplication": "skip", "deduplication_columns": ["source"]}
+        filename = self.write_file(
+            [{"text": "exampleA", "labels": [], "source": "a"}, {"text": "exampleA", "labels": [], "source": "b"}]
+        )
+        self.import_file(filename, self.task, kwargs)
+        self.import_file(filename, self.task, kwargs)
+        self.assertEqual(Example.objects.count(), 2)
+
+    def test_skip_duplicates_of_import_without_deduplication(self):
+        kwargs = {"column_label": "labels"}
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        self.import_file("text_classification/example.jsonl", self.task, {**kwargs, "deduplication": "skip"})
+        self.assertEqual(Example.objects.count(), 3)
+
+
+class TestDeduplicatedRelationImport(TestDeduplication):
+    task = ProjectType.SEQUENCE_LABELING
+
+    def setUp(self):
+        super().setUp()
+        self.project = prepare_project(self.task, use_relation=True)
+        self.user = self.project.admin
+
+    def test_merge_duplicates(self):
+        kwargs = {"deduplication": "merge"}
+        self.import_file("relation_extraction/example.jsonl", RELATION_EXTRACTION, kwargs)
+        self.import_file("relation_extraction/example.jsonl", RELATION_EXTRACTION, kwargs)
+        example = Example.objects.get()
+        self.assertEqual(example.spans.count(), 4)
+        self.assertEqual(example.relations.count(), 3)
+
+    def test_merge_new_relations_into_existing_spans(self):
+        kwargs = {"deduplication": "merge"}
+        self.import_file("relation_extraction/example.jsonl", RELATION_EXTRACTION, kwargs)
+        entities = [
+            {"id": 5, "start_offset": 44, "end_offset": 54, "label": "PERSON"},
+            {"id": 6, "start_offset": 59, "end_offset": 70, "label": "PERSON"},
+        ]
+        relations = [{"from_id": 5, "to_id": 6, "type": "knows"}]
+        record = {"text": Example.objects.get().text, "entities": entities, "relations": relations}
+        filename = self.write_file([record, record])
+        self.import_file(filename, RELATION_EXTRACTION, kwargs)
+        example = Example.objects.get()
+        self.assertEqual(example.spans.count(), 4)
+        self.assertEqual(example.relations.count(), 4)
+        relation = example.relations.get(type__text="knows")
+        self.assertEqual((relation.from_id.start_offset, relation.to_id.start_offset), (44, 59))
+
+
+class TestAtomicImport(TestDeduplication):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+
+    def test_publish_into_project(self):
+        self.import_file("text_classification/example.jsonl", self.task, {"column_label": "labels"})
+        filename = self.write_file([{"text": "exampleD", "labels": ["positive", "neutral"]}])
+        project_count = Project.objects.count()
+        self.import_file(filename, self.task, {"column_label": "labels", "atomic": True})
+        self.assertEqual(Project.objects.count(), project_count)
+        self.assertEqual(Example.objects.filter(project=self.project.item).count(), 4)
+        types = CategoryType.objects.filter(project=self.project.item).values_list("text", flat=True)
+        self.assertEqual(sorted(types), ["negative", "neutral", "positive"])
+        labels = Example.objects.get(text="exampleD").categories.values_list("label__text", flat=True)
+        self.assertEqual(sorted(labels), ["neutral", "positive"])
+
+    @override_settings(IMPORT_BATCH_SIZE=1)
+    def test_failure_leaves_project_untouched(self):
+        save_batch = TextClassificationDataset.save_batch
+        batches = []
+
+        def fail_at_second_batch(dataset, user, records):
+            batches.append(records)
+            examples = save_batch(dataset, user, records)
+            if len(batches) == 2:
+                raise OperationalError("connection lost")
+            return examples
+
+        project_count = Project.objects.count()
+        with patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=fail_at_second_batch):
+            with self.assertRaises(OperationalError):
+                self.import_file(
+                    "text_classification/example.jsonl", self.task, {"column_label": "labels", "atomic": True}
+                )
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(Project.objects.count(), project_count)
+        self.assertFalse(Example.objects.exists())
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(CategoryType.objects.exists())
+
+    def test_skip_duplicates_on_publish(self):
+        kwargs = {"column_label": "labels", "deduplication": "skip", "atomic": True}
+        self.import_file("text_classification/example.jsonl", self.task, kwargs)
+        filename = self.write_file([{"text": "exampleA", "labels": ["negative"]}, {"text": "exampleD", "labels": []}])
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "JSONL", self.task, kwargs)
+        self.assertEqual(response["progress"]["examples"], 1)
+        self.assertEqual(Example.objects.count(), 4)
+        labels = Example.objects.get(text="exampleA").categories.values_list("label__text", flat=True)
+        self.assertEqual(list(labels), ["positive"])
+
+    def test_merge_is_not_supported(self):
+        kwargs = {"column_label": "labels", "deduplication": "merge", "atomic": True}
+        response = self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, kwargs)
+        self.assertEqual(len(response["error"]), 1)
+        self.assertFalse(Example.objects.exists())
+
+
+class TestCompressedImport(TestDeduplication):
+    task = ProjectType.DOCUMENT_CLASSIFICATION
+
+    def test_zip_archive(self):
+        filename = os.path.join(self.temp_dir, "example.zip")
+        with zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("a.jsonl", '{"text": "exampleA", "labels": ["positive"]}\n')
+            zf.writestr("dir/b.jsonl", '{"text": "exampleB", "labels": []}\nbroken\n')
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "JSONL", self.task, {"column_label": "labels"})
+        self.assertEqual(response["error_count"], 1)
+        examples = Example.objects.order_by("text").values_list("text", "upload_name")
+        self.assertEqual(
+            list(examples),
+            [("exampleA", f"{filename}/a.jsonl"), ("exampleB", f"{filename}/dir/b.jsonl")],
+        )
+
+    def test_gzip_file(self):
+        filename = os.path.join(self.temp_dir, "example.csv.gz")
+        with gzip.open(filename, "wt") as f:
+            f.write("text,label\nexampleA,positive\nexampleB,negative\n")
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "CSV", self.task)
+        self.assertEqual(response["error"], [])
+        labels = Category.objects.order_by("example__text").values_list("example__text", "label__text")
+        self.assertEqual(list(labels), [("exampleA", "positive"), ("exampleB", "negative")])
+
+    @override_settings(MAX_DECOMPRESSED_SIZE=1024)
+    def test_reject_too_large_gzip_content(self):
+        filename = os.path.join(self.temp_dir, "example.txt.gz")
+        with gzip.open(filename, "wt") as f:
+            f.write("a" * 2048)
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "TextFile", self.task)
+        self.assertIn("decompressed", response["error"][0]["message"])
+        self.assertFalse(Example.objects.exists())
+
+    @override_settings(MAX_DECOMPRESSED_SIZE=1024)
+    def test_reject_too_large_zip_member(self):
+        filename = os.path.join(self.temp_dir, "example.zip")
+        with zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("a.jsonl", '{"text": "exampleA"}\n' * 100)
+        self.upload_id = _get_file_id()
+        self.upload_ids.append(self.upload_id)
+        response = self.import_dataset(filename, "JSONL", self.task)
+        self.assertIn("decompressed", response["error"][0]["message"])
+        self.assertFalse(Example.objects.exists())
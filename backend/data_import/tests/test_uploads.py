@@ -0,0 +1,122 @@
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from django.core.files import File
+from django.test import TestCase
+from django_drf_filepond.models import StoredUpload, TemporaryUpload
+from django_drf_filepond.utils import _get_file_id
+
+from data_import.pipeline.uploads import (
+    UploadStore,
+    add_media_files,
+    link_or_copy,
+    map_in_threads,
+)
+from examples.models import MediaFile
+from examples.storage import parse_media_path
+
+
+class TestLinkOrCopy(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, "source.png")
+        with open(self.source, "wb") as f:
+            f.write(b"image")
+        self.target = os.path.join(self.test_dir, "store", "upload", "source.png")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_link(self):
+        self.assertTrue(link_or_copy(self.source, self.target))
+        self.assertTrue(os.path.samefile(self.source, self.target))
+
+    def test_already_linked(self):
+        link_or_copy(self.source, self.target)
+        self.assertFalse(link_or_copy(self.source, self.target))
+
+    def test_raise_error_if_target_is_other_file(self):
+        os.makedirs(os.path.dirname(self.target))
+        with open(self.target, "wb") as f:
+            f.write(b"other")
+        with self.assertRaises(FileExistsError):
+            link_or_copy(self.source, self.target)
+
+    def test_copy_across_file_systems(self):
+        with patch("os.link", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            self.assertTrue(link_or_copy(self.source, self.target))
+        self.assertFalse(os.path.samefile(self.source, self.target))
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), b"image")
+
+
+class TestMapInThreads(unittest.TestCase):
+    def test_keep_order(self):
+        items = list(range(100))
+        self.assertEqual(map_in_threads(lambda x: x * 2, items, max_workers=8), [x * 2 for x in items])
+        self.assertEqual(map_in_threads(lambda x: x * 2, items, max_workers=1), [x * 2 for x in items])
+
+
+class TestUploadStore(TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store_dir)
+        store_path = patch("django_drf_filepond.drf_filepond_settings.FILE_STORE_PATH", self.store_dir)
+        store_path.start()
+        self.addCleanup(store_path.stop)
+        self.temporary_uploads = []
+        for i in range(3):
+            source = os.path.join(self.store_dir, f"{i}.png")
+            with open(source, "wb") as f:
+                f.write(b"image")
+            with open(source, "rb") as f:
+                tu = TemporaryUpload.objects.create(
+                    upload_id=_get_file_id(), file_id=_get_file_id(), file=File(f, f"{i}.png"), upload_type="F"
+                )
+            self.temporary_uploads.append(tu)
+        self.addCleanup(TemporaryUpload.objects.all().delete)
+
+    def test_commit(self):
+        store = UploadStore(self.temporary_uploads, max_workers=2)
+        store.start()
+        targets = [store.get_store_path(tu) for tu in self.temporary_uploads]
+        store.commit()
+        self.assertFalse(TemporaryUpload.objects.exists())
+        self.assertEqual(StoredUpload.objects.count(), 3)
+        self.assertTrue(all(os.path.exists(target) for target in targets))
+
+    def test_discard(self):
+        store = UploadStore(self.temporary_uploads, max_workers=2)
+        store.start()
+        targets = [store.get_store_path(tu) for tu in self.temporary_uploads]
+        store.discard()
+        self.assertEqual(TemporaryUpload.objects.count(), 3)
+        self.assertFalse(StoredUpload.objects.exists())
+        self.assertFalse(any(os.path.exists(target) for target in targets))
+        self.assertTrue(all(os.path.exists(tu.get_file_path()) for tu in self.temporary_uploads))
+
+    def test_store_same_content_once(self):
+        files = [(tu.get_file_path(), tu.upload_name) for tu in self.temporary_uploads]
+        paths = dict(zip([tu.upload_id for tu in self.temporary_uploads], add_media_files(files, max_workers=2)))
+        self.assertEqual(len(set(paths.values())), 1)
+        self.assertEqual(MediaFile.objects.count(), 1)
+        self.assertTrue(all(parse_media_path(path) for path in paths.values()))
+
+        store = UploadStore(self.temporary_uploads, max_workers=2, paths=paths)
+        store.commit()
+        target = os.path.join(self.store_dir, next(iter(paths.values())))
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"image")
+        self.assertEqual(StoredUpload.objects.filter(file=paths[self.temporary_uploads[0].upload_id]).count(), 3)
+
+    def test_keep_media_files_on_discard(self):
+        files = [(tu.get_file_path(), tu.upload_name) for tu in self.temporary_uploads]
+        paths = dict(zip([tu.upload_id for tu in self.temporary_uploads], add_media_files(files)))
+        store = UploadStore(self.temporary_uploads, paths=paths)
+        store.start()
+        store.discard()
+        self.assertTrue(os.path.exists(os.path.join(self.store_dir, next(iter(paths.values())))))
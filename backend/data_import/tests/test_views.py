@@ -1,7 +1,19 @@
+import json
+import shutil
+import tempfile
+import uuid
+from unittest.mock import patch
+
+from celery import states
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from api.tests.utils import CRUDMixin
+from data_import.celery_tasks import PROGRESS, get_error_report_path, import_dataset
+from data_import.models import ImportTask
+from data_import.pipeline.error_reports import ErrorReport
+from data_import.pipeline.progress import Progress
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -19,3 +31,106 @@ class TestImportCatalog(CRUDMixin):
     def test_denies_project_staff_to_list_catalog(self):
         for member in self.project.staffs:
             self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+
+class TestImportAPI(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.url = reverse(viewname="upload", args=[self.project.item.id])
+        self.data = {"uploadIds": [], "format": "JSONL", "task": ProjectType.DOCUMENT_CLASSIFICATION}
+
+    @patch("data_import.views.import_dataset.apply_async")
+    def test_records_project_of_task(self, apply_async):
+        apply_async.side_effect = lambda kwargs, task_id: import_dataset.AsyncResult(task_id)
+        response = self.assert_create(self.project.admin, status.HTTP_200_OK)
+        task = ImportTask.objects.get(task_id=response.data["task_id"])
+        self.assertEqual(task.project_id, self.project.item.id)
+
+
+class TestImportStatus(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.task_id = str(uuid.uuid4())
+        ImportTask.objects.create(task_id=self.task_id, project=self.project.item)
+        self.url = reverse(viewname="upload_status", args=[self.project.item.id, self.task_id])
+        self.progress = Progress(total_bytes=100, bytes_read=50, rows=10, examples=10, rows_per_sec=5.0, eta=2.0)
+
+    def store(self, task_id, state, meta):
+        import_dataset.backend.store_result(task_id, meta, state)
+
+    def test_allows_project_admin_to_get_progress(self):
+        self.store(self.task_id, PROGRESS, {"project_id": self.project.item.id, "progress": self.progress.dict()})
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["state"], PROGRESS)
+        self.assertFalse(response.data["ready"])
+        self.assertEqual(response.data["progress"], self.progress.dict())
+
+    def test_denies_project_staff_to_get_progress(self):
+        for member in self.project.staffs:
+            self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+    def test_hides_task_of_other_project(self):
+        other = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        ImportTask.objects.filter(task_id=self.task_id).update(project=other.item)
+        for state, meta in [
+            (PROGRESS, {"project_id": other.item.id, "progress": self.progress.dict()}),
+            (states.SUCCESS, {"error": [], "progress": self.progress.dict()}),
+            (states.FAILURE, ValueError("error")),
+        ]:
+            with self.subTest(state=state):
+                self.store(self.task_id, state, meta)
+                self.assert_fetch(self.project.admin, status.HTTP_404_NOT_FOUND)
+
+    def test_hides_unknown_task(self):
+        ImportTask.objects.all().delete()
+        self.assert_fetch(self.project.admin, status.HTTP_404_NOT_FOUND)
+
+    def test_merges_progress_of_shards(self):
+        shard_ids = [str(uuid.uuid4()) for _ in range(2)]
+        self.store(self.task_id, PROGRESS, {"project_id": self.project.item.id, "shards": shard_ids})
+        self.store(shard_ids[0], PROGRESS, {"project_id": self.project.item.id, "progress": self.progress.dict()})
+        finished = Progress(total_bytes=100, bytes_read=100, rows=20, examples=20, eta=0.0)
+        self.store(shard_ids[1], states.SUCCESS, {"error": [], "count": 20, "progress": finished.dict()})
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["progress"]["bytes_read"], 150)
+        self.assertEqual(response.data["progress"]["rows"], 30)
+        self.assertEqual(response.data["progress"]["eta"], 2.0)
+
+    def test_shows_result_when_finished(self):
+        result = {"error": [], "progress": self.progress.dict()}
+        self.store(self.task_id, states.SUCCESS, result)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertTrue(response.data["ready"])
+        self.assertEqual(response.data["result"], result)
+        self.assertEqual(response.data["progress"], self.progress.dict())
+
+    def test_pending_task_has_no_progress(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["state"], states.PENDING)
+        self.assertIsNone(response.data["progress"])
+
+
+class TestImportErrorReport(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.report_id = str(uuid.uuid4())
+        self.url = reverse(viewname="upload_error_report", args=[self.project.item.id, self.report_id])
+        self.error_report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.error_report_dir)
+        error_report_settings = override_settings(IMPORT_ERROR_REPORT_DIR=self.error_report_dir)
+        error_report_settings.enable()
+        self.addCleanup(error_report_settings.disable)
+
+    def test_allows_project_admin_to_download_report(self):
+        error = {"filename": "example.jsonl", "line": 2, "message": "Invalid data in line 2"}
+        ErrorReport(get_error_report_path(self.project.item.id, self.report_id)).add([error])
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), (json.dumps(error) + "\n").encode())
+
+    def test_denies_project_staff_to_download_report(self):
+        ErrorReport(get_error_report_path(self.project.item.id, self.report_id))
+        for member in self.project.staffs:
+            self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+    def test_returns_404_if_report_does_not_exist(self):
+        self.assert_fetch(self.project.admin, status.HTTP_404_NOT_FOUND)
@@ -1,9 +1,24 @@
 from django.urls import include, path
 
-from .views import DatasetCatalog, DatasetImportAPI
+from .views import (
+    DatasetCatalog,
+    DatasetImportAPI,
+    DatasetImportErrorReportAPI,
+    DatasetImportStatusAPI,
+)
 
 urlpatterns = [
     path("fp/", include("django_drf_filepond.urls")),
     path(route="projects/<int:project_id>/upload", view=DatasetImportAPI.as_view(), name="upload"),
+    path(
+        route="projects/<int:project_id>/upload/<uuid:task_id>",
+        view=DatasetImportStatusAPI.as_view(),
+        name="upload_status",
+    ),
+    path(
+        route="projects/<int:project_id>/upload/<uuid:report_id>/errors",
+        view=DatasetImportErrorReportAPI.as_view(),
+        name="upload_error_report",
+    ),
     path(route="projects/<int:project_id>/catalog", view=DatasetCatalog.as_view(), name="catalog"),
 ]
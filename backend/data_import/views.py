@@ -1,11 +1,19 @@
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+from celery.result import AsyncResult
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .celery_tasks import import_dataset
+from .celery_tasks import PROGRESS, get_error_report_path, import_dataset
+from .models import ImportTask
 from .pipeline.catalog import Options
+from .pipeline.progress import Progress
 from projects.models import Project
 from projects.permissions import IsProjectAdmin
 
@@ -28,12 +36,85 @@ class DatasetImportAPI(APIView):
         upload_ids = request.data.pop("uploadIds")
         file_format = request.data.pop("format")
         task = request.data.pop("task")
-        celery_task = import_dataset.delay(
-            user_id=request.user.id,
-            project_id=self.kwargs["project_id"],
-            file_format=file_format,
-            upload_ids=upload_ids,
-            task=task,
-            **request.data,
+        # The project is recorded before the task starts, so its status can be checked in any state.
+        task_id = str(uuid.uuid4())
+        ImportTask.objects.create(task_id=task_id, project_id=self.kwargs["project_id"])
+        celery_task = import_dataset.apply_async(
+            kwargs=dict(
+                user_id=request.user.id,
+                project_id=self.kwargs["project_id"],
+                file_format=file_format,
+                upload_ids=upload_ids,
+                task=task,
+                **request.data,
+            ),
+            task_id=task_id,
         )
         return Response({"task_id": celery_task.task_id})
+
+
+def get_progress(task: AsyncResult) -> Optional[Dict[str, Any]]:
+    """Returns the progress of an import task, or None if it isn't available."""
+    if task.state == PROGRESS:
+        return task.info.get("progress")
+    if task.successful() and isinstance(task.result, dict):
+        return task.result.get("progress")
+    return None
+
+
+def merge_progress(shard_ids: List[str]) -> Dict[str, Any]:
+    """Sums up the progress of the shard tasks. The shards which haven't started make the ETA unknown."""
+    progress = Progress(eta=0.0)
+    for shard_id in shard_ids:
+        shard_progress = get_progress(AsyncResult(shard_id))
+        progress.merge(Progress(**shard_progress) if shard_progress else Progress())
+    return progress.dict()
+
+
+class DatasetImportStatusAPI(APIView):
+    """Shows the state of an import task.
+
+    While the task is running, `progress` has the numbers of bytes read, records parsed,
+    examples and labels saved and errors, with the speed and the ETA in seconds.
+    The task is found only in the project which it was started for.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectAdmin]
+
+    def get(self, request, *args, **kwargs):
+        task_id = str(self.kwargs["task_id"])
+        if not ImportTask.objects.filter(task_id=task_id, project_id=self.kwargs["project_id"]).exists():
+            raise Http404("The import task is not found in the project.")
+        task = AsyncResult(task_id)
+        if task.state == PROGRESS:
+            meta = task.info
+            progress = merge_progress(meta["shards"]) if "shards" in meta else meta.get("progress")
+            return Response({"state": task.state, "ready": False, "progress": progress, "result": None, "error": None})
+
+        ready = task.ready()
+        error = ready and not task.successful()
+        return Response(
+            {
+                "state": task.state,
+                "ready": ready,
+                "progress": get_progress(task),
+                "result": task.result if ready and not error else None,
+                "error": {"text": str(task.result)} if error else None,
+            }
+        )
+
+
+class DatasetImportErrorReportAPI(APIView):
+    """Downloads all the errors of an import task as JSON Lines.
+
+    The result of the task has only the first errors, and the name of this report as `error_report`.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectAdmin]
+
+    def get(self, request, *args, **kwargs):
+        report_id = str(self.kwargs["report_id"])
+        path = get_error_report_path(self.kwargs["project_id"], report_id)
+        if not os.path.exists(path):
+            raise Http404("The error report is not found.")
+        return FileResponse(open(path, mode="rb"), as_attachment=True, filename=f"errors-{report_id}.jsonl")
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from examples.models import MediaFile
+
+
+class Command(BaseCommand):
+    help = "Deletes the files in the media store which no example refers to"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=24,
+            help="the minimum age of the files to delete in hours, not to delete the files of running imports",
+        )
+
+    def handle(self, *args, **options):
+        created_before = timezone.now() - timedelta(hours=options["min_age"])
+        unused = MediaFile.objects.filter(examples__isnull=True, created_at__lt=created_before)
+        deleted = MediaFile.objects.release(unused.values_list("digest", flat=True))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unused media files."))
@@ -1,14 +1,41 @@
-from django.db.models import Count, Manager
+from typing import Iterable
+
+from django.db.models import Count, Manager, ProtectedError
 
 
 class ExampleManager(Manager):
     def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-        super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        objs = super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        # The primary keys are set by INSERT ... RETURNING if the database supports it,
+        # e.g. PostgreSQL, SQLite 3.35+ and MariaDB 10.5+. Otherwise, fetch them by uuid.
+        if all(obj.pk is not None for obj in objs):
+            return objs
         uuids = [data.uuid for data in objs]
         examples = self.in_bulk(uuids, field_name="uuid")
         return [examples[uid] for uid in uuids]
 
 
+class MediaFileManager(Manager):
+    def with_ref_counts(self):
+        """Annotates the media files with `ref_count`, the number of the examples which refer to them."""
+        return self.annotate(ref_count=Count("examples"))
+
+    def release(self, digests: Iterable[str]) -> int:
+        """Deletes the media files which no example refers to any more. Returns the number of the deleted files.
+
+        The files are deleted from the storage by django-cleanup after the transaction is committed.
+        """
+        deleted = 0
+        for media_file in self.filter(pk__in=list(digests), examples__isnull=True):
+            try:
+                media_file.delete()
+                deleted += 1
+            except ProtectedError:
+                # An example has referred to it since it was selected.
+                pass
+        return deleted
+
+
 class ExampleStateManager(Manager):
     def count_done(self, examples, user=None):
         if user:
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0008_assignment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="example",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "content_hash"], name="examples_ex_project_76d262_idx"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_drf_filepond.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0009_example_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                ("digest", models.CharField(max_length=64, primary_key=True, serialize=False)),
+                (
+                    "file",
+                    models.FileField(
+                        max_length=1024, storage=django_drf_filepond.models.FilePondLocalStoredStorage(), upload_to=""
+                    ),
+                ),
+                ("size", models.BigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="example",
+            name="media_file",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="examples",
+                to="examples.mediafile",
+            ),
+        ),
+    ]
@@ -5,21 +5,43 @@ from django.core.exceptions import ValidationError
 from django.db import models
 from django_drf_filepond.models import DrfFilePondStoredStorage
 
-from .managers import ExampleManager, ExampleStateManager
+from .managers import ExampleManager, ExampleStateManager, MediaFileManager
+from .storage import ExampleFileStorage
 from projects.models import Project
 
 
+class MediaFile(models.Model):
+    """MediaFile is a file in the content-addressable media store.
+
+    A file is stored once under the SHA-256 digest of its content, and shared by all the examples with
+    the same content, including the ones of cloned projects. The examples refer to it by `Example.media_file`,
+    so its reference count is the number of the examples. When no example refers to it, the row is deleted
+    by `MediaFileManager.release`, and the file is deleted by django-cleanup.
+    """
+
+    objects = MediaFileManager()
+
+    digest = models.CharField(primary_key=True, max_length=64)
+    file = models.FileField(max_length=1024, storage=DrfFilePondStoredStorage())
+    size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
 class Example(models.Model):
     objects = ExampleManager()
 
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True, unique=True)
     meta = models.JSONField(default=dict)
-    filename = models.FileField(default=".", max_length=1024, storage=DrfFilePondStoredStorage())
+    filename = models.FileField(default=".", max_length=1024, storage=ExampleFileStorage())
+    media_file = models.ForeignKey(
+        to=MediaFile, on_delete=models.PROTECT, null=True, blank=True, related_name="examples"
+    )
     upload_name = models.CharField(max_length=512)
     project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="examples")
     annotations_approved_by = models.ForeignKey(to=User, on_delete=models.SET_NULL, null=True, blank=True)
     text = models.TextField(null=True, blank=True)
     score = models.FloatField(default=100)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -36,6 +58,7 @@ class Example(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [models.Index(fields=["project", "content_hash"])]
 
 
 class Assignment(models.Model):
@@ -0,0 +1,14 @@
+import functools
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Example, MediaFile
+
+
+@receiver(post_delete, sender=Example)
+def release_media_file(sender, instance: Example, using: str, **kwargs):
+    """Deletes the media file of a deleted example if no other example refers to it."""
+    if instance.media_file_id:
+        transaction.on_commit(functools.partial(MediaFile.objects.release, [instance.media_file_id]), using)
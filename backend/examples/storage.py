@@ -0,0 +1,52 @@
+import hashlib
+import re
+from typing import Optional
+
+from django_drf_filepond.models import DrfFilePondStoredStorage
+
+# The directory of the content-addressable media store in the file store.
+MEDIA_STORE_DIR = "content"
+MEDIA_PATH = re.compile(rf"^{MEDIA_STORE_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})(\.[^/]*)?$")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def media_path(digest: str, extension: str = "") -> str:
+    """Returns the path of a file in the media store, e.g. `content/ab/cd/abcd...png`.
+
+    The files are sharded into 65536 directories by the first four hex digits of the digest,
+    so no directory has too many entries to list or to look up a file quickly.
+
+    Args:
+        digest: The SHA-256 digest of the content in hex.
+        extension: The extension of the file with the leading dot, e.g. `.png`.
+    """
+    return f"{MEDIA_STORE_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+
+def parse_media_path(path: str) -> Optional[str]:
+    """Returns the digest of a file in the media store. None if the file isn't in the store."""
+    match = MEDIA_PATH.match(path)
+    return match.group("digest") if match else None
+
+
+def hash_file(path: str) -> str:
+    """Returns the SHA-256 digest of the content of a file in hex."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExampleFileStorage(DrfFilePondStoredStorage):
+    """ExampleFileStorage is the storage of the files of examples.
+
+    The files in the media store are shared by the examples, so they aren't deleted with an example
+    but with their `MediaFile` when no example refers to them.
+    """
+
+    def delete(self, name: str):
+        if parse_media_path(name):
+            return
+        # The storage is a lazy object, which sets up the wrapped storage on the first access.
+        self.__getattr__("delete")(name)
@@ -1,7 +1,11 @@
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
 from model_mommy import mommy
 
-from examples.models import ExampleState
+from examples.models import Example, ExampleState, MediaFile
+from examples.storage import media_path, parse_media_path
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -69,3 +73,69 @@ class TestExample(TestCase):
         project = prepare_project(ProjectType.IMAGE_CLASSIFICATION)
         example = mommy.make("Example", project=project.item)
         self.assertEqual(str(example.filename), example.data)
+
+
+class TestExampleManager(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+
+    def assert_bulk_create(self, num_queries):
+        examples = [Example(project=self.project.item, text=str(i)) for i in range(3)]
+        with self.assertNumQueries(num_queries):
+            created = Example.objects.bulk_create(examples)
+        self.assertEqual([example.text for example in created], ["0", "1", "2"])
+        for example in created:
+            self.assertEqual(Example.objects.get(pk=example.pk).uuid, example.uuid)
+
+    def test_bulk_create_uses_returned_primary_keys(self):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.skipTest("The database doesn't return rows from bulk inserts.")
+        self.assert_bulk_create(num_queries=1)
+
+    def test_bulk_create_fetches_primary_keys(self):
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            self.assert_bulk_create(num_queries=2)
+
+
+class TestMediaPath(TestCase):
+    def test_shard_by_digest(self):
+        digest = "abcd" + "0" * 60
+        path = media_path(digest, ".PNG")
+        self.assertEqual(path, f"content/ab/cd/{digest}.png")
+        self.assertEqual(parse_media_path(path), digest)
+
+    def test_parse_other_path(self):
+        self.assertIsNone(parse_media_path("upload-id/image.png"))
+        self.assertIsNone(parse_media_path("."))
+
+
+class TestMediaFile(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.IMAGE_CLASSIFICATION)
+        self.media_file = MediaFile.objects.create(digest="a" * 64, file=media_path("a" * 64, ".png"))
+        self.examples = [
+            mommy.make(
+                "Example", project=self.project.item, filename=self.media_file.file.name, media_file=self.media_file
+            )
+            for _ in range(2)
+        ]
+
+    def test_ref_count(self):
+        self.assertEqual(MediaFile.objects.with_ref_counts().get().ref_count, 2)
+
+    @patch("django.core.files.storage.FileSystemStorage.delete")
+    def test_release_when_last_example_is_deleted(self, delete):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.examples[0].delete()
+        self.assertTrue(MediaFile.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.examples[1].delete()
+        self.assertFalse(MediaFile.objects.exists())
+        # The file is deleted with the media file, not with the examples.
+        delete.assert_called_once_with(self.media_file.file.name)
+
+    def test_keep_files_of_cloned_project(self):
+        self.project.item.clone()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.item.delete()
+        self.assertEqual(MediaFile.objects.with_ref_counts().get().ref_count, 2)